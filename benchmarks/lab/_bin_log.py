@@ -0,0 +1,21 @@
+"""
+Binary Log - Registro binario de métricas por frame
+===================================================
+Un registro little-endian '<fff' (fps, physics_ms, datatx_ms) por frame
+en benchmarks/results/*.bin. monitor.py lo lee con np.fromfile en una
+sola lectura, sin regex. Los campos no medidos se escriben como NaN.
+"""
+import struct
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).parent.parent / "results"
+
+# Mismo layout que BINARY_LOG_DTYPE en monitor.py
+RECORD = struct.Struct("<fff")
+NAN = float("nan")
+
+
+def open_binary_log(name: str):
+    """Abre (trunca) benchmarks/results/<name>.bin para escritura binaria."""
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    return (RESULTS_DIR / f"{name}.bin").open("wb")
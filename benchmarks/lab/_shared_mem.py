@@ -0,0 +1,67 @@
+"""
+Shared Memory - Buffers host compartidos con Taichi
+===================================================
+Helpers para reservar destinos de lectura que los kernels Taichi
+escriben directamente (external arrays), evitando to_numpy().
+
+En backends de memoria unificada (CPU, iGPU) el kernel recibe el
+puntero host tal cual: la escritura cae en las mismas páginas del
+array NumPy (zero-copy). En GPU discreta Taichi hace una única copia
+hacia ese mismo buffer, sin reservar uno nuevo por frame.
+"""
+import numpy as np
+import taichi as ti
+
+# Alineación de página: requerida para importar memoria host en
+# Vulkan (VK_EXT_external_memory_host) o registrarla en CUDA.
+PAGE_SIZE = 4096
+
+# Backends donde host y dispositivo comparten la misma RAM física
+_UNIFIED_ARCHS = (ti.x64, ti.arm64)
+
+
+def is_unified_memory() -> bool:
+    """True si el backend Taichi activo comparte memoria con el host."""
+    return ti.lang.impl.current_cfg().arch in _UNIFIED_ARCHS
+
+
+def make_shared_ndarray(shape, dtype=np.float32) -> np.ndarray:
+    """
+    Reserva un array NumPy C-contiguo alineado a página.
+
+    Pasarlo como argumento ti.types.ndarray() permite que el kernel
+    escriba en él directamente; en memoria unificada no hay copia.
+    """
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    raw = np.empty(nbytes + PAGE_SIZE, dtype=np.uint8)
+    offset = (-raw.ctypes.data) % PAGE_SIZE
+    return raw[offset:offset + nbytes].view(dtype).reshape(shape)
+
+
+# =============================================================================
+# CONTADOR LIVE (monitor.py --live)
+# =============================================================================
+# Nombre del segmento compartido; monitor.py lo abre por este mismo nombre.
+LIVE_FPS_SHM = "lifesim_live_fps"
+# Slots int64: [0] = FPS del último segundo, [1] = nº de muestras publicadas
+LIVE_FPS_SLOTS = 2
+
+
+def create_live_counter():
+    """
+    Crea el segmento compartido del contador de FPS.
+
+    Retorna (shm, slots): el proceso dueño escribe en slots y al final
+    llama a shm.close() + shm.unlink().
+    """
+    from multiprocessing import shared_memory
+    nbytes = LIVE_FPS_SLOTS * np.dtype(np.int64).itemsize
+    try:
+        shm = shared_memory.SharedMemory(name=LIVE_FPS_SHM, create=True, size=nbytes)
+    except FileExistsError:
+        # Segmento huérfano de un run abortado: se reutiliza
+        shm = shared_memory.SharedMemory(name=LIVE_FPS_SHM)
+    slots = np.ndarray((LIVE_FPS_SLOTS,), dtype=np.int64, buffer=shm.buf)
+    slots[:] = 0
+    return shm, slots
@@ -5,33 +5,47 @@ import numpy as np
 ti.init(arch=ti.vulkan)
 
 MAX_N = 10000
-field = ti.field(dtype=ti.f32, shape=(MAX_N, 6))
+# NDArray (no field): en Vulkan puede vivir en el heap HOST_VISIBLE|DEVICE_LOCAL
+# (ReBAR) y la lectura evita el buffer de staging intermedio de to_numpy().
+field = ti.ndarray(dtype=ti.f32, shape=(MAX_N, 6))
+
+# Destino host persistente: se reserva una vez y se reutiliza en cada descarga
+field_out = np.empty((MAX_N, 6), dtype=np.float32)
+
+@ti.kernel
+def read_field(src: ti.types.ndarray(), dst: ti.types.ndarray()):
+    """Escribe el ndarray directo en el buffer host (sin array nuevo por llamada)."""
+    for I in ti.grouped(src):
+        dst[I] = src[I]
+
+@ti.kernel
+def copy_prefix(src: ti.types.ndarray(), dst: ti.types.ndarray(), n: ti.i32):
+    """Copia solo las primeras n filas del ndarray (prefijo vivo)."""
+    for i in range(n):
+        for j in ti.static(range(6)):
+            dst[i, j] = src[i, j]
 
 def benchmark():
     # Warmup
-    _ = field.to_numpy()
+    read_field(field, field_out)
+    copy_prefix(field, field_out[:500], 500)
     
     # 1. Full Download
     times_full = []
     for _ in range(100):
         start = time.perf_counter()
-        data = field.to_numpy()
+        read_field(field, field_out)
+        data = field_out
         times_full.append(time.perf_counter() - start)
     
-    # 2. Sliced Download (if supported efficiently)
-    # Note: field[:100] returns a 'SnodeRef' or similar in some versions
+    # 2. Sliced Download (copy kernel sobre el prefijo vivo)
+    # to_numpy()[:500] descarga todo el campo y luego corta en Python.
+    # copy_prefix escribe solo 500 filas en una vista contigua del buffer host.
     times_partial = []
     for _ in range(100):
         start = time.perf_counter()
-        # In Taichi, you can't directly slice a field for to_numpy() effectively 
-        # unless it's an ndarray or we use a copy kernel.
-        # Let's see if we can trick it.
-        try:
-             # This is the test: does this actually transfer less data?
-             # Probably not, it usually downloads the whole field and then slices in Python.
-             data = field.to_numpy()[:500] 
-        except:
-             pass
+        data = field_out[:500]
+        copy_prefix(field, data, 500)
         times_partial.append(time.perf_counter() - start)
 
     print(f"Full download (10k): {np.mean(times_full)*1000:.3f}ms")
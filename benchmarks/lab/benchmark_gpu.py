@@ -2,53 +2,110 @@ import taichi as ti
 import numpy as np
 import moderngl
 import glfw
+import argparse
 import time
 import sys
 import os
 
 # Add project root to path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
 from src.systems.taichi_fields import pos, colors, n_visible, visible_indices, is_active
 from src.renderer.particle_renderer import ParticleRenderer
 from src.renderer.opengl_kernels import (
-    compact_render_data, render_pos, render_col,
+    compact_render_data, universal_gpu_buffer, OFFSET_PARTICLES,
     MAX_BOND_VERTICES
 )
 import src.config.system_constants as const
+from _shared_mem import make_shared_ndarray, is_unified_memory, create_live_counter
+from _bin_log import RECORD, NAN, open_binary_log
 
 # --- CONFIG ---
 NUM_PARTICLES = 7000
 WINDOW_WIDTH = 1024
 WINDOW_HEIGHT = 600
+NS_PER_SEC = 1_000_000_000
+BENCH_DURATION_NS = 10 * NS_PER_SEC
+# Capacidad del log de FPS: una muestra por segundo + margen
+FPS_LOG_CAPACITY = BENCH_DURATION_NS // NS_PER_SEC + 2
+
+# PCG64 con semilla fija: runs reproducibles y generación directa en float32
+rng = np.random.default_rng(0)
+
+# --- BUFFERS HOST PERSISTENTES ---
+# Reservados una sola vez: evita el malloc + staging de to_numpy() por frame.
+host_stats = ti.ndarray(shape=(16), dtype=ti.f32)
+host_particles = ti.ndarray(shape=(const.MAX_PARTICLES, 12), dtype=ti.f32)
+# En memoria unificada (CPU/iGPU) el kernel escribe en estas páginas sin copia.
+pos_out = make_shared_ndarray((const.MAX_PARTICLES, 2), np.float32)
+col_out = make_shared_ndarray((const.MAX_PARTICLES, 3), np.float32)
+
+@ti.kernel
+def read_render_data(pos_dst: ti.types.ndarray(), col_dst: ti.types.ndarray()):
+    """Copia posiciones y colores compactados a los buffers host persistentes.
+
+    Solo recorre las filas del destino: pasando una vista [:n] del buffer
+    host se transfiere únicamente el prefijo vivo, no MAX_PARTICLES filas.
+    """
+    for i in range(pos_dst.shape[0]):
+        row = OFFSET_PARTICLES + i
+        pos_dst[i, 0] = universal_gpu_buffer[row, 0]
+        pos_dst[i, 1] = universal_gpu_buffer[row, 1]
+        col_dst[i, 0] = universal_gpu_buffer[row, 2]
+        col_dst[i, 1] = universal_gpu_buffer[row, 3]
+        col_dst[i, 2] = universal_gpu_buffer[row, 4]
+
+# Arrays de init que no dependen del RNG (is_active, visible_indices),
+# construidos una vez por tamaño y reutilizados en cada reset
+_STATIC_INIT_CACHE: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+
+def _static_init_arrays(n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Retorna (act_np, indices) con padding a MAX_PARTICLES para n partículas."""
+    cached = _STATIC_INIT_CACHE.get(n)
+    if cached is None:
+        act_np = np.zeros(const.MAX_PARTICLES, dtype=np.int32)
+        act_np[:n] = 1
+        indices = np.zeros(const.MAX_PARTICLES, dtype=np.int32)
+        indices[:n] = np.arange(n, dtype=np.int32)
+        cached = _STATIC_INIT_CACHE[n] = (act_np, indices)
+    return cached
 
 def init_data():
     """Inicializa partículas aleatorias en Taichi."""
     print(f"[BENCH] Inicializando {NUM_PARTICLES} partículas...")
+    mem_mode = "unificada (zero-copy)" if is_unified_memory() else "discreta (1 copia)"
+    print(f"[BENCH] Memoria host/dispositivo: {mem_mode}")
     
     # Random positions and colors (Padded to MAX_PARTICLES)
-    pos_np = np.zeros((const.MAX_PARTICLES, 2), dtype=np.float32)
-    pos_np[:NUM_PARTICLES] = np.random.rand(NUM_PARTICLES, 2) * const.WORLD_SIZE
+    # np.empty + escritura in-place: sin memset extra ni temporales de rand()
+    
+    pos_np = np.empty((const.MAX_PARTICLES, 2), dtype=np.float32)
+    pos_np[NUM_PARTICLES:] = 0.0
+    rng.random(out=pos_np[:NUM_PARTICLES], dtype=np.float32)
+    pos_np[:NUM_PARTICLES] *= const.WORLD_SIZE
     
-    col_np = np.zeros((const.MAX_PARTICLES, 3), dtype=np.float32)
-    col_np[:NUM_PARTICLES] = np.random.rand(NUM_PARTICLES, 3)
+    col_np = np.empty((const.MAX_PARTICLES, 3), dtype=np.float32)
+    col_np[NUM_PARTICLES:] = 0.0
+    rng.random(out=col_np[:NUM_PARTICLES], dtype=np.float32)
     
     pos.from_numpy(pos_np)
     colors.from_numpy(col_np)
     
+    act_np, indices = _static_init_arrays(NUM_PARTICLES)
+    
     # Is Active
-    act_np = np.zeros(const.MAX_PARTICLES, dtype=np.int32)
-    act_np[:NUM_PARTICLES] = 1
     is_active.from_numpy(act_np)
     
     # Fake Visibility (All visible for stress test)
     n_visible[None] = NUM_PARTICLES
-    
-    indices = np.zeros(const.MAX_PARTICLES, dtype=np.int32)
-    indices[:NUM_PARTICLES] = np.arange(NUM_PARTICLES, dtype=np.int32)
     visible_indices.from_numpy(indices)
 
 def main():
+    parser = argparse.ArgumentParser(description="Benchmark GPU (compactación + render)")
+    parser.add_argument("--binary-log", action="store_true",
+                        help="Escribir muestras de FPS en results/benchmark_gpu.bin")
+    args = parser.parse_args()
+    
     # 1. Taichi Init (Already done by import src.systems.taichi_fields)
     # ti.init(arch=ti.vulkan) -> REMOVED to avoid Double Init Error
     
@@ -85,43 +142,70 @@ def main():
     
     print("[BENCH] Iniciando Loop de Renderizado (Sin Física)...")
     
+    # Reloj monotónico entero: un solo perf_counter_ns por frame
+    pc = time.perf_counter_ns
     frames = 0
-    last_time = time.time()
-    start_bench = last_time
-    
-    while not glfw.window_should_close(window):
-        t_start = time.perf_counter()
-        
-        # A. Compaction (GPU)
-        compact_render_data()
-        ti.sync() # Wait for Taichi
-        
-        # B. Data Transfer (GPU -> RAM)
-        # En benchmark real, descargamos TODO lo visible (7000)
-        pos_data = render_pos.to_numpy()[:NUM_PARTICLES]
-        col_data = render_col.to_numpy()[:NUM_PARTICLES]
-        
-        # C. Render (ModernGL)
-        ctx.clear(0.05, 0.05, 0.05)
-        # Dummy bonds/debug
-        renderer.render(pos_data, col_data, None, None, None, WINDOW_WIDTH, WINDOW_HEIGHT, camera_params)
-        
-        glfw.swap_buffers(window)
-        glfw.poll_events()
-        
-        # FPS Counter
-        frames += 1
-        now = time.time()
-        if now - last_time >= 1.0:
-            print(f"FPS: {frames}")
-            frames = 0
-            last_time = now
+    last_ns = pc()
+    deadline_ns = last_ns + BENCH_DURATION_NS
+    
+    # Muestras (t_ns, frames) pre-reservadas: sin print/write(2) en el loop
+    fps_log = np.empty((FPS_LOG_CAPACITY, 2), dtype=np.int64)
+    n_samples = 0
+    # Contador compartido que lee `monitor.py --live` desde otro proceso
+    live_shm, live_fps = create_live_counter()
+    
+    try:
+        while not glfw.window_should_close(window):
+            # A. Compaction (GPU)
+            compact_render_data(host_stats, host_particles)
+            ti.sync() # Wait for Taichi
+            
+            # B. Data Transfer (GPU -> RAM)
+            # En benchmark real, descargamos TODO lo visible (7000)
+            pos_data = pos_out[:NUM_PARTICLES]
+            col_data = col_out[:NUM_PARTICLES]
+            read_render_data(pos_data, col_data)
             
-        # Optional: Exit after 10 seconds
-        if now - start_bench > 10.0:
-            break
+            # C. Render (ModernGL)
+            ctx.clear(0.05, 0.05, 0.05)
+            # Dummy bonds/debug
+            renderer.render(pos_data, col_data, None, None, None, WINDOW_WIDTH, WINDOW_HEIGHT, camera_params)
+            
+            glfw.swap_buffers(window)
+            glfw.poll_events()
+            
+            # FPS Counter
+            frames += 1
+            now_ns = pc()
+            if now_ns - last_ns >= NS_PER_SEC:
+                if n_samples < FPS_LOG_CAPACITY:
+                    fps_log[n_samples] = (now_ns, frames)
+                    n_samples += 1
+                live_fps[0] = frames
+                live_fps[1] += 1
+                frames = 0
+                last_ns = now_ns
+                
+            # Optional: Exit after 10 seconds
+            if now_ns > deadline_ns:
+                break
+    finally:
+        live_shm.close()
+        live_shm.unlink()
             
     glfw.terminate()
+    
+    # Resumen al final (fuera del loop de render)
+    for fps in fps_log[:n_samples, 1]:
+        print(f"FPS: {fps}")
+    if n_samples:
+        print(f"[BENCH] FPS promedio: {fps_log[:n_samples, 1].mean():.1f}")
+    
+    if args.binary_log:
+        # Sin física en este benchmark: physics/datatx no medidos (NaN)
+        with open_binary_log("benchmark_gpu") as f:
+            for fps in fps_log[:n_samples, 1]:
+                f.write(RECORD.pack(fps, NAN, NAN))
 
 if __name__ == "__main__":
     main()
@@ -1,27 +1,79 @@
 import taichi as ti
 import numpy as np
+import argparse
 import time
 import sys
 import os
 
 # Add project root to path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-# Import Taichi Fields (This initializes Taichi)
+# Init Taichi con Kernel Profiler: tiempos por etapa sin ti.sync() intermedios
+# (taichi_fields no re-inicializa si ya está activo)
+ti.init(arch=ti.vulkan, kernel_profiler=True, offline_cache=True)
 from src.systems.taichi_fields import pos, colors, n_visible, is_active
 from src.systems.simulation_gpu import run_simulation_fast
 import src.config.system_constants as const
+from _shared_mem import make_shared_ndarray, is_unified_memory
+from _bin_log import RECORD, open_binary_log
 from src.renderer.opengl_kernels import (
-    compact_render_data, render_pos, render_col
+    compact_render_data, universal_gpu_buffer, OFFSET_PARTICLES
 )
 
+NUM = 7000
+
+# PCG64 con semilla fija: runs reproducibles y generación directa en float32
+rng = np.random.default_rng(0)
+
+# ===================================================================
+# BUFFERS HOST PERSISTENTES (Reusados en todas las iteraciones)
+# ===================================================================
+# to_numpy() reserva un array nuevo (+ staging temporal) en cada llamada.
+# Aquí el destino se reserva una sola vez y el kernel escribe directo en él.
+host_stats = ti.ndarray(shape=(16), dtype=ti.f32)
+host_particles = ti.ndarray(shape=(const.MAX_PARTICLES, 12), dtype=ti.f32)
+# En memoria unificada (CPU/iGPU) el kernel escribe en estas páginas sin copia.
+pos_out = make_shared_ndarray((const.MAX_PARTICLES, 2), np.float32)
+col_out = make_shared_ndarray((const.MAX_PARTICLES, 3), np.float32)
+
+@ti.kernel
+def read_render_data(pos_dst: ti.types.ndarray(), col_dst: ti.types.ndarray()):
+    """Copia posiciones y colores compactados a los buffers host persistentes.
+
+    Solo recorre las filas del destino: pasando una vista [:n] del buffer
+    host se transfiere únicamente el prefijo vivo, no MAX_PARTICLES filas.
+    """
+    for i in range(pos_dst.shape[0]):
+        row = OFFSET_PARTICLES + i
+        pos_dst[i, 0] = universal_gpu_buffer[row, 0]
+        pos_dst[i, 1] = universal_gpu_buffer[row, 1]
+        col_dst[i, 0] = universal_gpu_buffer[row, 2]
+        col_dst[i, 1] = universal_gpu_buffer[row, 3]
+        col_dst[i, 2] = universal_gpu_buffer[row, 4]
+
+# Pre-bind: evita el lookup de atributos en cada timestamp del hot loop
+ti_sync = ti.sync
+pc = time.perf_counter_ns
+
+def stage_ms(kernel) -> float:
+    """Tiempo medio de dispositivo (ms) registrado por el profiler."""
+    return ti.profiler.query_kernel_profiler_info(kernel.__name__).avg
+
 def main():
+    parser = argparse.ArgumentParser(description="Benchmark headless (sin render)")
+    parser.add_argument("--binary-log", action="store_true",
+                        help="Escribir métricas por frame en results/benchmark_headless.bin")
+    args = parser.parse_args()
+    
     print("[HEADLESS] Inicializando...")
+    mem_mode = "unificada (zero-copy)" if is_unified_memory() else "discreta (1 copia)"
+    print(f"[HEADLESS] Memoria host/dispositivo: {mem_mode}")
     
     # Init Data (7000 Particles)
-    NUM = 7000
-    pos_np = np.zeros((const.MAX_PARTICLES, 2), dtype=np.float32)
-    pos_np[:NUM] = np.random.rand(NUM, 2) * const.WORLD_SIZE
+    pos_np = np.empty((const.MAX_PARTICLES, 2), dtype=np.float32)
+    pos_np[NUM:] = 0.0
+    rng.random(out=pos_np[:NUM], dtype=np.float32)
+    pos_np[:NUM] *= const.WORLD_SIZE
     pos.from_numpy(pos_np)
     
     act_np = np.zeros(const.MAX_PARTICLES, dtype=np.int32)
@@ -34,44 +86,63 @@ def main():
     
     print("[HEADLESS] Iniciando Loop (Sin Render)...")
     
-    t_physics_sum = 0
-    t_compact_sum = 0
-    t_transfer_sum = 0
     frames = 100
+    # Timestamps enteros (ns) pre-reservados: [inicio, fin] por frame
+    times = np.empty((frames, 2), dtype=np.int64)
+    pos_live = pos_out[:NUM]
+    col_live = col_out[:NUM]
+    
+    # Warmup: compila todos los kernels fuera de la medición
+    # (2 frames: el primero usa las etapas separadas de diagnóstico)
+    run_simulation_fast(1)
+    run_simulation_fast(1)
+    compact_render_data(host_stats, host_particles)
+    read_render_data(pos_live, col_live)
+    ti_sync()
+    ti.profiler.clear_kernel_profiler_info()
     
     for i in range(frames):
-        # 1. Physics (includes Sync)
-        t0 = time.perf_counter()
+        times[i, 0] = pc()
+        # 1. Physics + 2. Compaction: encolados sin drenar el pipeline
         run_simulation_fast(1)
-        ti.sync() # Force wait for physics
-        t1 = time.perf_counter()
-        
-        # 2. Compaction (includes Sync)
-        compact_render_data()
-        ti.sync() # Force wait for compaction
-        t2 = time.perf_counter()
-        
-        # 3. Data Transfer (Pure transfer if already synced?)
-        _ = render_pos.to_numpy()[:NUM]
-        _ = render_col.to_numpy()[:NUM]
-        t3 = time.perf_counter()
-        
-        t_physics_sum += (t1 - t0)
-        t_compact_sum += (t2 - t1)
-        t_transfer_sum += (t3 - t2)
-        
+        compact_render_data(host_stats, host_particles)
+        # 3. Data Transfer (Destino persistente, solo el prefijo vivo)
+        read_render_data(pos_live, col_live)
+        # Fence explícito de fin de frame. No es el único: run_simulation_fast
+        # ya sincroniza al leer los escalares (snapshot_sim_scalars → host)
+        ti_sync()
+        times[i, 1] = pc()
+    
+    # Tiempos de dispositivo por etapa (profiler); física = el resto de kernels
+    t_frame = np.diff(times, axis=1).mean() * 1e-6
+    t_compact = stage_ms(compact_render_data)
+    t_transfer = stage_ms(read_render_data)
+    t_total = ti.profiler.get_kernel_profiler_total_time() * 1e3 / frames
+    t_physics = t_total - t_compact - t_transfer
+    
     print(f"--- RESULTADOS ({frames} Frames) ---")
-    print(f"Physics Avg: {t_physics_sum/frames*1000:.3f} ms")
-    print(f"Compact Avg: {t_compact_sum/frames*1000:.3f} ms")
-    print(f"Transfer Avg: {t_transfer_sum/frames*1000:.3f} ms")
+    print(f"Physics Avg: {t_physics:.3f} ms")
+    print(f"Compact Avg: {t_compact:.3f} ms")
+    print(f"Transfer Avg: {t_transfer:.3f} ms")
+    print(f"Frame Avg (wall): {t_frame:.3f} ms")
     
     with open("benchmark_headless.log", "w") as f:
-        f.write(f"Physics: {t_physics_sum/frames*1000:.3f}\n")
-        f.write(f"Compact: {t_compact_sum/frames*1000:.3f}\n")
-        f.write(f"Transfer: {t_transfer_sum/frames*1000:.3f}\n")
+        f.write(f"Physics: {t_physics:.3f}\n")
+        f.write(f"Compact: {t_compact:.3f}\n")
+        f.write(f"Transfer: {t_transfer:.3f}\n")
     
     print("\nRESULTADOS GUARDADOS EN benchmark_headless.log")
     
+    if args.binary_log:
+        # Un registro por frame: FPS de pared + promedios de etapa del profiler
+        frame_fps = 1e9 / np.diff(times, axis=1)[:, 0]
+        buf = bytearray(RECORD.size * frames)
+        for i in range(frames):
+            RECORD.pack_into(buf, i * RECORD.size, frame_fps[i], t_physics, t_transfer)
+        with open_binary_log("benchmark_headless") as f:
+            f.write(buf)
+        print("RESULTADOS BINARIOS GUARDADOS EN results/benchmark_headless.bin")
+    
     print("\nINTERPRETACIÓN:")
     print("Si Transfer Avg es > 1ms, el problema es el ancho de banda o latencia de Python->Driver.")
     print("Si Physics Avg es alto, Taichi es el cuello.")
@@ -5,87 +5,109 @@ import sys
 import os
 
 # Add project root to path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-# Init Taichi
-from src.systems.taichi_fields import pos, is_active, n_particles
-from src.systems.simulation_gpu import (
-    physics_pre_step, update_grid, resolve_constraints_grid, 
-    apply_bond_forces_gpu, physics_post_step, check_bonding_gpu,
-    apply_brownian_motion_gpu, apply_coulomb_repulsion_gpu, apply_evolutionary_effects_gpu
+# Init Taichi con Kernel Profiler: tiempos de dispositivo por kernel sin
+# ti.sync() entre etapas (taichi_fields no re-inicializa si ya está activo).
+# offline_cache=False (True por defecto): un kernel con el mismo cuerpo que
+# otro ya cacheado se registraría con el nombre del otro y stage_ms no lo vería.
+ti.init(arch=ti.vulkan, kernel_profiler=True, offline_cache=False)
+from src.systems.taichi_fields import pos, is_active, n_particles, grid_count, n_visible
+from src.systems.physics_kernels import (
+    physics_pre_step, physics_post_step, physics_post_step_func,
+    resolve_constraints_grid_i
 )
+from src.systems.chemistry_kernels import apply_bond_forces_i
+from src.systems.simulation_gpu import update_grid_i, kernel_bonding
+from src.systems.physics_constants import BROWNIAN_BASE_TEMP
 import src.config.system_constants as const
 
+SOLVER_ITERS = 3  # SOLVER_ITERATIONS default
+
+# PCG64 con semilla fija: runs reproducibles y generación directa en float32
+rng = np.random.default_rng(0)
+
+@ti.kernel
+def pbd_solver_loop():
+    """Solver PBD completo en un solo lanzamiento (iteraciones desenrolladas).
+
+    Cada fase sigue siendo un loop paralelo propio (barrera implícita entre
+    ellos), pero el costo Python->Taichi se paga una vez en lugar de 9.
+    """
+    for _ in ti.static(range(SOLVER_ITERS)):
+        for I in ti.grouped(grid_count):
+            grid_count[I] = 0
+        n_visible[None] = 0
+        for i in range(n_particles[None]):
+            update_grid_i(i)
+        for i in range(n_particles[None]):
+            resolve_constraints_grid_i(i)
+        for i in range(n_particles[None]):
+            apply_bond_forces_i(i)
+
+@ti.kernel
+def advanced_step(t_total: ti.f32):
+    """Post-step con reglas avanzadas (kernel propio para perfilarlo aparte)."""
+    physics_post_step_func(t_total, 1)
+
+def stage_ms(kernel) -> float:
+    """Tiempo medio de dispositivo (ms) registrado por el profiler."""
+    info = ti.profiler.query_kernel_profiler_info(kernel.__name__)
+    if info.counter == 0:
+        raise RuntimeError(f"El profiler no registró launches de {kernel.__name__}")
+    return info.avg
+
+# Pre-bind: evita el lookup de atributos en el hot loop
+ti_sync = ti.sync
+pc = time.perf_counter_ns
+
 def main():
-    print("--- DESGLOSE DE FÍSICA (TIEMPOS REALES CON SYNC) ---")
+    print("--- DESGLOSE DE FÍSICA (TIEMPOS DE DISPOSITIVO, 1 SYNC) ---")
     
     # Setup 2000 particles
     NUM = 2000
     n_particles[None] = NUM
-    pos_np = np.random.rand(NUM, 2).astype(np.float32) * const.WORLD_SIZE
+    pos_np = rng.random((NUM, 2), dtype=np.float32)
+    pos_np *= const.WORLD_SIZE
     pos.from_numpy(pos_np)
     is_active.fill(1)
     
     iters = 100
-    t_pre = 0
-    t_pbd = 0
-    t_post = 0
-    t_chem_bond = 0
-    t_adv = 0
     
-    # Warmup
+    # Warmup (compila todos los kernels fuera de la medición)
     physics_pre_step()
-    ti.sync()
-    
-    t_start = time.perf_counter()
+    pbd_solver_loop()
+    physics_post_step(BROWNIAN_BASE_TEMP, 0)
+    kernel_bonding()
+    advanced_step(BROWNIAN_BASE_TEMP)
+    ti_sync()
+    ti.profiler.clear_kernel_profiler_info()
     
+    t_start = pc()
     for i in range(iters):
-        # 1. Pre
-        t0 = time.perf_counter()
-        physics_pre_step()
-        ti.sync()
-        t1 = time.perf_counter()
-        t_pre += (t1 - t0)
-        
-        # 2. PBD (Solver Loop)
-        for _ in range(3): # SOLVER_ITERATIONS default
-            update_grid()
-            resolve_constraints_grid()
-            apply_bond_forces_gpu()
-        ti.sync()
-        t2 = time.perf_counter()
-        t_pbd += (t2 - t1)
-        
-        # 3. Post
-        physics_post_step()
-        ti.sync()
-        t3 = time.perf_counter()
-        t_post += (t3 - t2)
-        
-        # 4. Chem Bond
-        check_bonding_gpu()
-        ti.sync()
-        t4 = time.perf_counter()
-        t_chem_bond += (t4 - t3)
-        
-        # 5. Adv
-        apply_brownian_motion_gpu()
-        apply_coulomb_repulsion_gpu()
-        apply_evolutionary_effects_gpu()
-        ti.sync()
-        t5 = time.perf_counter()
-        t_adv += (t5 - t4)
+        # Las etapas se encolan sin drenar el pipeline entre ellas;
+        # el profiler registra el tiempo de dispositivo de cada kernel.
+        physics_pre_step()                          # 1. Pre
+        pbd_solver_loop()                           # 2. PBD (1 dispatch)
+        physics_post_step(BROWNIAN_BASE_TEMP, 0)    # 3. Post
+        kernel_bonding()                            # 4. Chem Bond
+        advanced_step(BROWNIAN_BASE_TEMP)           # 5. Adv (Brownian + Coulomb + Evolución)
+    ti_sync()  # Único fence: al final de la medición
+    avg_total = (pc() - t_start) / iters * 1e-6
     
-    total_time = time.perf_counter() - t_start
-    avg_total = (total_time / iters) * 1000
+    t_pre = stage_ms(physics_pre_step)
+    t_pbd = stage_ms(pbd_solver_loop)
+    t_post = stage_ms(physics_post_step)
+    t_chem_bond = stage_ms(kernel_bonding)
+    t_adv = stage_ms(advanced_step)
     
     print(f"\nResultados para {NUM} partículas (Promedio de {iters} frames):")
     print(f"Total Physics: {avg_total:.3f} ms")
-    print(f"  - Pre-Step:  {t_pre/iters*1000:.3f} ms")
-    print(f"  - PBD Loop:  {t_pbd/iters*1000:.3f} ms (El mas pesado usualmente)")
-    print(f"  - Post-Step: {t_post/iters*1000:.3f} ms")
-    print(f"  - Chem Bond: {t_chem_bond/iters*1000:.3f} ms")
-    print(f"  - Advanced:  {t_adv/iters*1000:.3f} ms")
+    print(f"  - Pre-Step:  {t_pre:.3f} ms")
+    print(f"  - PBD Loop:  {t_pbd:.3f} ms (El mas pesado usualmente)")
+    print(f"  - Post-Step: {t_post:.3f} ms")
+    print(f"  - Chem Bond: {t_chem_bond:.3f} ms")
+    print(f"  - Advanced:  {t_adv:.3f} ms")
 
 if __name__ == "__main__":
     main()
@@ -16,12 +16,18 @@ import json
 import os
 import re
 import time
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
 from pathlib import Path
 from datetime import datetime
 
 RESULTS_DIR = Path(__file__).parent / "results"
 LOGS_DIR = Path(__file__).parent.parent / "logs"
 
+# Contador live publicado por lab/benchmark_gpu.py (ver lab/_shared_mem.py)
+LIVE_FPS_SHM = "lifesim_live_fps"
+LIVE_FPS_SLOTS = 2
+
 # Colores ANSI
 GREEN = "\033[92m"
 YELLOW = "\033[93m"
@@ -30,8 +36,42 @@ CYAN = "\033[96m"
 RESET = "\033[0m"
 BOLD = "\033[1m"
 
+# Un patrón por métrica (compilados una vez), cada uno aplicado a la línea por
+# separado: ninguna alternativa puede consumir el texto de otra métrica.
+# El marcador literal evita invocar el regex en líneas que no lo contienen.
+_METRIC_PATTERNS = (
+    ("fps", "FPS:", re.compile(r"FPS:\s*([\d.]+)"), float),
+    ("physics_ms", "Physics:", re.compile(r"Physics:\s*([\d.]+)ms"), float),
+    ("datatx_ms", "DataTx:", re.compile(r"DataTx:\s*([\d.]+)ms"), float),
+    ("n_visible", "n_visible", re.compile(r"n_visible.*?(\d+)"), int),
+    ("n_simulated", "n_simulated", re.compile(r"n_simulated.*?(\d+)"), int),
+)
+
+# Prefijo leído para decidir si un log contiene métricas de benchmark
+_PROBE_BYTES = 64 * 1024
+
+# Logs binarios de lab/_bin_log.py: un registro '<fff' por frame
+BINARY_LOG_DTYPE = np.dtype([("fps", "<f4"), ("physics_ms", "<f4"), ("datatx_ms", "<f4")])
+
+def _has_metrics(filepath: Path) -> bool:
+    """Chequeo rápido (bytes, sin regex) de marcadores FPS/Physics."""
+    if filepath.suffix == ".bin":
+        return filepath.stat().st_size >= BINARY_LOG_DTYPE.itemsize
+    with filepath.open("rb") as f:
+        buf = f.read(_PROBE_BYTES)
+    return b"FPS:" in buf or b"Physics:" in buf
+
+def _parse_binary_log(filepath: Path, metrics: dict) -> dict:
+    """Carga un log binario con una sola lectura (np.fromfile, sin regex)."""
+    records = np.fromfile(filepath, dtype=BINARY_LOG_DTYPE)
+    for key in BINARY_LOG_DTYPE.names:
+        col = records[key]
+        # NaN = métrica no medida por ese benchmark
+        metrics[key] = col[np.isfinite(col)].tolist()
+    return metrics
+
 def parse_log_file(filepath: Path) -> dict:
-    """Parsea un archivo de log y extrae métricas."""
+    """Parsea un archivo de log (texto o binario .bin) y extrae métricas."""
     metrics = {
         "file": filepath.name,
         "fps": [],
@@ -44,25 +84,15 @@ def parse_log_file(filepath: Path) -> dict:
     if not filepath.exists():
         return metrics
     
-    content = filepath.read_text(encoding="utf-8", errors="ignore")
-    
-    # Patrones de búsqueda
-    fps_pattern = r"FPS:\s*([\d.]+)"
-    physics_pattern = r"Physics:\s*([\d.]+)ms"
-    datatx_pattern = r"DataTx:\s*([\d.]+)ms"
-    visible_pattern = r"n_visible.*?(\d+)"
-    simulated_pattern = r"n_simulated.*?(\d+)"
-    
-    for match in re.finditer(fps_pattern, content):
-        metrics["fps"].append(float(match.group(1)))
-    for match in re.finditer(physics_pattern, content):
-        metrics["physics_ms"].append(float(match.group(1)))
-    for match in re.finditer(datatx_pattern, content):
-        metrics["datatx_ms"].append(float(match.group(1)))
-    for match in re.finditer(visible_pattern, content):
-        metrics["n_visible"].append(int(match.group(1)))
-    for match in re.finditer(simulated_pattern, content):
-        metrics["n_simulated"].append(int(match.group(1)))
+    if filepath.suffix == ".bin":
+        return _parse_binary_log(filepath, metrics)
+    
+    # Un solo pasada, línea a línea (no carga el archivo completo en memoria)
+    with filepath.open(encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            for key, marker, pattern, cast in _METRIC_PATTERNS:
+                if marker in line:
+                    metrics[key].extend(cast(v) for v in pattern.findall(line))
     
     return metrics
 
@@ -70,13 +100,14 @@ def calculate_summary(metrics: dict) -> dict:
     """Calcula resumen estadístico de métricas."""
     summary = {}
     for key in ["fps", "physics_ms", "datatx_ms", "n_visible", "n_simulated"]:
-        values = metrics.get(key, [])
-        if values:
+        # Reducciones vectorizadas (C) en lugar de 4 pasadas Python sobre la lista
+        arr = np.asarray(metrics.get(key, []))
+        if arr.size:
             summary[key] = {
-                "avg": sum(values) / len(values),
-                "min": min(values),
-                "max": max(values),
-                "count": len(values)
+                "avg": arr.mean().item(),
+                "min": arr.min().item(),
+                "max": arr.max().item(),
+                "count": int(arr.size)
             }
     return summary
 
@@ -122,26 +153,58 @@ def scan_all_logs() -> list:
     
     # Logs en results/
     if RESULTS_DIR.exists():
-        for log_file in RESULTS_DIR.glob("*.log"):
+        for log_file in (*RESULTS_DIR.glob("*.log"), *RESULTS_DIR.glob("*.bin")):
+            if not _has_metrics(log_file):
+                continue
             metrics = parse_log_file(log_file)
-            if any(metrics[k] for k in ["fps", "physics_ms"]):
+            if metrics["fps"] or metrics["physics_ms"]:
                 all_metrics.append(metrics)
     
     # Logs en logs/
     if LOGS_DIR.exists():
         for log_file in LOGS_DIR.glob("*.log"):
+            if not _has_metrics(log_file):
+                continue
             metrics = parse_log_file(log_file)
-            if any(metrics[k] for k in ["fps", "physics_ms"]):
+            if metrics["fps"] or metrics["physics_ms"]:
                 all_metrics.append(metrics)
     
     return all_metrics
 
-def monitor_live():
-    """Monitorea en tiempo real (placeholder para integración futura)."""
-    print(f"{YELLOW}⚠ Modo live no implementado aún.{RESET}")
-    print("Para monitoreo en tiempo real, ejecuta la simulación con:")
-    print(f"  {CYAN}python main.py{RESET}")
-    print("\nLos logs se actualizarán en benchmarks/results/")
+def monitor_live(poll_s: float = 0.5, stale_s: float = 3.0):
+    """Monitorea en tiempo real el contador de FPS compartido por el benchmark."""
+    try:
+        shm = shared_memory.SharedMemory(name=LIVE_FPS_SHM)
+    except FileNotFoundError:
+        print(f"{YELLOW}⚠ No hay benchmark en ejecución.{RESET}")
+        print("Para monitoreo en tiempo real, ejecuta en otra terminal:")
+        print(f"  {CYAN}python benchmarks/lab/benchmark_gpu.py{RESET}")
+        return
+    # Solo lectura: el dueño del segmento es el benchmark (él hace unlink)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    
+    slots = np.ndarray((LIVE_FPS_SLOTS,), dtype=np.int64, buffer=shm.buf)
+    print(f"{CYAN}Monitoreando FPS en vivo (Ctrl+C para salir)...{RESET}")
+    last_seq = -1
+    last_change = time.monotonic()
+    try:
+        while True:
+            fps, seq = int(slots[0]), int(slots[1])
+            now = time.monotonic()
+            if seq != last_seq:
+                last_seq = seq
+                last_change = now
+                color = GREEN if fps > 60 else (YELLOW if fps > 30 else RED)
+                print(f"\r  FPS: {color}{fps:>6}{RESET}", end="", flush=True)
+            elif now - last_change > stale_s:
+                print(f"\n{YELLOW}Benchmark finalizado.{RESET}")
+                break
+            time.sleep(poll_s)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        del slots
+        shm.close()
 
 def export_json(all_metrics: list, output_path: str):
     """Exporta métricas a JSON."""
@@ -17,8 +17,9 @@ from src.systems.simulation_gpu import (
     dist_equilibrio, spring_k, damping, rango_enlace_min, 
     rango_enlace_max, dist_rotura, max_fuerza, simulation_step_gpu,
     sim_bounds, num_enlaces, enlaces_idx, n_visible, visible_indices,
-    update_grid, run_simulation_fast, manos_libres,
-    prob_enlace_base, click_force, click_radius, apply_force_pulse,
+    update_grid, run_simulation_fast, refresh_visible, manos_libres,
+    prob_enlace_base, click_force, click_radius, apply_force_pulse, pick_nearest_atom,
+    upload_sim_params, SIM_PARAM_NAMES,
     total_mutations, total_tunnels, total_bonds_count, n_simulated_physics,
     charge_factor, universal_gpu_buffer, MAX_BONDS,
     pos_z,  # 2.5D depth field
@@ -30,10 +31,11 @@ from src.renderer.camera import Camera
 from src.renderer.particle_renderer import ParticleRenderer
 from src.ui.panels.molecular_analysis_panel import draw_molecular_analysis_panel, run_molecular_analysis_tick
 from src.renderer.opengl_kernels import (
-    update_borders_gl, prepare_bond_lines_gl,
+    set_view_params, update_borders_gl, prepare_bond_lines_gl, read_bond_vertices,
     MAX_BOND_VERTICES, MAX_HIGHLIGHTS,
     OFFSET_STATS, OFFSET_PARTICLES, OFFSET_BONDS, OFFSET_HIGHLIGHTS, OFFSET_DEBUG,
-    universal_gpu_buffer, compact_render_data, prepare_highlights
+    universal_gpu_buffer, compact_render_data, build_render_frame,
+    read_particle_rows, read_sim_prefix
 )
 from src.core.input_handler import InputHandler
 from src.ui.panels import draw_control_panel, draw_telemetry_panel, draw_monitor_panel, draw_inspector_panel
@@ -88,6 +90,10 @@ simulation_fields = {
     'prob_enlace_base': prob_enlace_base,
     'click_force': click_force,
     'click_radius': click_radius,
+    
+    # Subida en bloque de los parámetros escalares (1 launch)
+    'upload_sim_params': upload_sim_params,
+    'SIM_PARAM_NAMES': SIM_PARAM_NAMES,
 }
 
 # Crear estado de aplicación usando contexto unificado
@@ -103,6 +109,7 @@ input_handler = InputHandler(
         'vel': vel,  # Añadido para movimiento del jugador
         'is_active': is_active,
         'apply_force_pulse': apply_force_pulse,
+        'pick_nearest_atom': pick_nearest_atom,  # Picking en GPU (sin to_numpy)
         'enlaces_idx': enlaces_idx,  # Añadido para force_bond
         'num_enlaces': num_enlaces,  # Añadido para force_bond
         'manos_libres': manos_libres,  # Añadido para force_bond
@@ -125,10 +132,15 @@ physics_controls = {
 gpu_resources = {
     'sim_bounds': sim_bounds,
     'run_simulation_fast': run_simulation_fast,
+    'refresh_visible': refresh_visible,
+    'set_view_params': set_view_params,
     'update_borders_gl': update_borders_gl,
     'prepare_bond_lines_gl': prepare_bond_lines_gl,
+    'read_bond_vertices': read_bond_vertices,
+    'read_particle_rows': read_particle_rows,
+    'read_sim_prefix': read_sim_prefix,
     'compact_render_data': compact_render_data,
-    'prepare_highlights': prepare_highlights,
+    'build_render_frame': build_render_frame,
     'universal_gpu_buffer': universal_gpu_buffer,
     'n_particles': n_particles,
     'pos': pos,
@@ -240,7 +252,7 @@ def gui():
     
     draw_player_indicator(
         state.player_idx,
-        pos,
+        state.render_data.get('player_pos'),
         state.camera.get_render_params_label(),
         win_w, win_h,
         frame_idx=current_frame,
@@ -357,9 +369,11 @@ def main():
             ctx = moderngl.create_context()
             state.renderer = ParticleRenderer(ctx, MAX_PARTICLES, MAX_BOND_VERTICES)
             
-            # Iniciar worker de química asíncrona
+            # Iniciar workers asíncronos (química y análisis molecular)
             from src.systems.async_chemistry import start_async_chemistry
             start_async_chemistry()
+            from src.systems.async_analysis import start_async_analysis
+            start_async_analysis()
             
             # Aplicar estilo de UI ahora que el contexto existe
             UIConfig.apply_style()
@@ -380,9 +394,11 @@ def main():
     
     def on_exit():
         """Callback al cerrar la aplicación - guarda métricas e inventario."""
-        # Detener worker async de química
+        # Detener workers async (química y análisis)
         from src.systems.async_chemistry import stop_async_chemistry
         stop_async_chemistry()
+        from src.systems.async_analysis import stop_async_analysis
+        stop_async_analysis()
         
         from src.gameplay.inventory import get_inventory
         get_inventory().save()
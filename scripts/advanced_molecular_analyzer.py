@@ -9,7 +9,6 @@ import sys
 import os
 import time
 import numpy as np
-from collections import Counter, defaultdict
 
 # Add project root to path
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
@@ -24,14 +23,15 @@ from src.systems.taichi_fields import (
     VALENCIAS_MAX, VALENCIA_ELECTRONES, AFINIDAD_MATRIX, MASAS_ATOMICAS,
     medium_polarity, temperature, sim_bounds, ELECTRONEG,
     gravity, friction, max_speed, dist_rotura, dist_equilibrio, spring_k,
-    total_bonds_count, next_molecule_id, needs_propagate,
+    total_bonds_count, total_mutations, next_molecule_id, needs_propagate,
     world_width, world_height, damping, radii, total_bonds_broken_dist
 )
 from src.systems.simulation_gpu import (
-    kernel_pre_step_fused, kernel_resolve_constraints, 
-    kernel_post_step_fused, kernel_bonding, update_partial_charges,
-    reset_molecule_ids, propagate_molecule_ids_step, init_molecule_ids
+    kernel_pre_step_fused, kernel_resolve_constraints_n,
+    kernel_post_step_fused, kernel_bonding,
+    refresh_molecule_ids, init_molecule_ids
 )
+from src.systems.chemistry import update_partial_charges
 from src.systems.molecular_analyzer import get_molecular_analyzer
 from src.config import system_constants as sys_cfg
 from src.config.molecules import get_molecule_name
@@ -42,6 +42,21 @@ FRAMES_TO_RUN = 3000
 SPAWN_AREA = 600.0
 WORLD_CENTER = sys_cfg.WORLD_SIZE / 2.0
 REPORT_FILE = "chemical_health_report.md"
+COLLAPSE_CHECK_INTERVAL = 50  # Frames between host reads of the collapse probe
+
+# Type sampling [C, H, N, O, P, S]: CDFs built once, sampled with searchsorted
+RNG_SEED = 42  # Fixed seed: types and spawn positions repeat across runs
+_RNG = np.random.default_rng(RNG_SEED)  # PCG64
+BENCHMARK_CDF = np.cumsum([0.15, 0.50, 0.05, 0.25, 0.025, 0.025])
+BENCHMARK_CDF[-1] = 1.0
+SOUP_CDF = np.cumsum([0.30, 0.40, 0.10, 0.15, 0.025, 0.025])  # Higher Carbon/Nitrogen for complexity
+SOUP_CDF[-1] = 1.0
+
+def sample_types(cdf: np.ndarray, n: int) -> np.ndarray:
+    """Draws n atom types from a CDF (int32, no per-call validation)."""
+    types_np = np.empty(n, dtype=np.int32)
+    types_np[:] = np.searchsorted(cdf, _RNG.random(n), side='right')
+    return types_np
 
 def get_molecule_name(formula: str) -> str:
     """Helper to get common names for formulas."""
@@ -62,6 +77,36 @@ def get_molecule_name(formula: str) -> str:
     }
     return names.get(formula, "Desconocida")
 
+@ti.kernel
+def check_collapse() -> ti.i32:
+    """Returns 1 if particle 0 collapsed to the origin or went NaN (one scalar readback)."""
+    # not (x >= 0.1) is also true for NaN
+    return ti.cast(not (pos[0].x >= 0.1), ti.i32)
+
+@ti.kernel
+def dump_state(pos_dst: ti.types.ndarray(), pos_z_dst: ti.types.ndarray(),
+               enlaces_dst: ti.types.ndarray(), num_enl_dst: ti.types.ndarray(),
+               mol_dst: ti.types.ndarray()):
+    """Copies the per-frame analyzer inputs for the first pos_dst.shape[0] particles in one launch."""
+    for i in range(pos_dst.shape[0]):
+        pos_dst[i, 0] = pos[i].x
+        pos_dst[i, 1] = pos[i].y
+        pos_z_dst[i] = pos_z[i]
+        for b in range(enlaces_dst.shape[1]):
+            enlaces_dst[i, b] = enlaces_idx[i, b]
+        num_enl_dst[i] = num_enlaces[i]
+        mol_dst[i] = molecule_id[i]
+
+def alloc_state_buffers(n: int) -> tuple:
+    """Reusable host buffers for dump_state (same argument order)."""
+    return (
+        np.empty((n, 2), dtype=np.float32),
+        np.empty(n, dtype=np.float32),
+        np.empty((n, enlaces_idx.shape[1]), dtype=np.int32),
+        np.empty(n, dtype=np.int32),
+        np.empty(n, dtype=np.int32),
+    )
+
 def init_simulation_gpu(p_count: int):
     """Inicialización directa para evitar problemas de sincronización en scripts."""
     n_particles[None] = p_count
@@ -111,17 +156,13 @@ def init_benchmark():
     AFINIDAD_MATRIX.from_numpy(aff_np)
     
     # [C, H, N, O, P, S]
-    types_np = np.random.choice(
-        [0, 1, 2, 3, 4, 5],
-        size=sys_cfg.MAX_PARTICLES,
-        p=[0.15, 0.50, 0.05, 0.25, 0.025, 0.025]
-    ).astype(np.int32)
+    types_np = sample_types(BENCHMARK_CDF, sys_cfg.MAX_PARTICLES)
     atom_types.from_numpy(types_np)
     
     # Initial Positions
     pos_np = np.zeros((sys_cfg.MAX_PARTICLES, 2), dtype=np.float32)
     pos_np[:TARGET_PARTICLES] = (
-        np.random.rand(TARGET_PARTICLES, 2) * SPAWN_AREA 
+        _RNG.random((TARGET_PARTICLES, 2)) * SPAWN_AREA 
         + (WORLD_CENTER - SPAWN_AREA / 2.0)
     )
     print(f"[DEBUG] pos_np range: {pos_np[:TARGET_PARTICLES].min(axis=0)} to {pos_np[:TARGET_PARTICLES].max(axis=0)}")
@@ -134,8 +175,7 @@ def init_benchmark():
     # Radii
     radii_vals = np.array([10.0, 6.0, 9.0, 8.0, 11.0, 12.0], dtype=np.float32) * 1.5 # Adjusted scale
     radii_np = np.zeros(sys_cfg.MAX_PARTICLES, dtype=np.float32)
-    for i in range(TARGET_PARTICLES):
-        radii_np[i] = radii_vals[types_np[i]]
+    radii_np[:TARGET_PARTICLES] = radii_vals[types_np[:TARGET_PARTICLES]]
     radii.from_numpy(radii_np)
     
     active_np = np.zeros(sys_cfg.MAX_PARTICLES, dtype=np.int32)
@@ -143,10 +183,9 @@ def init_benchmark():
     is_active.from_numpy(active_np)
     
     # Manos Libres
-    v_max = [4, 1, 3, 2, 5, 6]
+    v_max = np.array([4, 1, 3, 2, 5, 6], dtype=np.float32)
     manos_np = np.zeros(sys_cfg.MAX_PARTICLES, dtype=np.float32)
-    for i in range(TARGET_PARTICLES):
-        manos_np[i] = float(v_max[types_np[i]])
+    manos_np[:TARGET_PARTICLES] = v_max[types_np[:TARGET_PARTICLES]]
     manos_libres.from_numpy(manos_np)
 
     num_enlaces.fill(0)
@@ -163,18 +202,13 @@ def init_prebiotic_soup():
     print(f"🧬 Initializing Prebiotic Soup Stress Test...")
     init_simulation_gpu(5000) # More particles
     
-    # [C, H, N, O, P, S] - Higher Carbon/Nitrogen for complexity
-    types_np = np.random.choice(
-        [0, 1, 2, 3, 4, 5],
-        size=sys_cfg.MAX_PARTICLES,
-        p=[0.30, 0.40, 0.10, 0.15, 0.025, 0.025]
-    ).astype(np.int32)
+    types_np = sample_types(SOUP_CDF, sys_cfg.MAX_PARTICLES)
     atom_types.from_numpy(types_np)
     
     # High density spawning
     pos_np = np.zeros((sys_cfg.MAX_PARTICLES, 2), dtype=np.float32)
     pos_np[:5000] = (
-        np.random.rand(5000, 2) * 400.0 # Very tight area
+        _RNG.random((5000, 2)) * 400.0 # Very tight area
         + (WORLD_CENTER - 200.0)
     )
     pos.from_numpy(pos_np)
@@ -214,7 +248,16 @@ def run_benchmark(frames: int = None):
     analyzer.reset() # This needs implementation in analyzer
     
     # Statistics accumulation
-    stability_stats = [] # frame -> bond_count
+    stability_stats = np.empty(FRAMES_TO_RUN // 50, dtype=np.int64) # (frame // 50 - 1) -> bond_count
+    n_stats = 0
+    state_bufs = alloc_state_buffers(TARGET_PARTICLES)
+    pos_np, pos_z_np, enlaces_idx_np, num_enlaces_np, molecule_id_np = state_bufs
+    
+    # Types only change through mutations and no benchmark kernel deactivates
+    # particles: both are read once and types again only if total_mutations moves
+    atom_types_np = atom_types.to_numpy()[:TARGET_PARTICLES]
+    is_active_np = is_active.to_numpy()[:TARGET_PARTICLES]
+    last_mutations = total_mutations[None]
     
     from src.systems.taichi_fields import (
         debug_particles_checked, debug_neighbors_found, 
@@ -233,9 +276,8 @@ def run_benchmark(frames: int = None):
         update_partial_charges()
         kernel_pre_step_fused()
         
-        # Solver iterations for stability
-        for _ in range(5):
-            kernel_resolve_constraints()
+        # Solver iterations for stability (one launch)
+        kernel_resolve_constraints_n(5)
             
         # t_total = 5.0 + temperature[None] # Original line, now fixed to 10.0
         kernel_post_step_fused(10.0, 0) # Fixed temperature and no alternating
@@ -243,16 +285,13 @@ def run_benchmark(frames: int = None):
         # Chemistry and IDs
         kernel_bonding()
         
-        # Propagate IDs (like main.py)
-        reset_molecule_ids()
-        for _ in range(10): # Trace molecules
-            propagate_molecule_ids_step()
+        # Propagate IDs (like main.py): reset + 10 trace steps in one launch
+        refresh_molecule_ids(10)
         
-        # Check every single frame to catch the culprit
-        ti.sync()
-        p0 = pos[0].x
-        if p0 < 0.1 or np.isnan(p0):
-            print(f"❌ CRITICAL COLLAPSE at frame {frame}!")
+        # Collapse probe on GPU: no per-frame sync, launches stay queued
+        if frame % COLLAPSE_CHECK_INTERVAL == 0 and check_collapse():
+            print(f"❌ CRITICAL COLLAPSE detected at frame {frame} "
+                  f"(within the last {COLLAPSE_CHECK_INTERVAL} frames)!")
             print(f"   Pos[0]: {pos[0]}, OldPos[0]: {pos_old[0]}, Vel[0]: {vel[0]}")
             print(f"   IsActive[0]: {is_active[0]}, Val[0]: {num_enlaces[0]}, Manos[0]: {manos_libres[0]}")
             print(f"   Radii[0]: {radii[0]}")
@@ -261,11 +300,16 @@ def run_benchmark(frames: int = None):
 
         # Analyze and store stats every 50 frames
         if frame % 50 == 0:
-            ti.sync()
             current_bonds = total_bonds_count[None]
-            stability_stats.append(current_bonds)
+            stability_stats[n_stats] = current_bonds
+            n_stats += 1
             
-            p_numpy = pos.to_numpy()[:TARGET_PARTICLES]
+            # One launch + one sync for the per-frame analyzer inputs (TARGET_PARTICLES rows)
+            dump_state(*state_bufs)
+            if total_mutations[None] != last_mutations:
+                last_mutations = total_mutations[None]
+                atom_types_np = atom_types.to_numpy()[:TARGET_PARTICLES]
+            p_numpy = pos_np
             p_min = p_numpy.min(axis=0)
             p_max = p_numpy.max(axis=0)
             
@@ -286,14 +330,6 @@ def run_benchmark(frames: int = None):
                 print(f"     [STATE] Manos Sum: {manos_cur.sum():.1f}, Active: {(manos_cur > 0.5).sum()}")
                 print(f"     [GLOBAL] n_particles: {n_particles[None]}, Bounds: {sim_bounds.to_numpy()}")
                 
-            pos_np = pos.to_numpy()
-            pos_z_np = pos_z.to_numpy()
-            atom_types_np = atom_types.to_numpy()
-            enlaces_idx_np = enlaces_idx.to_numpy()
-            num_enlaces_np = num_enlaces.to_numpy()
-            molecule_id_np = molecule_id.to_numpy()
-            is_active_np = is_active.to_numpy()
-            
             analysis = analyzer.analyze_frame(
                 pos_np, pos_z_np, atom_types_np, 
                 enlaces_idx_np, num_enlaces_np, 
@@ -312,7 +348,7 @@ def run_benchmark(frames: int = None):
     total_time = time.time() - start_time
     print(f"🏁 Benchmark Finished in {total_time:.2f}s")
     
-    generate_report(analyzer, stability_stats, total_time)
+    generate_report(analyzer, stability_stats[:n_stats], total_time)
 
 def generate_report(analyzer, stability_stats, total_time):
     """Generates the Markdown report."""
@@ -6,31 +6,20 @@ Verifica si son químicamente plausibles o física rota.
 import json
 import re
 
+# Patrón de elemento + conteo (compilado una vez, no en cada fórmula)
+_ATOM_RE = re.compile(r'([A-Z][a-z]?)(\d+)')
+
+# Valencias típicas
+VALENCES = {'C': 4, 'H': 1, 'O': 2, 'N': 3, 'S': 2, 'P': 3, 'Si': 4}
+
 def parse_formula(formula):
     """Extrae conteos de átomos de una fórmula."""
-    atoms = {}
-    for match in re.finditer(r'([A-Z][a-z]?)(\d+)', formula):
-        element = match.group(1)
-        count = int(match.group(2))
-        atoms[element] = count
-    return atoms
+    return {m.group(1): int(m.group(2)) for m in _ATOM_RE.finditer(formula)}
 
 def check_valence(atoms):
     """Verifica si la valencia es plausible."""
-    # Valencias típicas
-    valences = {'C': 4, 'H': 1, 'O': 2, 'N': 3, 'S': 2, 'P': 3, 'Si': 4}
-    
-    # Calcular electrones de valencia disponibles
-    total_bonds_needed = 0
-    h_bonds = atoms.get('H', 0) * 1  # H siempre necesita 1
-    
-    for elem, count in atoms.items():
-        if elem != 'H':
-            total_bonds_needed += valences.get(elem, 4) * count
-    
-    # H debería satisfacer parte de los enlaces
     # Fórmula simplificada: sum(valence*count) debe ser par (enlaces)
-    total = sum(valences.get(e, 4) * c for e, c in atoms.items())
+    total = sum(VALENCES.get(e, 4) * c for e, c in atoms.items())
     
     return total % 2 == 0, total
 
@@ -3,7 +3,6 @@
 Script para identificar moléculas reales importantes y basura en enriched_discoveries.json
 """
 import json
-import re
 
 # Moléculas reales conocidas que deberían catalogarse
 REAL_MOLECULES = {
@@ -32,17 +31,37 @@ REAL_MOLECULES = {
     'C2H3O2N1': ('Glicina', 'bio/amino_acids.json'),
 }
 
-# Patrones de basura física (radicales imposibles)
-TRASH_PATTERNS = [
-    r'^H1P1$',        # HP solo
-    r'^H1S1$',        # HS solo  
-    r'^C1H1$',        # CH solo
-    r'^N1O1$',        # NO radical
-    r'^P\d+$',        # Solo fósforos
-    r'^S\d+$',        # Solo azufres
-    r'^Si\d+$',       # Solo silicios
-    # Moléculas con conteos extremos
-]
+# Basura física (radicales imposibles): fórmulas exactas
+TRASH_FORMULAS = {
+    'H1P1',   # HP solo
+    'H1S1',   # HS solo
+    'C1H1',   # CH solo
+    'N1O1',   # NO radical
+}
+# Fórmulas de un solo elemento (solo fósforos, azufres o silicios)
+TRASH_SINGLE_ELEMENTS = {'P', 'S', 'Si'}
+
+def parse_formula_fast(formula):
+    """Conteos de átomos en una pasada por caracteres (sin regex).
+
+    Un elemento sin dígitos cuenta 1; None si la fórmula está mal formada.
+    """
+    atoms = {}
+    i = 0
+    n = len(formula)
+    while i < n:
+        if not formula[i].isupper():
+            return None
+        j = i + 1
+        if j < n and formula[j].islower():
+            j += 1
+        k = j
+        while k < n and formula[k].isdigit():
+            k += 1
+        elem = formula[i:j]
+        atoms[elem] = atoms.get(elem, 0) + (int(formula[j:k]) if k > j else 1)
+        i = k
+    return atoms
 
 def analyze_enriched():
     with open('data/molecules/enriched_discoveries.json', 'r', encoding='utf-8') as f:
@@ -58,18 +77,17 @@ def analyze_enriched():
         if formula in REAL_MOLECULES:
             found_real.append((formula, name, REAL_MOLECULES[formula]))
         
-        # Buscar patrones de basura
-        for pattern in TRASH_PATTERNS:
-            if re.match(pattern, formula):
-                found_trash.append((formula, name, 'regex match'))
-                break
+        # Reglas de basura sobre los conteos (una pasada por fórmula)
+        atoms = parse_formula_fast(formula)
+        if atoms is None:
+            continue
+        if formula in TRASH_FORMULAS or (len(atoms) == 1 and atoms.keys() <= TRASH_SINGLE_ELEMENTS):
+            found_trash.append((formula, name, 'patrón'))
         
         # Detectar moléculas con demasiados fósforos o azufres
-        p_match = re.search(r'P(\d+)', formula)
-        s_match = re.search(r'S(\d+)', formula)
-        if p_match and int(p_match.group(1)) >= 4:
+        if atoms.get('P', 0) >= 4:
             found_trash.append((formula, name, 'P>=4'))
-        if s_match and int(s_match.group(1)) >= 5:
+        if atoms.get('S', 0) >= 5:
             found_trash.append((formula, name, 'S>=5'))
     
     print("=== MOLECULAS REALES ENCONTRADAS ===")
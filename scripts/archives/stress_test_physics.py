@@ -54,11 +54,12 @@ def run_test():
         gravity, friction, temperature, max_speed, world_width, world_height,
         dist_equilibrio, spring_k, damping, rango_enlace_min, 
         rango_enlace_max, dist_rotura, max_fuerza,
-        sim_bounds, run_simulation_fast, update_borders_gl,
+        sim_bounds, run_simulation_fast, refresh_visible, update_borders_gl,
         prepare_bond_lines_gl, compact_render_data, prepare_highlights,
         universal_gpu_buffer, num_enlaces, enlaces_idx, pos_z,
         prob_enlace_base, click_force, click_radius, manos_libres, colors
     )
+    from src.renderer.opengl_kernels import set_view_params, read_bond_vertices, read_particle_rows, read_sim_prefix, build_render_frame
     
     import src.systems.simulation_gpu as sim_gpu
     print(f"DEBUG: sim_gpu path = {sim_gpu.__file__}")
@@ -140,9 +141,12 @@ def run_test():
 
     # Resources
     gpu_resources = {
-        'sim_bounds': sim_bounds, 'run_simulation_fast': run_simulation_fast,
+        'sim_bounds': sim_bounds, 'run_simulation_fast': run_simulation_fast, 'refresh_visible': refresh_visible,
+        'set_view_params': set_view_params,
         'update_borders_gl': update_borders_gl, 'prepare_bond_lines_gl': prepare_bond_lines_gl,
-        'compact_render_data': compact_render_data, 'prepare_highlights': prepare_highlights,
+        'compact_render_data': compact_render_data, 'build_render_frame': build_render_frame,
+        'prepare_highlights': prepare_highlights,
+        'read_bond_vertices': read_bond_vertices, 'read_particle_rows': read_particle_rows, 'read_sim_prefix': read_sim_prefix,
         'universal_gpu_buffer': universal_gpu_buffer, 'n_particles': n_particles,
         'pos': pos, 'pos_z': pos_z, 'num_enlaces': num_enlaces, 'enlaces_idx': enlaces_idx,
     }
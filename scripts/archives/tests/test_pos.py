@@ -10,8 +10,9 @@ ti.init(arch=ti.vulkan)
 from src.systems.taichi_fields import pos, pos_old, n_particles, is_active, sim_bounds, temperature
 from src.systems.simulation_gpu import (
     kernel_pre_step_fused, kernel_resolve_constraints, 
-    kernel_post_step_fused, update_partial_charges
+    kernel_post_step_fused
 )
+from src.systems.chemistry import update_partial_charges
 
 print("Testing position persistence with ALL kernels...")
 
@@ -10,11 +10,30 @@ Singleton que gestiona todo el estado de la aplicación:
 """
 
 import time
+from collections import deque
 import numpy as np
 import src.config as cfg
 from src.renderer.camera import Camera
 from src.core.event_system import get_event_system, SimulationTimeline, EventHistory, EventDetector
-from src.systems.zone_manager import get_zone_manager
+from src.systems.zone_manager import get_zone_manager, ZoneType
+
+# Tablas por tipo de átomo (constantes): se calculan una vez al importar
+_COLORS_F32 = (cfg.COLORES / 255.0).astype(np.float32)
+_RADII_LUT = (cfg.RADIOS * 1.5 + 5.0).astype(np.float32)
+_VALENCE_LUT = cfg.VALENCIAS.astype(np.float32)
+
+# Distribuciones de spawn [C, H, N, O, P, S, Si] por grupo de zona
+# (0 = océano abierto, 1 = arcilla, 2 = ventila), como CDF acumulada
+_SPAWN_PROBS = np.array([
+    [0.15, 0.50, 0.05, 0.25, 0.02, 0.02, 0.01],  # Base (Oceano Abierto)
+    [0.25, 0.35, 0.15, 0.15, 0.02, 0.03, 0.05],  # Arcilla (Rico en Si, C, N)
+    [0.25, 0.35, 0.05, 0.15, 0.10, 0.10, 0.00],  # Ventila (Rico en P, S, metales/C)
+])
+_SPAWN_CDF = np.cumsum(_SPAWN_PROBS, axis=1)
+_SPAWN_CDF[:, -1] = 1.0
+
+# Índices del bloque de contadores AppContext.stats
+STAT_BONDS, STAT_BROKEN, STAT_MUT, STAT_TUN, STAT_BROKEN_DIST = 0, 1, 2, 3, 4
 
 
 class AppContext:
@@ -49,7 +68,7 @@ class AppContext:
         self.timeline: SimulationTimeline = event_sys['timeline']
         self.event_history: EventHistory = event_sys['history']
         self.event_detector: EventDetector = event_sys['detector']
-        self.event_log = []
+        self.event_log = deque(maxlen=20)  # Más reciente primero (appendleft O(1))
         
         # ========== ESTADO DE SIMULACIÓN ==========
         self.running = True
@@ -71,6 +90,7 @@ class AppContext:
         
         # Datos de render para UI (updateado cada frame)
         self.render_data = {}
+        self.analysis_result = None  # Resumen de MolecularAnalyzer (AsyncAnalysisWorker, solo lectura)
         
         # ========== TIMING ==========
         self.last_time = time.time()
@@ -79,6 +99,17 @@ class AppContext:
         # ========== SELECCIÓN ==========
         self.selected_idx = -1
         self.selected_mol = []
+        self.mol_dirty = False  # True cuando cambian los enlaces de la molécula seleccionada (FrameLoop)
+        self.draw_bonds = True  # False si los enlaces quedan sub-pixel (FrameLoop)
+        self._mol_members = None  # Buffer host para la BFS de selección (GPU)
+        self._init_buffers = None  # Buffers host de init_world (reusados en cada reinicio)
+        self._rng = np.random.default_rng()  # PCG64 para el spawn de init_world
+        self._atom_types_host = None  # Copia host de atom_types (None = invalidada por mutación)
+        self._bonds_host = None  # (enlaces_idx, num_enlaces) en host (None = topología cambiada)
+        self.bonds_epoch = 0  # Última época de enlaces vista en stats (FrameLoop)
+        self.host_edits = 0  # Ediciones del mundo hechas desde host (reinicio, input)
+        self._formula_cache_key = None  # (índices, copia de tipos) de la última fórmula
+        self._formula_cache = ""
         
         # ========== JUGADOR ==========
         self.player_idx = 0  # El jugador siempre es la partícula 0 (H atom)
@@ -91,15 +122,14 @@ class AppContext:
         self.last_tab_time = 0.0
         
         # ========== ESTADÍSTICAS ==========
-        self.stats = {
-            "bonds_formed": 0,
-            "bonds_broken": 0,
-            "mutations": 0,
-            "tunnels": 0
-        }
-        self.last_bonds = 0
-        self.last_mutations = 0
-        self.last_tunnels = 0
+        # Contadores acumulados [formados, rotos, mutaciones, túneles, rotos por dist.] (STAT_*)
+        self.stats = np.zeros(5, dtype=np.int64)
+        
+        # Host-shadow de parámetros escalares (orden = sim['SIM_PARAM_NAMES'])
+        self._sim_params = None
+        self._sim_params_gpu = None  # Última copia subida (None = nunca)
+        # Últimos totales GPU [enlaces, mutaciones, túneles] (host_stats[4:7])
+        self.last_totals = np.zeros(3, dtype=np.int64)
         
         self._initialized = True
 
@@ -139,88 +169,83 @@ class AppContext:
         
         sim['n_particles'][None] = self.n_particles_val
         
-        # Sincronizar parámetros desde Config Central
-        sim['gravity'][None] = cfg.sim_config.GRAVITY
-        sim['friction'][None] = cfg.sim_config.FRICTION
-        sim['temperature'][None] = cfg.sim_config.TEMPERATURE
-        sim['max_speed'][None] = cfg.sim_config.MAX_VELOCIDAD
-        sim['world_width'][None] = float(self.world_size)
-        sim['world_height'][None] = float(self.world_size)
-        
-        # Parámetros de enlaces
-        sim['dist_equilibrio'][None] = cfg.sim_config.DIST_EQUILIBRIO
-        sim['spring_k'][None] = cfg.sim_config.SPRING_K
-        sim['damping'][None] = cfg.sim_config.DAMPING
-        sim['rango_enlace_min'][None] = cfg.sim_config.RANGO_ENLACE_MIN
-        sim['rango_enlace_max'][None] = cfg.sim_config.RANGO_ENLACE_MAX
-        sim['dist_rotura'][None] = cfg.sim_config.DIST_ROTURA
-        sim['max_fuerza'][None] = cfg.sim_config.MAX_FUERZA
-        
-        # Parámetros de Interacción
-        sim['prob_enlace_base'][None] = cfg.sim_config.PROB_ENLACE_BASE
-        sim['click_force'][None] = cfg.sim_config.CLICK_FORCE
-        sim['click_radius'][None] = cfg.sim_config.CLICK_RADIUS
+        # Sincronizar parámetros desde Config Central (1 sola subida)
+        self._sim_params_gpu = None
+        self._push_sim_params()
 
         # Spawning balanceado para CHONPS+Si (Realista con Silicatos)
         # Atom order: [C, H, N, O, P, S, Si] (indices 0-6)
         
-        # 1. Generar Posiciones Primero
+        # Buffers MAX_PARTICLES reservados una vez y reescritos in-place
+        if self._init_buffers is None or len(self._init_buffers['types']) != max_particles:
+            self._init_buffers = {
+                'pos': np.empty((max_particles, 2), dtype=np.float32),
+                'types': np.empty(max_particles, dtype=np.int32),
+                'colors': np.empty((max_particles, 3), dtype=np.float32),
+                'radii': np.empty(max_particles, dtype=np.float32),
+                'manos': np.empty(max_particles, dtype=np.float32),
+                'active': np.empty(max_particles, dtype=np.int32),
+                'u': np.empty(max_particles, dtype=np.float64),
+            }
+        buf = self._init_buffers
+        n = self.n_particles_val
+        
+        # 1. Generar Posiciones Primero (directo en el buffer, sin temporales)
         margin = 1000
-        pos_np = np.zeros((max_particles, 2), dtype=np.float32)
-        pos_np[:self.n_particles_val, 0] = np.random.uniform(margin, self.world_size - margin, self.n_particles_val)
-        pos_np[:self.n_particles_val, 1] = np.random.uniform(margin, self.world_size - margin, self.n_particles_val)
+        pos_np = buf['pos']
+        self._rng.random(dtype=np.float32, out=pos_np[:n])
+        pos_np[:n] *= self.world_size - 2 * margin
+        pos_np[:n] += margin
+        pos_np[n:] = 0.0
         
-        # 2. Decidir tipos basados en la posición (Zonas)
+        # 2. Decidir tipos basados en la posición (Zonas) por CDF inversa
         zm = get_zone_manager(self.world_size)
-        tipos = np.zeros(self.n_particles_val, dtype=np.int32)
-        
-        # Probabilidades Base (Oceano Abierto)
-        p_base = [0.15, 0.50, 0.05, 0.25, 0.02, 0.02, 0.01] # C, H, N, O, P, S, Si
-        # Probabilidades en Arcilla (Rico en Si, C, N)
-        p_clay = [0.25, 0.35, 0.15, 0.15, 0.02, 0.03, 0.05]
-        # Probabilidades en Ventila (Rico en P, S, metales/C)
-        p_vent = [0.25, 0.35, 0.05, 0.15, 0.10, 0.10, 0.00]
-        
-        for idx in range(self.n_particles_val):
-            p_to_use = p_base
-            zone = zm.get_zone_at(pos_np[idx])
-            if zone:
-                from src.systems.zone_manager import ZoneType
-                if zone.type == ZoneType.CLAY:
-                    p_to_use = p_clay
-                elif zone.type == ZoneType.THERMAL_VENT:
-                    p_to_use = p_vent
-                    
-            tipos[idx] = np.random.choice([0, 1, 2, 3, 4, 5, 6], p=p_to_use)
+        zone_idx = zm.get_zone_indices(pos_np[:n])
+        zone_group = np.zeros(n, dtype=np.int32)
+        for z, zone in enumerate(zm.zones):
+            if zone.type == ZoneType.CLAY:
+                zone_group[zone_idx == z] = 1
+            elif zone.type == ZoneType.THERMAL_VENT:
+                zone_group[zone_idx == z] = 2
+        
+        u = buf['u'][:n]
+        self._rng.random(out=u)
+        atom_types_full = buf['types']
+        tipos = atom_types_full[:n]
+        for g in range(len(_SPAWN_CDF)):
+            mask = zone_group == g
+            tipos[mask] = np.searchsorted(_SPAWN_CDF[g], u[mask], side='right')
+        np.minimum(tipos, len(cfg.TIPOS_NOMBRES) - 1, out=tipos)
 
         # JUGADOR: Índice 0 siempre es un átomo de H (si el usuario lo controla)
         tipos[0] = 1  # H = tipo 1
         self.player_idx = 0
         
-        atom_types_full = np.pad(
-            tipos, (0, max_particles - self.n_particles_val), constant_values=0
-        ).astype(np.int32)
+        atom_types_full[n:] = 0
         sim['atom_types'].from_numpy(atom_types_full)
+        self._atom_types_host = atom_types_full.copy()
+        self._bonds_host = None
+        self.host_edits += 1
         
-        colors_table = (cfg.COLORES / 255.0).astype(np.float32)
-        col_np = colors_table[atom_types_full]
+        col_np = buf['colors']
+        np.take(_COLORS_F32, atom_types_full, axis=0, out=col_np)
         sim['colors'].from_numpy(col_np)
         
-        radii_np = np.zeros(max_particles, dtype=np.float32)
-        radii_np[:self.n_particles_val] = (cfg.RADIOS[tipos] * 1.5 + 5.0) * cfg.sim_config.SCALE
+        radii_np = buf['radii']
+        np.multiply(_RADII_LUT[tipos], cfg.sim_config.SCALE, out=radii_np[:n])
+        radii_np[n:] = 0.0
         sim['radii'].from_numpy(radii_np)
         
-        manos_np = np.zeros(max_particles, dtype=np.float32)
-        manos_np[:self.n_particles_val] = cfg.VALENCIAS[tipos]
+        manos_np = buf['manos']
+        np.take(_VALENCE_LUT, tipos, out=manos_np[:n])
+        manos_np[n:] = 0.0
         sim['manos_libres'].from_numpy(manos_np)
         
         sim['pos'].from_numpy(pos_np)
         
-        is_active_np = np.pad(
-            np.ones(self.n_particles_val, dtype=np.int32),
-            (0, max_particles - self.n_particles_val),
-            constant_values=0
-        )
+        is_active_np = buf['active']
+        is_active_np[:n] = 1
+        is_active_np[n:] = 0
         sim['is_active'].from_numpy(is_active_np)
         
         print(f"[INIT] Mundo {self.world_size}x{self.world_size} con {self.n_particles_val} partículas.")
@@ -262,15 +287,19 @@ class AppContext:
     def add_log(self, text: str, category: str = "info"):
         """Añade una entrada al log de eventos."""
         timestamp = time.strftime("%H:%M:%S")
-        self.event_log.insert(0, f"[{timestamp}] {text}")
-        if len(self.event_log) > 20:
-            self.event_log.pop()
+        self.event_log.appendleft(f"[{timestamp}] {text}")
 
     def get_player_pos(self) -> np.ndarray:
-        """Retorna la posición del jugador en el mundo."""
+        """Retorna la posición del jugador en el mundo.
+
+        Usa la del último frame (host_stats, ya sincronizada) en vez de
+        copiar pos completo; el acceso a un solo elemento es el fallback.
+        """
+        player_pos = self.render_data.get('player_pos')
+        if player_pos is not None:
+            return np.asarray(player_pos, dtype=np.float32)
         if self.sim and 'pos' in self.sim:
-            pos_np = self.sim['pos'].to_numpy()
-            return pos_np[self.player_idx]
+            return self.sim['pos'][self.player_idx].to_numpy()
         return None
 
     def get_molecule_indices(self, atom_idx: int):
@@ -282,18 +311,12 @@ class AppContext:
                 return mol.atom_indices
         return [atom_idx]
 
-    def get_formula(self, indices):
-        """Obtiene la fórmula química para un set de índices."""
-        from src.systems.molecular_analyzer import get_molecular_analyzer
-        return get_molecular_analyzer().get_formula(indices, self.sim['atom_types'].to_numpy())
-
-
     def get_valence(self, idx: int) -> int:
         """Retorna la valencia máxima de un átomo."""
         if self.sim is None: return 4
         atom_types = self.sim.get('atom_types')
         if atom_types is not None:
-            types_np = atom_types.to_numpy()
+            types_np = self.get_atom_types_host()
             if idx < len(types_np):
                 a_type = types_np[idx]
                 return cfg.VALENCIAS[a_type]
@@ -302,47 +325,51 @@ class AppContext:
 
     def sync_to_gpu(self):
         """Sincroniza el estado de Python a los campos Taichi en la GPU."""
-        sim = self.sim
-        if sim is None:
+        if self.sim is None:
             return
         
-        # 1. Aplicar BUFFS de progresión a los parámetros de Config
-        base_rotura = cfg.sim_config.DIST_ROTURA
-        base_speed = cfg.sim_config.MAX_VELOCIDAD
-        
-        if "stability" in self.progression.active_buffs:
-            # Los enlaces aguantan un 50% más de estiramiento
-            sim['dist_rotura'][None] = base_rotura * 1.5
-        else:
-            sim['dist_rotura'][None] = base_rotura
-            
-        if "speed" in self.progression.active_buffs:
-            sim['max_speed'][None] = base_speed * 1.2
-        else:
-            sim['max_speed'][None] = base_speed
+        # Buffs de progresión, catálisis de arcilla y sliders (vía cfg):
+        # solo se sube a la GPU si algún valor cambió desde el último frame
+        self._push_sim_params()
 
-        # 2. Catálisis de Arcilla
-        if self.progression.in_clay:
-            sim['prob_enlace_base'][None] = 0.95 # Muy alta probabilidad en arcilla
-        else:
-            sim['prob_enlace_base'][None] = cfg.sim_config.PROB_ENLACE_BASE
-        
-        # 3. Sincronizar parámetros estáticos o HUD
-        sim['gravity'][None] = cfg.sim_config.GRAVITY
-        sim['friction'][None] = cfg.sim_config.FRICTION
-        sim['temperature'][None] = cfg.sim_config.TEMPERATURE
-        
-        # Parámetros de enlaces
-        sim['dist_equilibrio'][None] = cfg.sim_config.DIST_EQUILIBRIO
-        sim['spring_k'][None] = cfg.sim_config.SPRING_K
-        sim['damping'][None] = cfg.sim_config.DAMPING
-        sim['rango_enlace_min'][None] = cfg.sim_config.RANGO_ENLACE_MIN
-        sim['rango_enlace_max'][None] = cfg.sim_config.RANGO_ENLACE_MAX
-        sim['max_fuerza'][None] = cfg.sim_config.MAX_FUERZA
-        
-        # Parámetros de Interacción
-        sim['click_force'][None] = cfg.sim_config.CLICK_FORCE
-        sim['click_radius'][None] = cfg.sim_config.CLICK_RADIUS
+    def _sim_param_values(self) -> dict:
+        """Valores actuales de los parámetros escalares (config + buffs + zona)."""
+        sc = cfg.sim_config
+        buffs = self.progression.active_buffs
+        return {
+            'gravity': sc.GRAVITY,
+            'friction': sc.FRICTION,
+            'temperature': sc.TEMPERATURE,
+            'max_speed': sc.MAX_VELOCIDAD * (1.2 if "speed" in buffs else 1.0),
+            'world_width': float(self.world_size),
+            'world_height': float(self.world_size),
+            'dist_equilibrio': sc.DIST_EQUILIBRIO,
+            'spring_k': sc.SPRING_K,
+            'damping': sc.DAMPING,
+            'rango_enlace_min': sc.RANGO_ENLACE_MIN,
+            'rango_enlace_max': sc.RANGO_ENLACE_MAX,
+            # Con "stability" los enlaces aguantan un 50% más de estiramiento
+            'dist_rotura': sc.DIST_ROTURA * (1.5 if "stability" in buffs else 1.0),
+            'max_fuerza': sc.MAX_FUERZA,
+            # Catálisis de Arcilla: muy alta probabilidad de enlace
+            'prob_enlace_base': 0.95 if self.progression.in_clay else sc.PROB_ENLACE_BASE,
+            'click_force': sc.CLICK_FORCE,
+            'click_radius': sc.CLICK_RADIUS,
+        }
+
+    def _push_sim_params(self):
+        """Empaqueta los parámetros en el host-shadow y los sube en 1 launch si cambiaron."""
+        names = self.sim['SIM_PARAM_NAMES']
+        if self._sim_params is None:
+            self._sim_params = np.zeros(len(names), dtype=np.float32)
+        values = self._sim_param_values()
+        for k, name in enumerate(names):
+            self._sim_params[k] = values[name]
+        
+        if self._sim_params_gpu is not None and np.array_equal(self._sim_params, self._sim_params_gpu):
+            return
+        self.sim['upload_sim_params'](self._sim_params)
+        self._sim_params_gpu = self._sim_params.copy()
 
     # --- Input Handler updates --- 
 
@@ -352,46 +379,64 @@ class AppContext:
         if start_idx < 0 or self.sim is None:
             return []
         
-        mol = {start_idx}
-        stack = [start_idx]
-        
-        # Obtenemos los enlaces del buffer Taichi
-        all_enlaces = self.sim['enlaces_idx'].to_numpy()
-        num_v_enlaces = self.sim['num_enlaces'].to_numpy()
-        
-        while stack:
-            curr = stack.pop()
-            for i in range(num_v_enlaces[curr]):
-                neighbor = all_enlaces[curr, i]
-                if neighbor >= 0 and neighbor not in mol:
-                    mol.add(neighbor)
-                    stack.append(neighbor)
-        return list(mol)
+        from src.systems.chemistry import flood_molecule
+        
+        # BFS en GPU en un solo kernel: sin copiar enlaces_idx/num_enlaces al host
+        if self._mol_members is None:
+            self._mol_members = np.empty(self.sim['MAX_PARTICLES'], dtype=np.int32)
+        count = flood_molecule(start_idx, self._mol_members)
+        
+        # Orden ascendente, como el recorrido por máscara anterior
+        members = self._mol_members[:count]
+        members.sort()
+        return members.tolist()
+    
+    def get_atom_types_host(self) -> np.ndarray:
+        """Copia host de atom_types.
+
+        Los tipos solo cambian con init_world o mutaciones: se relee
+        únicamente cuando FrameLoop la invalida. No modificar el array.
+        """
+        if self._atom_types_host is None:
+            self._atom_types_host = self.sim['atom_types'].to_numpy()
+        return self._atom_types_host
+    
+    def get_bonds_host(self):
+        """(enlaces_idx, num_enlaces) en host, releídos solo si cambió la topología.
+
+        FrameLoop invalida la copia cuando avanza bonds_epoch. No modificar los arrays.
+        """
+        if self._bonds_host is None:
+            self._bonds_host = (self.sim['enlaces_idx'].to_numpy(),
+                                self.sim['num_enlaces'].to_numpy())
+        return self._bonds_host
     
     def get_formula(self, indices: list) -> str:
         """Genera fórmula estricta para identificación (ej: H2O1, C1H4)."""
         if not indices or self.sim is None:
             return ""
         
-        counts = {}
-        # Acceso directo para evitar overhead de to_numpy() si son pocos indices
-        types = self.sim['atom_types']
+        # El inspector la pide cada frame: misma selección y mismos tipos
+        # (la copia host solo se renueva tras una mutación) -> misma fórmula
+        types_np = self.get_atom_types_host()
+        key = tuple(indices)
+        if self._formula_cache_key is not None and self._formula_cache_key[0] == key \
+                and self._formula_cache_key[1] is types_np:
+            return self._formula_cache
         
-        for i in indices:
-            t = types[i]
-            sym = cfg.TIPOS_NOMBRES[t]
-            counts[sym] = counts.get(sym, 0) + 1
+        counts = np.bincount(types_np[indices], minlength=len(cfg.TIPOS_NOMBRES))
         
         # Orden alfabético estricto para consistencia con diccionario
-        sorted_syms = sorted(counts.keys())
         formula = ""
-        for s in sorted_syms:
-            count = counts[s]
+        for t in sorted(np.flatnonzero(counts), key=lambda t: cfg.TIPOS_NOMBRES[t]):
+            count = counts[t]
             if count > 1:
-                formula += f"{s}{count}"
+                formula += f"{cfg.TIPOS_NOMBRES[t]}{count}"
             else:
-                formula += f"{s}"
-            
+                formula += f"{cfg.TIPOS_NOMBRES[t]}"
+        
+        self._formula_cache_key = (key, types_np)
+        self._formula_cache = formula
         return formula
 
 
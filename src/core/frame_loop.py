@@ -10,14 +10,32 @@ import numpy as np
 import taichi as ti
 
 from src.core.perf_logger import get_perf_logger
+from src.core.context import STAT_BONDS, STAT_BROKEN, STAT_MUT, STAT_TUN, STAT_BROKEN_DIST
 from src.config import UIConfig
-from src.systems.taichi_fields import total_bonds_broken_dist
+import src.config as cfg
+from src.renderer.opengl_kernels import bond_quant_range
+from src.config.system_constants import MAX_PARTICLES
 from src.systems.molecule_detector import get_molecule_detector
 
 # Submódulos extraídos
 from src.core.molecule_scanner import scan_visible_known_molecules
 from src.core.lod_bubbles import scan_macroscopic_bubbles
 
+# Longitud mínima en pantalla (px) de un enlace para que valga la pena dibujarlo
+MIN_BOND_PX = 2.0
+
+# Columnas de host_particles que lee el host: pos(0-1), color(2-4), escala(5),
+# tipo(6), molecule_id(7), nº enlaces(8). pos_z e índice (9-10) no se copian.
+PARTICLE_HOST_COLS = 9
+
+# Tamaño (potencia de 2) del buffer de aleatorios para el paso fraccional
+RAND_BUF_SIZE = 1024
+
+# Contadores de state.stats que acumulan las subidas de host_stats[4:7]
+_TOTAL_SLOTS = [STAT_BONDS, STAT_MUT, STAT_TUN]
+# host_stats[5] (mutaciones) llega envuelto a 24 bits para ser exacto en f32
+_STAT_WRAP = 1 << 24
+
 
 class FrameLoop:
     """
@@ -45,6 +63,26 @@ class FrameLoop:
         self._lod_cache = None
         self._lod_last_frame = -999
         self._lod_skip_count = 0
+        
+        # Cache de highlights de selección: se recalcula solo si cambian
+        # selección, zoom o posiciones (nº de pasos de simulación ejecutados)
+        self._sim_tick = 0
+        self._highlight_key = None
+        self._highlight_cache = None
+        self._highlight_pending = False
+        # Límites de culling con los que se armó la lista visible actual
+        self._cull_bounds = None
+        # Cámara con la que se generaron las cajas de debug en _debug_vis
+        self._borders_key = None
+        # frame_data del último render_frame: si tick lo devuelve igual, los
+        # VBOs ya tienen esos datos y no se vuelven a subir
+        self._last_rendered = None
+        # Firma de vista del último frame preparado sin simular (None = rehacer)
+        self._view_sig = None
+
+        # Aleatorios del paso fraccional: se rellenan cada RAND_BUF_SIZE frames
+        self._rand_buf = state._rng.random(RAND_BUF_SIZE).tolist()
+        self._rand_i = 0
 
         # Host Buffers para Optimizacion V4 (Slice Sync)
         # OPTIMIZATION: NDArrays pequeños = transferencia más rápida
@@ -54,9 +92,35 @@ class FrameLoop:
         
         self.host_stats = ti.ndarray(shape=(16), dtype=ti.f32)
         self.host_particles = ti.ndarray(shape=(MAX_VIS, 12), dtype=ti.f32)
-        self.host_bonds = ti.ndarray(shape=(MAX_BOND_VIS, 2), dtype=ti.f32)
-        self.host_highlights = ti.ndarray(shape=(256, 6), dtype=ti.f32)  # Reducido de 1024
-        self.host_debug = ti.ndarray(shape=(32, 2), dtype=ti.f32)
+        self.host_bonds = ti.ndarray(shape=(MAX_BOND_VIS, 2), dtype=ti.i16)  # Cuantizado (bond_quant_range)
+        self.host_debug = ti.ndarray(shape=(16, 2), dtype=ti.f32)
+        # Resaltado de selección generado en GPU (selection_func dentro de build_render_frame)
+        self.host_sel_rings = ti.ndarray(shape=(MAX_VIS, 2), dtype=ti.f32)
+        self.host_sel_lines = ti.ndarray(shape=(MAX_BOND_VIS, 2), dtype=ti.f32)
+        # Miembros de la molécula seleccionada: se suben solo al cambiar
+        self.host_sel_members = ti.ndarray(shape=(MAX_PARTICLES,), dtype=ti.i32)
+        self._sel_members_np = np.zeros(MAX_PARTICLES, dtype=np.int32)
+        self._sel_members = None
+        # Firma de topología de la selección (stats[14]); None = tomar de base
+        self._sel_topology = None
+        
+        # Staging host para los VBOs (reservado una vez): el Z-sort escribe
+        # aquí con np.take(out=...) y el renderer sube estas vistas directo
+        self._pos_vis = np.empty((MAX_VIS, 2), dtype=np.float32)
+        self._col_vis = np.empty((MAX_VIS, 3), dtype=np.float32)
+        self._scale_vis = np.empty((MAX_VIS, 1), dtype=np.float32)
+        self._type_vis = np.empty((MAX_VIS, 1), dtype=np.float32)
+        # Staging host de partículas visibles: read_particle_rows copia solo n_vis
+        # filas y las PARTICLE_HOST_COLS columnas usadas
+        self._particles_vis = np.empty((MAX_VIS, PARTICLE_HOST_COLS), dtype=np.float32)
+        # Staging host de enlaces: read_bond_vertices copia solo los n_bonds usados
+        self._bonds_vis = np.empty((MAX_BOND_VIS, 2), dtype=np.int16)
+        self._sel_rings_vis = np.empty((MAX_VIS, 2), dtype=np.float32)
+        self._sel_lines_vis = np.empty((MAX_BOND_VIS, 2), dtype=np.float32)
+        self._debug_vis = np.empty((16, 2), dtype=np.float32)
+        # Staging host para la detección química: read_sim_prefix copia n_particles filas
+        self._pos_host = np.empty((MAX_PARTICLES, 2), dtype=np.float32)
+        self._mol_id_host = np.empty(MAX_PARTICLES, dtype=np.int32)
         
     def tick(self, io, world_size, override_res=None):
         """
@@ -89,35 +153,58 @@ class FrameLoop:
             self.state.fps = 0.9 * self.state.fps + 0.1 * (1.0 / dt_f)
         self.state.last_time = now
         
-        # 3. Culling bounds
+        # 3. Culling bounds + parámetros de cámara (1 solo launch)
         margin_culling = 200.0
         b = self.state.camera.get_culling_bounds(margin_culling)
-        self.gpu['sim_bounds'][0] = float(b[0])
-        self.gpu['sim_bounds'][1] = float(b[1])
-        self.gpu['sim_bounds'][2] = float(b[2])
-        self.gpu['sim_bounds'][3] = float(b[3])
+        zoom, cx, cy = self.state.camera.get_render_params()
+        aspect = self.state.camera.aspect_ratio
+        cull_bounds = (float(b[0]), float(b[1]), float(b[2]), float(b[3]))
+        self.gpu['set_view_params'](zoom, cx, cy, aspect, *cull_bounds)
         
         # 4. Simulation step (if not paused)
+        simulated = False
         if not self.state.paused:
             steps = int(self.state.time_scale)
-            if np.random.random() < (self.state.time_scale - steps):
+            frac = self.state.time_scale - steps
+            # time_scale entero (caso habitual): no se consume aleatorio
+            if frac > 0.0 and self._next_random() < frac:
                 steps += 1
                 
             if steps > 0:
-                if self.state.selected_idx >= 0 and self.state.selected_mol:
+                # Solo se recalcula la molécula si cambiaron los enlaces (mol_dirty)
+                if self.state.mol_dirty and self.state.selected_idx >= 0 and self.state.selected_mol:
                     self.state.selected_mol = self.state.get_molecule_indices(self.state.selected_idx)
+                    self.state.mol_dirty = False
                 
                 self.perf.start("physics")
                 self.gpu['run_simulation_fast'](steps)
-                # Sync solo cuando necesitamos medir tiempo o hay selección activa
-                # En modo normal, dejamos que la GPU corra libre (async)
-                if self.state.selected_idx >= 0 or self.state.timeline.frame % 60 == 0:
-                    ti.sync()
+                self._sim_tick += 1
+                simulated = True
+                # Sin ti.sync(): los kernels de pre-render se encolan detrás de
+                # la simulación y la única espera es la lectura de host_stats
+                # (physics mide el despacho; la espera cae en data_transfer)
                 self.perf.stop("physics")
         
-        # 5. Pre-render GPU kernels
-        zoom, cx, cy = self.state.camera.get_render_params()
-        aspect = self.state.camera.aspect_ratio
+        # Sin simulación la lista visible solo se rehace si la cámara se movió
+        if simulated:
+            self._cull_bounds = cull_bounds
+        elif cull_bounds != self._cull_bounds:
+            self.gpu['refresh_visible']()
+            self._cull_bounds = cull_bounds
+        
+        # Sin simular y con la misma vista/selección el frame anterior sigue
+        # siendo válido: ni kernels de pre-render ni lecturas GPU
+        view_sig = None
+        if not simulated:
+            view_sig = (cull_bounds, zoom, aspect, w, h,
+                        self.state.selected_idx, tuple(self.state.selected_mol),
+                        self.state.show_debug, getattr(self.state, 'show_molecules', False),
+                        self.state.lod_threshold, self.state.host_edits)
+            if view_sig == self._view_sig and self.state.render_data:
+                return self.state.render_data
+        self._view_sig = view_sig
+        
+        # 5. Pre-render GPU kernels (zoom/cx/cy/aspect ya en cam_params)
         vis_h_half = world_size / (2.0 * zoom)
         vis_w_half = vis_h_half * aspect
         
@@ -137,18 +224,25 @@ class FrameLoop:
         if atoms_active:
             # NORMAL MODE: Atom Rendering
             self.perf.start("grid")
-            self.gpu['update_borders_gl'](zoom, cx, cy, aspect)
-            self.gpu['prepare_bond_lines_gl'](zoom, cx, cy, aspect, self.host_bonds)
-            # Pasamos ndarrays como buffers de salida
-            self.gpu['compact_render_data'](self.host_stats, self.host_particles)
+            # Cajas de debug: solo dependen de la cámara, no de la simulación
+            borders_key = (zoom, cx, cy, aspect) if self.state.show_debug else None
+            if borders_key is not None and borders_key != self._borders_key:
+                self.gpu['update_borders_gl'](self.host_debug)
+                self.gpu['read_bond_vertices'](self.host_debug, self._debug_vis)
+                self._borders_key = borders_key
+            # Enlaces sub-pixel (zoom muy alejado): ni batch ni subida ni dibujo
+            px_per_unit = h / (2.0 * vis_h_half)
+            self.state.draw_bonds = px_per_unit * cfg.sim_config.DIST_EQUILIBRIO >= MIN_BOND_PX
+            bond_range = bond_quant_range(vis_w_half, vis_h_half)
+            sel_idx, atom_radius_vis = self._prepare_selection(zoom)
+            n_members = len(self._sel_members) if self._sel_members else 0
+            # Enlaces + selección + compactado + stats en un solo launch
+            self.gpu['build_render_frame'](self.host_stats, self.host_particles, self.host_bonds,
+                                           bond_range, int(self.state.draw_bonds),
+                                           sel_idx, self.host_sel_members, n_members, atom_radius_vis,
+                                           self.host_sel_rings, self.host_sel_lines)
             # Sync debug info manually if needed or via ndarray too
             self.perf.stop("grid")
-            
-            if self.state.selected_idx >= 0:
-                if self.state.selected_mol:
-                    self.gpu['prepare_highlights'](self.state.selected_idx, 1, self.host_highlights)
-                else:
-                    self.gpu['prepare_highlights'](self.state.selected_idx, 0, self.host_highlights)
         
         # 6. Data transfer (ULTRA SYNC V4 - Single Point of Truth)
         synced = self._sync_gpu_all()
@@ -157,11 +251,9 @@ class FrameLoop:
         # Extract stats from host ndarray
         n_vis = int(stats_np[0])
         n_bonds = int(stats_np[1])
-        n_h = int(stats_np[2])
         n_sim = int(stats_np[3])
-        tot_bonds = int(stats_np[4])
-        tot_muts = int(stats_np[5])
-        tot_tunnels = int(stats_np[6])
+        totals = stats_np[4:7].astype(np.int64)  # [enlaces, mutaciones, túneles]
+        tot_bonds = int(totals[0])
         act_part = int(stats_np[7])
         
         # n_vis es 0 si no hay átomos en absoluto (Micro factor = 0)
@@ -172,7 +264,13 @@ class FrameLoop:
         self._cam_params_label = (cx, cy, vis_w_half, vis_h_half)
         
         # Update state counters
-        self._update_counters(tot_bonds, tot_muts, tot_tunnels)
+        self._update_counters(totals)
+        self.state.stats[STAT_BROKEN_DIST] = int(stats_np[13])
+        # Enlaces de la molécula seleccionada cambiados -> recalcular miembros
+        sel_topology = int(stats_np[14])
+        if self._sel_topology is not None and sel_topology != self._sel_topology:
+            self.state.mol_dirty = True
+        self._sel_topology = sel_topology
         self.state.n_simulated_val = n_sim
         self.state.n_visible_val = n_vis
         
@@ -183,7 +281,7 @@ class FrameLoop:
         
         # 7. Extract render data
         if atoms_active:
-             render_data = self._extract_render_data_v4(synced, n_vis, n_bonds, n_h)
+             render_data = self._extract_render_data_v4(synced, n_vis, n_bonds)
         else:
              render_data = {}
              
@@ -202,7 +300,7 @@ class FrameLoop:
         
         # 8. Process highlights
         self.perf.start("cpu_logic")
-        highlight_data = self._process_highlights(n_h, render_data.get('h_pos_data'), synced)
+        highlight_data = self._process_highlights(synced)
         
         # 9. Molecular Detection (ASYNC V5)
         # Ejecutar en hilo separado para no bloquear render
@@ -231,11 +329,16 @@ class FrameLoop:
             if vis_w > self.state.world_size * 0.9:
                 roi = None
             
+            # Solo las n_part partículas asignadas (no MAX_PARTICLES)
+            pos_np = self._pos_host[:n_part]
+            mol_id_np = self._mol_id_host[:n_part]
+            self.gpu['read_sim_prefix'](pos_np, mol_id_np)
+            
             async_chem.submit_job(
-                synced['atom_types'],
-                synced['molecule_id'],
-                synced['num_enlaces'],
-                synced['pos'],
+                synced['atom_types'][:n_part],
+                mol_id_np,
+                synced['num_enlaces'][:n_part],
+                pos_np,
                 n_part,
                 roi=roi
             )
@@ -258,12 +361,14 @@ class FrameLoop:
             'scale_vis': render_data.get('scale_vis'),  # 2.5D depth scale
             'type_vis': render_data.get('type_vis'),    # Synced atom types
             'bonds_gl': render_data.get('bonds_gl'),
+            'bond_range': bond_quant_range(vis_w_half, vis_h_half),
             'debug_gl': render_data.get('debug_gl'),
             'highlight_lines': highlight_data['lines'],
             'rings_sel': highlight_data['rings_sel'],
             'rings_nei': highlight_data['rings_nei'],
             'rings_known': (highlight_data.get('rings_known', np.array([])), highlight_data.get('rings_known_col', np.array([]))),  # Known molecules glow as tuple (pos, col)
             'n_vis': n_vis,  # Para atom labels
+            'player_pos': (float(stats_np[11]), float(stats_np[12])),  # Indicador de jugador
             'lod_active': lod_active,
             'lod_bubbles': lod_bubbles,
             'factor_micro': alpha_micro, # Corrected: match new variable names
@@ -278,11 +383,21 @@ class FrameLoop:
         
         return frame_data
     
+    def _next_random(self) -> float:
+        """Siguiente aleatorio en [0, 1) del buffer rodante."""
+        r = self._rand_buf[self._rand_i]
+        self._rand_i = (self._rand_i + 1) & (RAND_BUF_SIZE - 1)
+        if self._rand_i == 0:
+            self._rand_buf = self.state._rng.random(RAND_BUF_SIZE).tolist()
+        return r
+    
     def render_frame(self, frame_data, world_size, bonds_only=False):
         """
         Renderiza el frame con los datos preparados.
         """
         self.perf.start("render")
+        reuse_upload = frame_data is self._last_rendered
+        self._last_rendered = frame_data
         
         w, h = frame_data['w'], frame_data['h']
         camera_params = frame_data['camera_params']
@@ -312,7 +427,10 @@ class FrameLoop:
             w, h,
             camera_params=camera_params,
             bonds_only=bonds_only,
-            alpha=1.0  # Siempre 100% opacidad
+            alpha=1.0,  # Siempre 100% opacidad
+            type_data=frame_data.get('type_vis'),
+            bond_range=frame_data['bond_range'],
+            reuse_upload=reuse_upload
         )
         
         # Anillos de selección (siempre visibles)
@@ -337,7 +455,7 @@ class FrameLoop:
              )
 
         
-        self.state.renderer.ctx.viewport = (0, 0, w, h)
+        self.state.renderer.set_viewport(w, h)
         self.perf.stop("render")
         
         # Finalizar frame
@@ -357,61 +475,66 @@ class FrameLoop:
                   f" | Render: {t['render_ms']/fc:.2f}ms"
                   f" | Chem: {t['chemistry_ms']/fc:.2f}ms")
     
-    def _update_counters(self, tot_bonds, tot_muts, tot_tunnels):
-        """Actualiza contadores y genera logs de eventos."""
-        # Enlaces
-        if tot_bonds > getattr(self.state, 'last_bonds', 0):
-            diff = tot_bonds - self.state.last_bonds
-            self.state.stats["bonds_formed"] += diff
-            # self.state.add_log(f"ENLACE: +{diff} uniones químicas.")
-        elif tot_bonds < getattr(self.state, 'last_bonds', 0):
-            diff = self.state.last_bonds - tot_bonds
-            self.state.stats["bonds_broken"] += diff
-            # self.state.add_log(f"ROTURA: {diff} enlaces disueltos.")
-        
-        # Mutaciones
-        if tot_muts > getattr(self.state, 'last_mutations', 0):
-            diff = tot_muts - self.state.last_mutations
-            self.state.stats["mutations"] += diff
-            # self.state.add_log(f"CATÁLISIS: {diff} átomos activos.")
-        
-        # Túneles
-        if tot_tunnels > getattr(self.state, 'last_tunnels', 0):
-            diff = tot_tunnels - self.state.last_tunnels
-            self.state.stats["tunnels"] += diff
-            # self.state.add_log(f"TRANSICIÓN: {diff} saltos de energía.")
-        
-        self.state.last_bonds = tot_bonds
-        self.state.last_mutations = tot_muts
-        self.state.last_tunnels = tot_tunnels
+    def _invalidate_host_caches(self, stats_np):
+        """Descarta las copias host de tipos/enlaces si la GPU las cambió."""
+        state = self.state
+        if int(stats_np[5]) != state.last_totals[1]:
+            state._atom_types_host = None
+        bonds_epoch = int(stats_np[10])
+        if bonds_epoch != state.bonds_epoch:
+            state.bonds_epoch = bonds_epoch
+            state._bonds_host = None
     
-    def _extract_render_data_v4(self, synced, n_vis, n_bonds, n_h):
+    def _update_counters(self, totals):
+        """Actualiza contadores a partir del snapshot de host_stats (sin lecturas GPU).
+
+        totals = [enlaces, mutaciones, túneles]; un solo diff vectorial y
+        el frame sin cambios sale tras diff.any().
+        """
+        state = self.state
+        diff = totals - state.last_totals
+        diff[1] %= _STAT_WRAP  # Mutaciones solo suben: deshace el wrap de 24 bits
+        if not diff.any():
+            return
+        
+        # Enlaces, mutaciones y túneles suman las subidas; los enlaces que bajan son rotos
+        state.stats[_TOTAL_SLOTS] += np.maximum(diff, 0)
+        if diff[0] < 0:
+            state.stats[STAT_BROKEN] -= diff[0]
+        state.last_totals = totals
+    
+    def _extract_render_data_v4(self, synced, n_vis, n_bonds):
         """Extrae datos de render usando el nuevo sistema V4 NDArray."""
         data = {}
         
         if n_vis > 0:
             data_vis = synced['particles_vis']
+            n = len(data_vis)
             
             # Z-Sorting: ordenar por scale (depth) - lejanos primero
-            scale_col = data_vis[:, 5]
-            sort_idx = np.argsort(scale_col)
-            data_sorted = data_vis[sort_idx]
+            sort_idx = np.argsort(data_vis[:, 5])
+            
+            # Gather ordenado directo a los buffers persistentes (sin
+            # la copia intermedia data_vis[sort_idx] ni ascontiguousarray)
+            pos_vis = self._pos_vis[:n]
+            col_vis = self._col_vis[:n]
+            scale_vis = self._scale_vis[:n]
+            type_vis = self._type_vis[:n]
+            np.take(data_vis[:, 0:2], sort_idx, axis=0, out=pos_vis)
+            np.take(data_vis[:, 2:5], sort_idx, axis=0, out=col_vis)
+            np.take(data_vis[:, 5:6], sort_idx, axis=0, out=scale_vis)
+            np.take(data_vis[:, 6:7], sort_idx, axis=0, out=type_vis)
             
-            data['pos_vis'] = np.ascontiguousarray(data_sorted[:, 0:2])
-            data['col_vis'] = np.ascontiguousarray(data_sorted[:, 2:5])
-            data['scale_vis'] = np.ascontiguousarray(data_sorted[:, 5:6])
-            data['type_vis'] = np.ascontiguousarray(data_sorted[:, 6:7])
+            data['pos_vis'] = pos_vis
+            data['col_vis'] = col_vis
+            data['scale_vis'] = scale_vis
+            data['type_vis'] = type_vis
         
         if n_bonds > 0:
-            data['bonds_gl'] = synced['bonds_vis'].astype(np.float32)
-        
-        if n_h > 0:
-             # Fallback momentáneo si highlights no están aún en synced
-             pass
+            data['bonds_gl'] = synced['bonds_vis']
         
         if self.state.show_debug:
-             # data['debug_gl'] = ...
-             pass
+            data['debug_gl'] = self._debug_vis
         
         return data
     
@@ -421,39 +544,34 @@ class FrameLoop:
         
         # 1. Stats (Always sync 16 floats, extremely fast)
         stats_np = self.host_stats.to_numpy()
+        if not self.state.draw_bonds:
+            stats_np[1] = 0  # Batch de enlaces omitido este frame
         n_vis = int(stats_np[0])
         n_bonds = int(stats_np[1])
+        self._invalidate_host_caches(stats_np)
         
         # 2. Slice Sync (Solo traemos lo usado)
-        particles_vis_np = self.host_particles.to_numpy()[0:n_vis]
-        bonds_vis_np = self.host_bonds.to_numpy()[0:n_bonds]
+        particles_vis_np = self._particles_vis[0:n_vis]
+        if n_vis > 0:
+            self.gpu['read_particle_rows'](self.host_particles, particles_vis_np)
+        bonds_vis_np = self._bonds_vis[0:n_bonds]
+        if n_bonds > 0:
+            self.gpu['read_bond_vertices'](self.host_bonds, bonds_vis_np)
         
         # 3. Otros campos: Solo si hay detección química o selección activa
         is_early = self.state.timeline.frame < 10
         should_detect = not self.state.paused and (is_early or self.state.timeline.frame % 600 == 0)
-        show_mols = getattr(self.state, 'show_molecules', False)
-        should_bubble = self.state.camera.zoom < self.state.lod_threshold and (self._lod_skip_count >= 10 or self._lod_cache is None)
         
-        pos_np = None
         types_np = None
         num_enl_np = None
-        mol_id_np = None
-        active_np = None
         enlaces_np = None
         
-        # Datos estructurales (Sincronización masiva pero INFRECUENTE)
-        if should_detect or should_bubble or self.state.selected_idx >= 0:
-            # show_mols ya no requiere sync completo gracias a V4 Scanner
-            pos_np = self.gpu['pos'].to_numpy()
-            active_np = self.gpu['is_active'].to_numpy()
-            
-            if should_detect or self.state.selected_idx >= 0 or show_mols:
-                types_np = self.gpu['atom_types'].to_numpy()
-                num_enl_np = self.gpu['num_enlaces'].to_numpy()
-                mol_id_np = self.gpu['molecule_id'].to_numpy()
-                
-                if self.state.selected_idx >= 0:
-                    enlaces_np = self.gpu['enlaces_idx'].to_numpy()
+        # Datos estructurales: tipos y enlaces son copias host cacheadas, solo
+        # se releen si cambiaron. pos/molecule_id ya no se traen completos:
+        # la detección química lee su prefijo al encolar (read_sim_prefix)
+        if should_detect or self.state.selected_idx >= 0:
+            types_np = self.state.get_atom_types_host()
+            enlaces_np, num_enl_np = self.state.get_bonds_host()
             
         self.perf.stop("data_transfer")
         
@@ -461,55 +579,40 @@ class FrameLoop:
             'stats': stats_np,
             'particles_vis': particles_vis_np,
             'bonds_vis': bonds_vis_np,
-            'pos': pos_np,
             'atom_types': types_np,
             'num_enlaces': num_enl_np,
-            'molecule_id': mol_id_np,
-            'is_active': active_np,
             'enlaces_idx': enlaces_np
         }
 
-    def _process_highlights(self, n_h, h_pos_data, synced):
+    def _prepare_selection(self, zoom):
+        """Argumentos de selección para build_render_frame.
+
+        Retorna (sel_idx, atom_radius_vis); sel_idx = -1 si no cambió
+        selección, zoom ni posiciones (la GPU conserva lo anterior).
+        """
+        sel = self.state.selected_idx
+        mol_indices = self.state.selected_mol if sel >= 0 else []
+        if mol_indices != self._sel_members:
+            n_members = min(len(mol_indices), MAX_PARTICLES)
+            self._sel_members = list(mol_indices[:n_members])
+            self._sel_members_np[:n_members] = self._sel_members
+            self.host_sel_members.from_numpy(self._sel_members_np)
+            self._sel_topology = None
+        key = (sel, mol_indices, zoom, self._sim_tick)
+        if key == self._highlight_key:
+            return -1, 0.0
+        self._highlight_key = key
+        self._highlight_pending = True
+        if sel < 0 or not mol_indices:
+            return -1, 0.0
+        return sel, 0.006 * (15000.0 / zoom)
+
+    def _process_highlights(self, synced):
         """Highlight con datos ya sincronizados."""
-        highlight_lines = []
-        ring_centers_selected = []
-        ring_centers_neighbors = []
-        
-        zoom, cx, cy = self.state.camera.get_render_params()
-        vis_h = 15000.0 / zoom
-        atom_radius_vis = 0.006 * vis_h
-        
-        if self.state.selected_idx >= 0 and self.state.selected_mol:
-            pos_np = synced['pos'] if synced['pos'] is not None else self.gpu['pos'].to_numpy() # Fix truthiness
-            mol_indices = self.state.selected_mol
-            
-            p_sel = pos_np[self.state.selected_idx]
-            ring_centers_selected.append([p_sel[0], p_sel[1]])
-            
-            for idx in mol_indices:
-                if idx != self.state.selected_idx:
-                    p = pos_np[idx]
-                    ring_centers_neighbors.append([p[0], p[1]])
-            
-            enlaces_np = synced['enlaces_idx']
-            num_enlaces_np = synced['num_enlaces']
-            
-            if enlaces_np is not None:
-                mol_set = set(mol_indices)
-                for idx in mol_indices:
-                    p_i = pos_np[idx]
-                    for k in range(int(num_enlaces_np[idx])):
-                        j = int(enlaces_np[idx, k])
-                        if j > idx and j in mol_set:
-                            p_j = pos_np[j]
-                            dx, dy = p_j[0] - p_i[0], p_j[1] - p_i[1]
-                            dist = np.sqrt(dx*dx + dy*dy)
-                            if dist > 0.001:
-                                nx, ny = dx/dist, dy/dist
-                                highlight_lines.extend([
-                                    p_i[0] + nx * atom_radius_vis, p_i[1] + ny * atom_radius_vis,
-                                    p_j[0] - nx * atom_radius_vis, p_j[1] - ny * atom_radius_vis
-                                ])
+        if self._highlight_pending or self._highlight_cache is None:
+            self._highlight_pending = False
+            self._highlight_cache = self._build_selection_highlights(synced['stats'])
+        highlights = self._highlight_cache
         
         # Known molecules glow
         if getattr(self.state, 'show_molecules', False):
@@ -519,9 +622,30 @@ class FrameLoop:
             rings_known_col = np.array([], dtype=np.float32)
         
         return {
-            'lines': np.array(highlight_lines, dtype=np.float32) if highlight_lines else None,
-            'rings_sel': np.array(ring_centers_selected, dtype=np.float32) if ring_centers_selected else np.array([]),
-            'rings_nei': np.array(ring_centers_neighbors, dtype=np.float32) if len(ring_centers_neighbors) > 0 else np.array([]),
+            'lines': highlights['lines'],
+            'rings_sel': highlights['rings_sel'],
+            'rings_nei': highlights['rings_nei'],
             'rings_known': rings_known,
             'rings_known_col': rings_known_col,
         }
+    
+    def _build_selection_highlights(self, stats_np):
+        """Lee los anillos y líneas que build_render_frame dejó en GPU."""
+        result = {'lines': None, 'rings_sel': np.array([]), 'rings_nei': np.array([])}
+        if self.state.selected_idx < 0 or not self.state.selected_mol:
+            return result
+        
+        n_rings = int(stats_np[8])
+        n_line_verts = int(stats_np[9])
+        
+        rings = self._sel_rings_vis[0:n_rings]
+        self.gpu['read_bond_vertices'](self.host_sel_rings, rings)
+        result['rings_sel'] = rings[0:1]
+        if n_rings > 1:
+            result['rings_nei'] = rings[1:]
+        
+        if n_line_verts > 0:
+            lines = self._sel_lines_vis[0:n_line_verts]
+            self.gpu['read_bond_vertices'](self.host_sel_lines, lines)
+            result['lines'] = lines.ravel()
+        return result
@@ -21,6 +21,7 @@ class InputHandler:
         self.state = state
         self.sim_data = simulation_data
         self.last_tab_time = 0.0
+        self._push_queue = None  # Cola BFS en GPU de push_molecule (lazy)
     
     def process_all(self, io, w: int, h: int, world_size: float):
         """
@@ -74,7 +75,7 @@ class InputHandler:
             # Centrar cámara en el jugador
             pos = self.sim_data.get('pos')
             if pos is not None:
-                player_pos = pos.to_numpy()[self.state.player_idx]
+                player_pos = pos[self.state.player_idx].to_numpy()
                 self.state.camera.x = player_pos[0]
                 self.state.camera.y = player_pos[1]
                 self.state.camera.set_zoom(15.0)  # Zoom cercano para ver al jugador
@@ -155,14 +156,17 @@ class InputHandler:
         
         if any(v is None for v in [enlaces, num_enl, manos]):
             return
-            
-        enlaces_np = enlaces.to_numpy()
-        num_enl_np = num_enl.to_numpy()
-        manos_np = manos.to_numpy()
         
-        count = num_enl_np[player_idx]
+        # Topología desde la copia host cacheada (válida por bonds_epoch)
+        enlaces_host, num_enl_host = self.state.get_bonds_host()
+        count = num_enl_host[player_idx]
         if count == 0:
             return
+        
+        # Copia para editar: la caché no se modifica en el lugar
+        enlaces_np = enlaces_host.copy()
+        num_enl_np = num_enl_host.copy()
+        manos_np = manos.to_numpy()
             
         # Para cada átomo enlazado, eliminar la referencia al jugador
         for i in range(count):
@@ -197,6 +201,8 @@ class InputHandler:
         enlaces.from_numpy(enlaces_np)
         num_enl.from_numpy(num_enl_np)
         manos.from_numpy(manos_np)
+        self.state._bonds_host = (enlaces_np, num_enl_np)  # Ya coincide con la GPU
+        self.state.host_edits += 1
         
         self.state.add_log("🧬 Molécula desensamblada manualmente.")
         self.state.progression.check_mission()
@@ -238,27 +244,25 @@ class InputHandler:
             return
         
         # SELECCIÓN Y ATRACCIÓN DE ÁTOMOS
-        pos_array = self.sim_data['pos'].to_numpy()
-        is_active_array = self.sim_data['is_active'].to_numpy()
         player_idx = self.state.player_idx
         
-        # Buscar el átomo más cercano al click
-        dists_sq = np.sum((pos_array - np.array([world_x, world_y]))**2, axis=1)
-        dists_sq[~is_active_array.astype(bool)] = 1e12
-        dists_sq[player_idx] = 1e12  # Excluir al jugador
-        
-        idx = np.argmin(dists_sq)
-        
         # Radio interactivo dinámico (Escalado por Zoom)
         vis_h = world_size / self.state.camera.zoom
         world_px = vis_h / h
         detect_rad = 50.0 * world_px
         
-        if dists_sq[idx] < detect_rad**2:
+        # Buscar el átomo más cercano al click en GPU (excluye al jugador);
+        # solo vuelve el índice, sin copiar pos/is_active al host
+        idx = self.sim_data['pick_nearest_atom'](world_x, world_y, player_idx, detect_rad**2)
+        
+        if idx >= 0:
+            pos_field = self.sim_data['pos']
+            atom_pos = pos_field[idx].to_numpy()
+            
             # 0. DOBLE CLICK: Centrar, Inspeccionar y Tiempo Bala
             if imgui.is_mouse_double_clicked(imgui.MouseButton_.left):
                 # Centrar cámara
-                target_pos = pos_array[idx]
+                target_pos = atom_pos
                 self.state.camera.x = target_pos[0]
                 self.state.camera.y = target_pos[1]
                 self.state.camera.set_zoom(15.0)
@@ -282,21 +286,20 @@ class InputHandler:
 
             # 2. CLICK IZQUIERDO: Atraer/Enlazar o Seleccionar
             if is_left_clicked:
-                player_pos = pos_array[player_idx]
-                dist_to_player = np.sqrt(np.sum((pos_array[idx] - player_pos)**2))
+                player_pos = pos_field[player_idx].to_numpy()
+                dist_to_player = np.sqrt(np.sum((atom_pos - player_pos)**2))
                 ATTRACT_RANGE = 500.0
                 
                 if dist_to_player <= ATTRACT_RANGE:
                     # DENTRO DEL RANGO: Atraer + Enlazar
                     if dist_to_player > 50.0:
-                        vel_array = self.sim_data['vel'].to_numpy()
-                        direction = player_pos - pos_array[idx]
+                        direction = player_pos - atom_pos
                         dist = np.linalg.norm(direction)
                         if dist > 1:
                             direction = direction / dist
                             ATTRACT_SPEED = 250.0
-                            vel_array[idx] = direction * ATTRACT_SPEED
-                            self.sim_data['vel'].from_numpy(vel_array)
+                            # Escritura de un solo elemento (no todo el campo vel)
+                            self.sim_data['vel'][idx] = (direction * ATTRACT_SPEED).tolist()
                     
                     self._force_bond_with(idx)
                     self.state.selected_idx = idx
@@ -322,7 +325,7 @@ class InputHandler:
     def _transfer_consciousness(self, target_idx: int):
         """Transfiere la consciencia del jugador a un nuevo átomo (Salto de cuerpo)."""
         import src.config as cfg
-        types_np = self.sim_data['atom_types'].to_numpy()
+        types_np = self.state.get_atom_types_host()
         name_t = cfg.TIPOS_NOMBRES[types_np[target_idx]]
         
         # 1. Cambiar ID del Jugador (AppState y Taichi)
@@ -361,11 +364,9 @@ class InputHandler:
             print("[BOND] Campos no disponibles")
             return False
         
-        # Leer datos
-        enlaces_np = enlaces.to_numpy()
-        num_enl_np = num_enl.to_numpy()
-        manos_np = manos.to_numpy()
-        types_np = atom_types.to_numpy()
+        # Leer datos: tipos y enlaces de las copias host cacheadas
+        enlaces_host, num_enl_host = self.state.get_bonds_host()
+        types_np = self.state.get_atom_types_host()
         
         import src.config as cfg
         type_p = types_np[player_idx]
@@ -384,25 +385,29 @@ class InputHandler:
             print(f"[BOND] Sin afinidad: {name_p} + {name_t}")
             return False
 
-        # 2. Verificar valencia disponible
-        if manos_np[player_idx] < 0.5:
+        # 2. Verificar valencia disponible (lectura de 2 elementos, no del campo)
+        if manos[player_idx] < 0.5:
             self.state.add_log("❌ No tenés manos libres")
             return False
-        if manos_np[target_idx] < 0.5:
+        if manos[target_idx] < 0.5:
             self.state.add_log("❌ Átomo sin manos libres")
             return False
         
         # 3. Verificar si ya están enlazados
-        for i in range(num_enl_np[player_idx]):
-            if enlaces_np[player_idx, i] == target_idx:
+        for i in range(num_enl_host[player_idx]):
+            if enlaces_host[player_idx, i] == target_idx:
                 self.state.add_log("⚠️ Ya estás enlazado")
                 return False
         
         # 4. Crear enlace
-        slot_p = num_enl_np[player_idx]
-        slot_t = num_enl_np[target_idx]
+        slot_p = num_enl_host[player_idx]
+        slot_t = num_enl_host[target_idx]
         
         if slot_p < 8 and slot_t < 8:  # MAX_BONDS = 8
+            # Copia para editar: la caché no se modifica en el lugar
+            enlaces_np = enlaces_host.copy()
+            num_enl_np = num_enl_host.copy()
+            manos_np = manos.to_numpy()
             enlaces_np[player_idx, slot_p] = target_idx
             enlaces_np[target_idx, slot_t] = player_idx
             num_enl_np[player_idx] += 1
@@ -414,6 +419,8 @@ class InputHandler:
             enlaces.from_numpy(enlaces_np)
             num_enl.from_numpy(num_enl_np)
             manos.from_numpy(manos_np)
+            self.state._bonds_host = (enlaces_np, num_enl_np)  # Ya coincide con la GPU
+            self.state.host_edits += 1
             
             self.state.add_log(f"✅ ¡Enlace {name_p}-{name_t} formado!")
             print(f"[BOND] Enlace creado: {player_idx} <-> {target_idx}")
@@ -430,6 +437,7 @@ class InputHandler:
         """Procesa WASD para mover al átomo del jugador."""
         # Fuerza base del jugador (reducida para no romper enlaces)
         PLAYER_FORCE = 1500.0  # Reducido de 3000 para no romper enlaces
+        MAX_PLAYER_SPEED = 200.0  # Aumentado ya que ahora la molécula se mueve junta
         
         fx, fy = 0.0, 0.0
         
@@ -451,29 +459,12 @@ class InputHandler:
         self.state.player_force = [fx, fy]
         
         # Aplicar fuerza a TODA la molécula del jugador (no solo al átomo)
+        # BFS + impulso en un kernel: sin vel.to_numpy()/from_numpy() por frame
         if (fx != 0 or fy != 0) and self.sim_data.get('vel') is not None:
-            player_idx = self.state.player_idx
-            vel = self.sim_data['vel']
-            
-            # Obtener todos los átomos de la molécula del jugador
-            molecule_indices = self.state.get_molecule_indices(player_idx)
-            if not molecule_indices:
-                molecule_indices = [player_idx]
-            
-            # Leer velocidad actual
-            current_vel = vel.to_numpy()
-            
-            # Aplicar fuerza a TODOS los átomos de la molécula
-            for idx in molecule_indices:
-                current_vel[idx, 0] += fx * dt
-                current_vel[idx, 1] += fy * dt
-                
-                # Limitar velocidad
-                MAX_PLAYER_SPEED = 200.0  # Aumentado ya que ahora la molécula se mueve junta
-                speed = np.sqrt(current_vel[idx, 0]**2 + current_vel[idx, 1]**2)
-                if speed > MAX_PLAYER_SPEED:
-                    current_vel[idx] *= MAX_PLAYER_SPEED / speed
-            
-            # Subir a GPU
-            vel.from_numpy(current_vel)
+            import taichi as ti
+            from src.systems.chemistry import push_molecule
+            if self._push_queue is None:
+                self._push_queue = ti.ndarray(dtype=ti.i32, shape=(self.state.sim['MAX_PARTICLES'],))
+            push_molecule(self.state.player_idx, fx * dt, fy * dt, MAX_PLAYER_SPEED,
+                          self._push_queue)
 
@@ -19,19 +19,9 @@ def scan_macroscopic_bubbles(state, gpu, synced_data=None):
     Optimización V4: Usa particles_vis para evitar syncs masivos.
     """
     if synced_data and 'particles_vis' in synced_data:
-        p_data = synced_data['particles_vis']
-        # Usar p_data para agrupar...
-        # [x, y, r, g, b, scale, type, mol_id, n_enl, z, global_idx]
-        
-        molecules = {}
-        for i in range(len(p_data)):
-             mid = int(p_data[i, 7])
-             if mid not in molecules: molecules[mid] = []
-             molecules[mid].append(i)
-        
-        # ... resto de la lógica adaptada ...
         # Por brevedad, si no se usa mucho el LOD macro visual ahora, 
-        # nos enfocamos en que NO bloquee.
+        # nos enfocamos en que NO bloquee: sin agrupar átomos en Python
+        # para un resultado que se descarta.
         return None # Temporal: Desactivado para maximizar FPS en stress test
     
     # Culling params
@@ -6,10 +6,74 @@ usando IDs de molécula propagados en GPU.
 """
 
 import numpy as np
-from src.config.molecules import is_known_molecule, get_molecule_info
+from src.config.molecules import is_known_molecule, get_molecule_info, get_all_known_molecules
 
 
 ATOM_SYMBOLS = ['C', 'H', 'N', 'O', 'P', 'S']
+# Orden alfabético de símbolos para construir la fórmula
+_SYM_ORDER = sorted(range(len(ATOM_SYMBOLS)), key=lambda t: ATOM_SYMBOLS[t])
+
+# fórmula -> color RGBA float32 (o None si no es conocida). Se vacía si
+# la base de moléculas se recarga (load_molecule_database crea otro dict).
+_color_cache = {}
+_color_cache_db = None
+
+
+def _known_color(formula):
+    """Color RGBA (0-1) de una molécula conocida, o None si no está en la base."""
+    global _color_cache_db
+    db = get_all_known_molecules()
+    if db is not _color_cache_db:
+        _color_cache.clear()
+        _color_cache_db = db
+    if formula in _color_cache:
+        return _color_cache[formula]
+    col = None
+    if is_known_molecule(formula):
+        info = get_molecule_info(formula)
+        col = [c/255.0 for c in info.get("color", [255,215,0])] if info else [1, 0.84, 0, 0.85]
+        if len(col) == 3: col.append(0.85)
+        col = np.array(col, dtype=np.float32)
+    _color_cache[formula] = col
+    return col
+
+
+def _scan_particles_vis(p_data):
+    """
+    Modo V4 vectorizado: agrupa por mol_id con NumPy y solo itera en
+    Python por molécula (no por átomo) para construir la fórmula.
+    p_data columns: [x, y, r, g, b, scale, type, mol_id, n_enl, z, global_idx]
+    """
+    empty = (np.array([], dtype=np.float32), np.array([], dtype=np.float32))
+    # Culling se asume hecho en GPU para particles_vis
+    bonded = np.flatnonzero(p_data[:, 8] > 0)
+    if len(bonded) < 2:
+        return empty
+    
+    # mol_id llega como float32 exacto (< 2^24): se agrupa sin convertir
+    _, group, sizes = np.unique(p_data[bonded, 7], return_inverse=True, return_counts=True)
+    n_sym = len(ATOM_SYMBOLS)
+    types = p_data[bonded, 6].astype(np.int64)
+    valid = (types >= 0) & (types < n_sym)
+    counts = np.bincount(group[valid] * n_sym + types[valid],
+                         minlength=len(sizes) * n_sym).reshape(len(sizes), n_sym)
+    
+    # Construir fórmula por molécula (símbolos en orden alfabético)
+    group_col = np.zeros((len(sizes), 4), dtype=np.float32)
+    is_known = np.zeros(len(sizes), dtype=bool)
+    for g in np.flatnonzero(sizes >= 2):
+        row = counts[g]
+        formula = "".join(f"{ATOM_SYMBOLS[t]}{row[t]}" for t in _SYM_ORDER if row[t] > 0)
+        # Nota: is_known_molecule maneja la normalización Hill internamente o requiere Hill
+        col = _known_color(formula)
+        if col is not None:
+            is_known[g] = True
+            group_col[g] = col
+    
+    hit = is_known[group]
+    if not hit.any():
+        return empty
+    return (p_data[bonded[hit], 0:2], group_col[group[hit]])
 
 
 def scan_visible_known_molecules(state, gpu, synced_data=None):
@@ -17,51 +81,12 @@ def scan_visible_known_molecules(state, gpu, synced_data=None):
     Escanea partículas visibles usando IDs de molécula propagados en GPU.
     Optimización V4: Usa particles_vis para evitar syncs de 10k elementos.
     """
-    rings_known_pos = []
-    rings_known_col = []
-    
     # Nuevo modo V4: Usar solo lo que está en pantalla (Ya traído por render_data segmentado)
     if synced_data and 'particles_vis' in synced_data:
-        p_data = synced_data['particles_vis']
-        # p_data columns: [x, y, r, g, b, scale, type, mol_id, n_enl, z, global_idx]
-        
-        molecules = {}
-        for i in range(len(p_data)):
-            # Culling se asume hecho en GPU para particles_vis
-            num_enl = int(p_data[i, 8])
-            if num_enl == 0: continue
-            
-            mid = int(p_data[i, 7])
-            if mid not in molecules: molecules[mid] = []
-            molecules[mid].append(i)
-            
-        for mid, indices in molecules.items():
-            if len(indices) < 2: continue
-            
-            # Construir fórmula
-            counts = {}
-            for idx in indices:
-                t = int(p_data[idx, 6])
-                if 0 <= t < len(ATOM_SYMBOLS):
-                    sym = ATOM_SYMBOLS[t]
-                    counts[sym] = counts.get(sym, 0) + 1
-            
-            formula = "".join([f"{s}{counts[s]}" for s in sorted(counts.keys())])
-            # Nota: is_known_molecule maneja la normalización Hill internamente o requiere Hill
-            # (Asumimos Hill simplificado para speed)
-            
-            if is_known_molecule(formula):
-                info = get_molecule_info(formula)
-                col = [c/255.0 for c in info.get("color", [255,215,0])] if info else [1, 0.84, 0, 0.85]
-                if len(col) == 3: col.append(0.85)
+        return _scan_particles_vis(synced_data['particles_vis'])
 
-                for idx in indices:
-                    rings_known_pos.append(p_data[idx, 0:2])
-                    rings_known_col.append(col)
-                    
-        if rings_known_pos:
-            return (np.array(rings_known_pos), np.array(rings_known_col))
-        return (np.array([]), np.array([]))
+    rings_known_pos = []
+    rings_known_col = []
 
     # Fallback modo Legacy (Solo para misiones/detección total)
     mol_ids_np = synced_data['molecule_id'] if synced_data else state.sim['molecule_id'].to_numpy()
@@ -5,15 +5,17 @@ Kernels de preparación de datos para OpenGL ModernGL en un solo Buffer.
 """
 import taichi as ti
 import numpy as np
+from src.renderer.shader_sources import BOND_QUANT_MAX
 
 from src.systems.taichi_fields import (
     pos, pos_z, is_active, num_enlaces, enlaces_idx, atom_types,
     n_visible, visible_indices, colors,
     n_simulated_physics, radii,
     total_bonds_count, total_mutations, total_tunnels,
-    sim_bounds, active_particles_count, molecule_id
+    sim_bounds, active_particles_count, molecule_id,
+    bonds_dirty, bonds_epoch, player_idx, total_bonds_broken_dist
 )
-from src.config.system_constants import WORLD_SIZE, MAX_PARTICLES, MAX_BONDS
+from src.config.system_constants import WORLD_SIZE, MAX_PARTICLES, MAX_BONDS, MAX_VALENCE
 
 # Constantes de profundidad 2.5D
 from src.systems import physics_constants as phys
@@ -25,8 +27,21 @@ DEPTH_SIZE_FACTOR = phys.DEPTH_SIZE_FACTOR
 # ===================================================================
 
 MAX_BOND_VERTICES = MAX_PARTICLES * 8
+
+# Vértices de enlace en int16 relativos al centro de cámara: el rango cubre
+# la vista más el margen de culling y la longitud de un enlace estirado.
+BOND_QUANT_MARGIN = 512.0
+
+def bond_quant_range(vis_w_half, vis_h_half):
+    """Semirango (unidades de mundo) que se mapea a ±BOND_QUANT_MAX."""
+    return 2.0 * max(vis_w_half, vis_h_half) + BOND_QUANT_MARGIN
 MAX_HIGHLIGHTS = 1024
 
+# Parámetros de vista persistentes en GPU: [zoom, cx, cy, aspect]
+# Se escriben una vez por frame (set_view_params); los kernels de render
+# los leen sin recibir argumentos escalares.
+cam_params = ti.field(dtype=ti.f32, shape=4)
+
 # ===================================================================
 # UNIVERSAL GPU BUFFER (Total Unification V3)
 # ===================================================================
@@ -45,13 +60,34 @@ render_vis_count = ti.field(dtype=ti.i32, shape=())
 n_highlights = ti.field(dtype=ti.i32, shape=())
 n_bond_vertices = ti.field(dtype=ti.i32, shape=())
 
+# Resaltado de la molécula seleccionada (selection_func)
+highlight_mask = ti.field(dtype=ti.i32, shape=MAX_PARTICLES)
+n_sel_rings = ti.field(dtype=ti.i32, shape=())
+n_sel_line_verts = ti.field(dtype=ti.i32, shape=())
+# Firma de la topología de la molécula seleccionada (24 bits, exportada en stats)
+sel_topology_hash = ti.field(dtype=ti.i32, shape=())
+
+# Scan de enlaces (2 pasadas, sin atómico global): offset por átomo visible
+# y por tile de SCAN_TILE átomos
+SCAN_TILE = 64
+bond_scan = ti.field(dtype=ti.i32, shape=MAX_PARTICLES)
+bond_tile_scan = ti.field(dtype=ti.i32, shape=(MAX_PARTICLES + SCAN_TILE - 1) // SCAN_TILE)
+# Mismo esquema para compactar las partículas visibles activas
+vis_scan = ti.field(dtype=ti.i32, shape=MAX_PARTICLES)
+vis_tile_scan = ti.field(dtype=ti.i32, shape=(MAX_PARTICLES + SCAN_TILE - 1) // SCAN_TILE)
+
 # Colores de Highlight
 COLOR_SEL = ti.Vector([1.0, 1.0, 1.0, 1.0]) 
 COLOR_NEI = ti.Vector([0.0, 1.0, 1.0, 1.0]) 
 
-# Compatibilidad (Obsoleto después de V3 Full)
-border_vertices = ti.Vector.field(2, dtype=ti.f32, shape=8)
-screen_box_vertices = ti.Vector.field(2, dtype=ti.f32, shape=8)
+# Caja unitaria como 4 segmentos (8 extremos), cargada una sola vez
+unit_box_vertices = ti.Vector.field(2, dtype=ti.f32, shape=8)
+unit_box_vertices.from_numpy(np.array([
+    [0.0, 0.0], [1.0, 0.0],
+    [1.0, 0.0], [1.0, 1.0],
+    [1.0, 1.0], [0.0, 1.0],
+    [0.0, 1.0], [0.0, 0.0],
+], dtype=np.float32))
 highlight_pos = ti.Vector.field(2, dtype=ti.f32, shape=MAX_HIGHLIGHTS)
 highlight_col = ti.Vector.field(4, dtype=ti.f32, shape=MAX_HIGHLIGHTS)
 bond_vertices = ti.Vector.field(2, dtype=ti.f32, shape=MAX_BOND_VERTICES)
@@ -61,65 +97,83 @@ bond_vertices = ti.Vector.field(2, dtype=ti.f32, shape=MAX_BOND_VERTICES)
 # ===================================================================
 
 @ti.kernel
-def update_borders_gl(zoom: ti.f32, cx: ti.f32, cy: ti.f32, aspect: ti.f32):
-    """Calcula vértices de cajas de debug directamente en el Master Buffer."""
+def set_view_params(zoom: ti.f32, cx: ti.f32, cy: ti.f32, aspect: ti.f32,
+                    min_x: ti.f32, min_y: ti.f32, max_x: ti.f32, max_y: ti.f32):
+    """Escribe cámara y límites de culling en 1 launch (vs 4 escrituras [i] sueltas)."""
+    cam_params[0] = zoom
+    cam_params[1] = cx
+    cam_params[2] = cy
+    cam_params[3] = aspect
+    sim_bounds[0] = min_x
+    sim_bounds[1] = min_y
+    sim_bounds[2] = max_x
+    sim_bounds[3] = max_y
+
+@ti.kernel
+def update_borders_gl(output_debug: ti.types.ndarray()):
+    """Cajas de debug (filas 0-7 mundo, 8-15 pantalla) en NDArray y Master Buffer.
+
+    Solo hace falta con show_debug; sim_bounds lo escribe set_view_params.
+    """
+    zoom, cx, cy, aspect = cam_params[0], cam_params[1], cam_params[2], cam_params[3]
     W = float(WORLD_SIZE)
-    pts_w = [ti.Vector([0.0, 0.0]), ti.Vector([W, 0.0]), 
-             ti.Vector([W, 0.0]), ti.Vector([W, W]),
-             ti.Vector([W, W]), ti.Vector([0.0, W]),
-             ti.Vector([0.0, W]), ti.Vector([0.0, 0.0])]
-    
-    # CRITICAL: Update global simulation bounds for chemistry culling
-    sim_bounds[0] = 0.0
-    sim_bounds[1] = 0.0
-    sim_bounds[2] = W
-    sim_bounds[3] = W
     
     vis_h_half = W / (2.0 * zoom)
     vis_w_half = vis_h_half * aspect
+    box_min = ti.Vector([cx - vis_w_half, cy - vis_h_half])
+    box_size = ti.Vector([2.0 * vis_w_half, 2.0 * vis_h_half])
     
-    # World Borders
-    for i in ti.static(range(4)):
-        p1 = pts_w[i*2]
-        p2 = pts_w[i*2+1]
-        row = OFFSET_DEBUG + i
-        universal_gpu_buffer[row, 0] = p1.x
-        universal_gpu_buffer[row, 1] = p1.y
-        universal_gpu_buffer[row + 4, 0] = p2.x
-        universal_gpu_buffer[row + 4, 1] = p2.y
-        # Legacy
-        border_vertices[i] = p1
-        border_vertices[i+4] = p2
-
-    # Screen Box
-    pts_s = [ti.Vector([cx - vis_w_half, cy - vis_h_half]), ti.Vector([cx + vis_w_half, cy - vis_h_half]),
-             ti.Vector([cx + vis_w_half, cy - vis_h_half]), ti.Vector([cx + vis_w_half, cy + vis_h_half]),
-             ti.Vector([cx + vis_w_half, cy + vis_h_half]), ti.Vector([cx - vis_w_half, cy + vis_h_half]),
-             ti.Vector([cx - vis_w_half, cy + vis_h_half]), ti.Vector([cx - vis_w_half, cy - vis_h_half])]
-
-    for i in ti.static(range(4)):
-        p1 = pts_s[i*2]
-        p2 = pts_s[i*2+1]
-        row = OFFSET_DEBUG + 8 + i
-        universal_gpu_buffer[row, 0] = p1.x
-        universal_gpu_buffer[row, 1] = p1.y
-        universal_gpu_buffer[row + 4, 0] = p2.x
-        universal_gpu_buffer[row + 4, 1] = p2.y
-        # Legacy
-        screen_box_vertices[i] = p1
-        screen_box_vertices[i+4] = p2
+    # 8 extremos de segmento: transformación afín de la caja unitaria
+    # (extremo k -> segmento k//2; inicio en fila i, fin en fila i + 4)
+    for k in range(8):
+        dst = k // 2 + 4 * (k % 2)
+        u = unit_box_vertices[k]
+        p_w = u * W                   # World Borders
+        p_s = box_min + u * box_size  # Screen Box
+        universal_gpu_buffer[OFFSET_DEBUG + dst, 0] = p_w.x
+        universal_gpu_buffer[OFFSET_DEBUG + dst, 1] = p_w.y
+        universal_gpu_buffer[OFFSET_DEBUG + 8 + dst, 0] = p_s.x
+        universal_gpu_buffer[OFFSET_DEBUG + 8 + dst, 1] = p_s.y
+        output_debug[dst, 0] = p_w.x
+        output_debug[dst, 1] = p_w.y
+        output_debug[8 + dst, 0] = p_s.x
+        output_debug[8 + dst, 1] = p_s.y
 
-@ti.kernel
-def compact_render_data(output_stats: ti.types.ndarray(), output_particles: ti.types.ndarray()):
-    """Batcher V4: Empaqueta partículas y estadísticas en NDArrays (Slice Sync)."""
-    render_vis_count[None] = 0
+@ti.func
+def compact_render_func(output_stats: ti.template(), output_particles: ti.template()):
+    """Batcher V4: Empaqueta partículas y estadísticas en NDArrays (Slice Sync).
+
+    Compactación por prefix-sum (como prepare_bond_lines_gl): cada partícula
+    visible activa escribe en su offset y se conserva el orden espacial que
+    dejó sort_visible_by_cell, sin atomic_add global por partícula.
+    """
     count = n_visible[None]
+    n_tiles = (count + SCAN_TILE - 1) // SCAN_TILE
+    cap = ti.min(MAX_PARTICLES, output_particles.shape[0])
+    render_vis_count[None] = 0
+    
+    # Scan exclusivo local de cada tile (1 si la partícula sigue activa)
+    for t in range(n_tiles):
+        acc = 0
+        for k in range(t * SCAN_TILE, ti.min((t + 1) * SCAN_TILE, count)):
+            vis_scan[k] = acc
+            if is_active[visible_indices[k]]:
+                acc += 1
+        vis_tile_scan[t] = acc
+    
+    # Scan exclusivo de los totales por tile (pocos elementos, serial)
+    ti.loop_config(serialize=True)
+    for t in range(n_tiles):
+        c = vis_tile_scan[t]
+        vis_tile_scan[t] = render_vis_count[None]
+        render_vis_count[None] += c
+    render_vis_count[None] = ti.min(render_vis_count[None], cap)
     
     for k in range(count):
         i = visible_indices[k]
         if is_active[i]:
-            idx = ti.atomic_add(render_vis_count[None], 1)
-            if idx < MAX_PARTICLES:
+            idx = vis_tile_scan[k // SCAN_TILE] + vis_scan[k]
+            if idx < cap:
                 # 1. Fill Universal Buffer (for ModernGL VBO direct if possible, or fallback)
                 row = OFFSET_PARTICLES + idx 
                 p_x, p_y = pos[i].x, pos[i].y
@@ -153,6 +207,12 @@ def compact_render_data(output_stats: ti.types.ndarray(), output_particles: ti.t
                 output_particles[idx, 9] = pos_z[i]
                 output_particles[idx, 10] = float(i)
 
+    # Topología cambiada desde el último frame -> nueva época
+    # (24 bits: stats es f32 y por encima de 2^24 la época dejaría de avanzar)
+    if bonds_dirty[None] == 1:
+        bonds_epoch[None] = (bonds_epoch[None] + 1) & 0xFFFFFF
+        bonds_dirty[None] = 0
+
     # Master Stats (To NDArray)
     n_vis = float(render_vis_count[None])
     n_b_v = float(n_bond_vertices[None])
@@ -162,9 +222,17 @@ def compact_render_data(output_stats: ti.types.ndarray(), output_particles: ti.t
     output_stats[2] = float(n_highlights[None])
     output_stats[3] = float(n_simulated_physics[None])
     output_stats[4] = float(total_bonds_count[None])
-    output_stats[5] = float(total_mutations[None])
+    output_stats[5] = float(total_mutations[None] & 0xFFFFFF)  # 24 bits exactos en f32
     output_stats[6] = float(total_tunnels[None])
     output_stats[7] = float(active_particles_count[None])
+    output_stats[8] = float(n_sel_rings[None])
+    output_stats[9] = float(n_sel_line_verts[None])
+    output_stats[10] = float(bonds_epoch[None])
+    # Posición del jugador (indicador HUD) sin copiar pos completo
+    p_player = pos[player_idx[None]]
+    output_stats[11] = p_player.x
+    output_stats[12] = p_player.y
+    output_stats[13] = float(total_bonds_broken_dist[None])
     
     # Mirror to universal buffer for legacy renderers
     universal_gpu_buffer[OFFSET_STATS, 0] = n_vis
@@ -173,22 +241,62 @@ def compact_render_data(output_stats: ti.types.ndarray(), output_particles: ti.t
     universal_gpu_buffer[OFFSET_STATS, 3] = float(n_simulated_physics[None])
     universal_gpu_buffer[OFFSET_STATS + 1, 1] = float(active_particles_count[None])
 
-@ti.kernel
-def prepare_bond_lines_gl(zoom: ti.f32, cx: ti.f32, cy: ti.f32, aspect: ti.f32, output_bonds: ti.types.ndarray()):
-    """Batcher V4: Escribe enlaces en el Master Buffer y NDArray."""
+@ti.func
+def bond_lines_func(output_bonds: ti.template(), bond_range, enabled):
+    """Batcher V4: Escribe enlaces en el Master Buffer y NDArray.
+
+    Prefix-sum en 2 pasadas en lugar de un atomic_add global por enlace:
+    conteo por átomo -> scan por tiles -> escritura directa en su offset.
+    output_bonds es int16: (p - centro de cámara) / bond_range * BOND_QUANT_MAX.
+    enabled = 0 deja el batch vacío sin sacar los loops del nivel superior.
+    """
+    cam_c = ti.Vector([cam_params[1], cam_params[2]])
+    q = BOND_QUANT_MAX / bond_range
+    n_vis = n_visible[None] * enabled
+    n_tiles = (n_vis + SCAN_TILE - 1) // SCAN_TILE
+    cap = ti.min(MAX_BOND_VERTICES, output_bonds.shape[0])
     n_bond_vertices[None] = 0
-    n_vis = n_visible[None]
     
+    # Pasada 1: enlaces a dibujar (j > i) por átomo visible
+    for vi in range(n_vis):
+        i = visible_indices[vi]
+        c = 0
+        if is_active[i]:
+            # Desenrollado en compilación (MAX_VALENCE fijo) con predicado k < n
+            n_enl = num_enlaces[i]
+            for k in ti.static(range(MAX_VALENCE)):
+                if k < n_enl and enlaces_idx[i, k] > i:
+                    c += 1
+        bond_scan[vi] = c
+    
+    # Scan exclusivo local de cada tile (paralelo entre tiles)
+    for t in range(n_tiles):
+        acc = 0
+        for vi in range(t * SCAN_TILE, ti.min((t + 1) * SCAN_TILE, n_vis)):
+            c = bond_scan[vi]
+            bond_scan[vi] = acc
+            acc += c
+        bond_tile_scan[t] = acc
+    
+    # Scan exclusivo de los totales por tile (pocos elementos, serial)
+    ti.loop_config(serialize=True)
+    for t in range(n_tiles):
+        c = bond_tile_scan[t]
+        bond_tile_scan[t] = n_bond_vertices[None]
+        n_bond_vertices[None] += c
+    
+    # Pasada 2: cada átomo escribe en su offset (2 vértices por enlace)
     for vi in range(n_vis):
         i = visible_indices[vi]
         if is_active[i]:
             p_i = pos[i]
-            for k in range(num_enlaces[i]):
+            idx = 2 * (bond_tile_scan[vi // SCAN_TILE] + bond_scan[vi])
+            n_enl = num_enlaces[i]
+            for k in ti.static(range(MAX_VALENCE)):
                 j = enlaces_idx[i, k]
-                if j > i: 
-                    p_j = pos[j]
-                    idx = ti.atomic_add(n_bond_vertices[None], 2)
-                    if idx + 1 < MAX_BOND_VERTICES:
+                if k < n_enl and j > i:
+                    if idx + 1 < cap:
+                        p_j = pos[j]
                         # 1. Universal Buffer (for direct GL)
                         row = OFFSET_BONDS + idx
                         universal_gpu_buffer[row, 0] = p_i.x
@@ -196,11 +304,163 @@ def prepare_bond_lines_gl(zoom: ti.f32, cx: ti.f32, cy: ti.f32, aspect: ti.f32,
                         universal_gpu_buffer[row + 1, 0] = p_j.x
                         universal_gpu_buffer[row + 1, 1] = p_j.y
                         
-                        # 2. NDArray (for Fast Host Sync)
-                        output_bonds[idx, 0] = p_i.x
-                        output_bonds[idx, 1] = p_i.y
-                        output_bonds[idx + 1, 0] = p_j.x
-                        output_bonds[idx + 1, 1] = p_j.y
+                        # 2. NDArray (for Fast Host Sync), cuantizado a int16
+                        q_i = ti.round(ti.math.clamp((p_i - cam_c) * q, -BOND_QUANT_MAX, BOND_QUANT_MAX))
+                        q_j = ti.round(ti.math.clamp((p_j - cam_c) * q, -BOND_QUANT_MAX, BOND_QUANT_MAX))
+                        output_bonds[idx, 0] = ti.cast(q_i.x, ti.i16)
+                        output_bonds[idx, 1] = ti.cast(q_i.y, ti.i16)
+                        output_bonds[idx + 1, 0] = ti.cast(q_j.x, ti.i16)
+                        output_bonds[idx + 1, 1] = ti.cast(q_j.y, ti.i16)
+                    idx += 2
+    
+    n_bond_vertices[None] = ti.min(2 * n_bond_vertices[None], cap)
+
+@ti.kernel
+def compact_render_data(output_stats: ti.types.ndarray(), output_particles: ti.types.ndarray()):
+    """compact_render_func como kernel suelto (benchmarks y scripts)."""
+    compact_render_func(output_stats, output_particles)
+
+@ti.kernel
+def prepare_bond_lines_gl(output_bonds: ti.types.ndarray(), bond_range: ti.f32):
+    """bond_lines_func como kernel suelto (benchmarks y scripts)."""
+    bond_lines_func(output_bonds, bond_range, 1)
+
+@ti.kernel
+def read_bond_vertices(src: ti.types.ndarray(), dst: ti.types.ndarray()):
+    """Copia solo las filas usadas de src (device) a dst (staging host ya recortado).
+
+    Con dst = staging[:n] la transferencia GPU->CPU es de n filas, no del
+    ndarray completo como src.to_numpy().
+    """
+    for r in range(dst.shape[0]):
+        dst[r, 0] = src[r, 0]
+        dst[r, 1] = src[r, 1]
+
+@ti.kernel
+def read_particle_rows(src: ti.types.ndarray(), dst: ti.types.ndarray()):
+    """Como read_bond_vertices, para las filas de partículas visibles.
+
+    Copia solo las columnas de dst: un staging más angosto que src omite
+    las columnas finales que el host no usa.
+    """
+    for r, c in ti.ndrange(dst.shape[0], dst.shape[1]):
+        dst[r, c] = src[r, c]
+
+@ti.kernel
+def read_sim_prefix(pos_dst: ti.types.ndarray(), mol_dst: ti.types.ndarray()):
+    """Copia pos y molecule_id de las primeras pos_dst.shape[0] partículas.
+
+    Sustituye a pos.to_numpy() / molecule_id.to_numpy() (MAX_PARTICLES
+    filas) cuando solo interesan las n_particles asignadas.
+    """
+    for i in range(pos_dst.shape[0]):
+        pos_dst[i, 0] = pos[i].x
+        pos_dst[i, 1] = pos[i].y
+        mol_dst[i] = molecule_id[i]
+
+
+@ti.kernel
+def read_analysis_prefix(pos_dst: ti.types.ndarray(), pos_z_dst: ti.types.ndarray(),
+                         mol_dst: ti.types.ndarray(), active_dst: ti.types.ndarray()):
+    """Snapshot de pos, pos_z, molecule_id e is_active para el análisis molecular.
+
+    Mismo criterio que read_sim_prefix: solo las primeras pos_dst.shape[0]
+    partículas, en una única lectura.
+    """
+    for i in range(pos_dst.shape[0]):
+        pos_dst[i, 0] = pos[i].x
+        pos_dst[i, 1] = pos[i].y
+        pos_z_dst[i] = pos_z[i]
+        mol_dst[i] = molecule_id[i]
+        active_dst[i] = is_active[i]
+
+
+@ti.func
+def selection_func(selected_idx, members: ti.template(), n_members, atom_radius_vis,
+                   out_rings: ti.template(), out_lines: ti.template()):
+    """Anillos y líneas de la molécula seleccionada.
+
+    out_rings[0] es el átomo seleccionado y le siguen los demás miembros.
+    out_lines recibe pares de vértices por enlace (i, j>i) interno a la
+    molécula, recortados por el radio visual en ambos extremos.
+    selected_idx < 0 no toca los buffers ni los conteos del frame anterior.
+    """
+    m = n_members * (selected_idx >= 0)
+    if selected_idx >= 0:
+        n_sel_rings[None] = 1
+        n_sel_line_verts[None] = 0
+        out_rings[0, 0] = pos[selected_idx].x
+        out_rings[0, 1] = pos[selected_idx].y
+    for s in range(m):
+        highlight_mask[members[s]] = 1
+
+    for s in range(m):
+        i = members[s]
+        if i != selected_idx:
+            r = ti.atomic_add(n_sel_rings[None], 1)
+            if r < out_rings.shape[0]:
+                out_rings[r, 0] = pos[i].x
+                out_rings[r, 1] = pos[i].y
+
+    for s in range(m):
+        i = members[s]
+        p_i = pos[i]
+        # Mismo desenrollado que prepare_bond_lines_gl (MAX_VALENCE fijo)
+        n_enl = num_enlaces[i]
+        for k in ti.static(range(MAX_VALENCE)):
+            j = enlaces_idx[i, k]
+            if k < n_enl and j > i and highlight_mask[ti.max(j, 0)] == 1:
+                d = pos[j] - p_i
+                dist = d.norm()
+                if dist > 0.001:
+                    off = d / dist * atom_radius_vis
+                    v = ti.atomic_add(n_sel_line_verts[None], 2)
+                    if v + 1 < out_lines.shape[0]:
+                        a = p_i + off
+                        b = pos[j] - off
+                        out_lines[v, 0] = a.x
+                        out_lines[v, 1] = a.y
+                        out_lines[v + 1, 0] = b.x
+                        out_lines[v + 1, 1] = b.y
+
+    for s in range(m):
+        highlight_mask[members[s]] = 0
+    n_sel_rings[None] = ti.min(n_sel_rings[None], out_rings.shape[0])
+    n_sel_line_verts[None] = ti.min(n_sel_line_verts[None], out_lines.shape[0] // 2 * 2)
+
+@ti.func
+def sel_topology_func(members: ti.template(), n_members, output_stats: ti.template()):
+    """Firma de los enlaces de los miembros seleccionados -> output_stats[14].
+
+    Suma (independiente del orden) de un hash por enlace (i, j): cambia si
+    la molécula gana, pierde o cambia de enlaces, sin BFS por frame.
+    """
+    sel_topology_hash[None] = 0
+    for s in range(n_members):
+        i = members[s]
+        h = 0
+        n_enl = num_enlaces[i]
+        for k in ti.static(range(MAX_VALENCE)):
+            if k < n_enl:
+                h += (i * 73856093) ^ ((enlaces_idx[i, k] + 1) * 19349663)
+        ti.atomic_add(sel_topology_hash[None], h)
+    output_stats[14] = float(sel_topology_hash[None] & 0xFFFFFF)
+
+@ti.kernel
+def build_render_frame(output_stats: ti.types.ndarray(), output_particles: ti.types.ndarray(),
+                       output_bonds: ti.types.ndarray(), bond_range: ti.f32, draw_bonds: ti.i32,
+                       sel_idx: ti.i32, sel_members: ti.types.ndarray(), n_sel_members: ti.i32,
+                       atom_radius_vis: ti.f32, out_rings: ti.types.ndarray(), out_lines: ti.types.ndarray()):
+    """Enlaces + selección + partículas + stats del frame en 1 launch.
+
+    Enlaces y selección van primero: compact_render_func exporta sus
+    conteos en stats. sel_idx < 0 conserva la selección ya generada;
+    n_sel_members es siempre el tamaño actual (firma de topología).
+    """
+    bond_lines_func(output_bonds, bond_range, draw_bonds)
+    selection_func(sel_idx, sel_members, n_sel_members, atom_radius_vis, out_rings, out_lines)
+    compact_render_func(output_stats, output_particles)
+    sel_topology_func(sel_members, n_sel_members, output_stats)
 
 @ti.kernel
 def prepare_highlights(selected_idx: ti.i32, show_molecule: ti.i32, output_highlights: ti.types.ndarray()):
@@ -11,12 +11,31 @@ import numpy as np
 # Shaders centralizados
 from src.renderer.shader_sources import (
     PARTICLE_VERTEX, PARTICLE_FRAGMENT,
-    BOND_VERTEX, BOND_FRAGMENT,
+    BOND_VERTEX, BOND_FRAGMENT, BOND_Q_VERTEX,
     RING_VERTEX, RING_FRAGMENT,
     RING_COLORED_VERTEX, RING_COLORED_FRAGMENT,
     BUBBLE_VERTEX, BUBBLE_FRAGMENT,
+    MAX_ATOM_TYPES, BOND_QUANT_MAX,
 )
 
+# Regiones por VBO de streaming (triple buffer round-robin)
+VBO_RING = 3
+
+# Color de enlaces (equivalente a la antigua doble pasada base + brillo)
+BOND_COLOR = (0.28 / 0.52, 1.0, 0.28 / 0.52, 0.52)
+
+
+def view_transform(camera_params):
+    """
+    Escala y sesgo NDC para los shaders: ndc = pos * scale + bias (un FMA).
+
+    Los recíprocos y la inversión de Y se resuelven aquí una vez por frame.
+    """
+    cx, cy, vis_w_half, vis_h_half = camera_params
+    sx = 1.0 / vis_w_half
+    sy = -1.0 / vis_h_half
+    return (sx, sy), (-cx * sx, -cy * sy)
+
 
 class ParticleRenderer:
     """Renderizador de partículas usando ModernGL con shaders GLSL."""
@@ -32,6 +51,14 @@ class ParticleRenderer:
         self.max_particles = max_particles
         self.max_bond_vertices = max_bond_vertices
         
+        # Estados GL fijos: se activan una vez (nada en el renderer los desactiva)
+        ctx.enable(moderngl.PROGRAM_POINT_SIZE)
+        ctx.enable(moderngl.BLEND)
+        ctx.blend_func = moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA
+        # Cache de estado GL variable (set_viewport / set_line_width)
+        self._last_vp = None
+        self._last_line_width = None
+        
         # 1. Shader de Partículas (VIVID con 2.5D Depth + Desaturación)
         self.prog = ctx.program(
             vertex_shader=PARTICLE_VERTEX,
@@ -43,6 +70,11 @@ class ParticleRenderer:
             vertex_shader=BOND_VERTEX,
             fragment_shader=BOND_FRAGMENT,
         )
+        # 2b. Enlaces del batch GPU (vértices int16 relativos a la cámara)
+        self.bond_q_prog = ctx.program(
+            vertex_shader=BOND_Q_VERTEX,
+            fragment_shader=BOND_FRAGMENT,
+        )
 
         # 3. Shader de Anillos (SDF)
         self.ring_prog = ctx.program(
@@ -63,15 +95,31 @@ class ParticleRenderer:
         )
         
         # VBOs para partículas (with 2.5D scale)
-        self.vbo_pos = ctx.buffer(reserve=max_particles * 8)
-        self.vbo_col = ctx.buffer(reserve=max_particles * 12)
-        self.vbo_scale = ctx.buffer(reserve=max_particles * 4)  # 1 float per particle
+        # Ring de VBO_RING regiones: cada frame escribe en la región siguiente
+        # mientras la GPU aún puede estar dibujando la anterior (sin orphan)
+        self._ring_slot = 0
+        self.vbo_pos = ctx.buffer(reserve=VBO_RING * max_particles * 8)
+        self.vbo_col = ctx.buffer(reserve=VBO_RING * max_particles * 12)
+        self.vbo_scale = ctx.buffer(reserve=VBO_RING * max_particles * 4)  # 1 float per particle
+        self.vbo_type = ctx.buffer(reserve=VBO_RING * max_particles * 4)  # Tipo de átomo (float)
+        # Escala por defecto (1.0) reservada una vez; se sube por slices
+        self._default_scale = np.ones(max_particles, dtype=np.float32)
+        # Sin tipos: último slot de u_type_size (tamaño 1.0)
+        self._default_type = np.full(max_particles, MAX_ATOM_TYPES - 1, dtype=np.float32)
         self.vao = ctx.vertex_array(self.prog, [
             (self.vbo_pos, '2f', 'in_vert'),
             (self.vbo_col, '3f', 'in_color'),
             (self.vbo_scale, '1f', 'in_scale'),
+            (self.vbo_type, '1f', 'in_type'),
         ])
         
+        # Uniform constante (se fija una vez): tamaño relativo por tipo,
+        # radio visual (misma fórmula que init_world) / radio medio
+        radii_vis = cfg.RADIOS * 1.5 + 5.0
+        type_size = np.ones(MAX_ATOM_TYPES, dtype=np.float32)
+        type_size[:len(radii_vis)] = radii_vis / radii_vis.mean()
+        self.prog['u_type_size'].write(type_size.tobytes())
+        
         # VBOs LOD Bubbles
         self.vbo_bub_pos = ctx.buffer(reserve=max_particles * 8)
         self.vbo_bub_col = ctx.buffer(reserve=max_particles * 16)
@@ -82,10 +130,10 @@ class ParticleRenderer:
             (self.vbo_bub_rad, '1f', 'in_radius'),
         ])
         
-        # VBOs para enlaces
-        self.vbo_bonds = ctx.buffer(reserve=max_bond_vertices * 8)
-        self.vao_bonds = ctx.vertex_array(self.bond_prog, [
-            (self.vbo_bonds, '2f', 'in_vert'),
+        # VBOs para enlaces (2 x int16 por vértice)
+        self.vbo_bonds = ctx.buffer(reserve=VBO_RING * max_bond_vertices * 4)
+        self.vao_bonds = ctx.vertex_array(self.bond_q_prog, [
+            (self.vbo_bonds, '2i2', 'in_qvert'),
         ])
         
         # VBO para debug (bordes)
@@ -93,9 +141,15 @@ class ParticleRenderer:
         self.vao_debug = ctx.vertex_array(self.bond_prog, [
             (self.vbo_debug, '2f', 'in_vert'),
         ])
+        self._debug_uploaded = np.full((16, 2), np.nan, dtype=np.float32)  # Copia de lo subido
 
         # VAO para Destacados (Picking - líneas de conexión)
+        # Queda en float32 de mundo, a diferencia de vbo_bonds (int16 relativo
+        # a la cámara): así no depende del paneo y solo se sube al cambiar la
+        # selección (ver _render_highlight)
         self.vbo_select = ctx.buffer(reserve=100000 * 8) 
+        self._last_highlight = None  # Último array subido a vbo_select
+        self._zones_key = None  # (lista, nº) de zonas ya subidas a vbo_bub_* (None = sucio)
         self.vao_select = ctx.vertex_array(self.bond_prog, [
             (self.vbo_select, '2f', 'in_vert'),
         ])
@@ -114,55 +168,84 @@ class ParticleRenderer:
             (self.vbo_rings_c_col, '4f', 'in_color'),
         ])
 
+    # ==================== ESTADO GL ====================
+    
+    def set_viewport(self, width: int, height: int):
+        """Fija el viewport solo si cambió (evita llamadas GL redundantes)."""
+        vp = (0, 0, width, height)
+        if vp != self._last_vp:
+            self.ctx.viewport = vp
+            self._last_vp = vp
+    
+    def set_line_width(self, width: float):
+        """Fija el grosor de línea solo si cambió."""
+        if width != self._last_line_width:
+            self.ctx.line_width = width
+            self._last_line_width = width
+
     def render(self, pos_data, col_data, scale_data=None, bond_data=None, debug_data=None, 
                highlight_data=None, width=1280, height=720, camera_params=None, bonds_only=False,
-               alpha=1.0):
+               alpha=1.0, type_data=None, bond_range=1.0, reuse_upload=False):
         """
         Renderiza partículas, enlaces y elementos de debug.
         Args:
+            reuse_upload: los datos son los mismos del frame anterior; se
+                redibuja su región del ring sin volver a subir los VBOs
             scale_data: (N, 1) array with 2.5D depth scale factors
+            type_data: (N, 1) array con el tipo de átomo (tamaño por radio)
+            bond_data: (M, 2) int16, cuantizado con bond_range (ver bond_quant_range)
             camera_params: tuple (cx, cy, vis_w_half, vis_h_half) para transformación
         """
         if camera_params is None:
             # Fallback para evitar crashes si no se pasa
-            cx, cy, vis_w_half, vis_h_half = 0, 0, 1, 1
-        else:
-            cx, cy, vis_w_half, vis_h_half = camera_params
+            camera_params = (0, 0, 1, 1)
 
-        # Calcular escalas (invertimos Y en el shader explícitamente)
-        scale_x = 1.0 / vis_w_half
-        scale_y = 1.0 / vis_h_half
-        self.ctx.viewport = (0, 0, width, height)
-        # Estados GL base
-        self.ctx.enable(moderngl.PROGRAM_POINT_SIZE)
-        self.ctx.enable(moderngl.BLEND)
-        self.ctx.blend_func = moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA
+        # Escala/sesgo NDC con la Y ya invertida
+        scale, bias = view_transform(camera_params)
+        self.set_viewport(width, height)
         
         # Configurar Uniforms Globales
-        self.prog['u_offset'].value = (cx, cy)
-        self.prog['u_scale'].value = (scale_x, scale_y)
+        self.prog['u_scale'].value = scale
+        self.prog['u_bias'].value = bias
         self.prog['u_global_alpha'].value = float(alpha)
         
-        self.bond_prog['u_offset'].value = (cx, cy)
-        self.bond_prog['u_scale'].value = (scale_x, scale_y)
+        self.bond_prog['u_scale'].value = scale
+        self.bond_prog['u_bias'].value = bias
         self.bond_prog['u_global_alpha'].value = float(alpha)
 
+        # Región del ring para este frame
+        if reuse_upload:
+            slot = (self._ring_slot - 1) % VBO_RING
+        else:
+            slot = self._ring_slot
+            self._ring_slot = (slot + 1) % VBO_RING
+
         # Renderizar enlaces
         if bond_data is not None and len(bond_data) > 0:
-            self.vbo_bonds.orphan()  # Avoid GPU sync stall
-            self.vbo_bonds.write(bond_data.tobytes())
-            self.bond_prog['color'].value = (0.5, 1.0, 0.5, 0.4)
+            n_bv = min(len(bond_data), self.max_bond_vertices)
+            first_bv = slot * self.max_bond_vertices
+            if not reuse_upload:
+                self.vbo_bonds.write(np.ascontiguousarray(bond_data[:n_bv], dtype=np.int16),
+                                     offset=first_bv * 4)
+            # Una sola pasada con el color compuesto de las dos anteriores
+            # (0.5,1,0.5,a=0.4) + brillo (0.6,1,0.6,a=0.2) con blend alpha:
+            # A = 1-(1-0.4)(1-0.2) = 0.52, rgb = (0.2*c2 + 0.8*0.4*c1) / A
+            q = bond_range / BOND_QUANT_MAX
+            self.bond_q_prog['u_qscale'].value = (q * scale[0], q * scale[1])
+            self.bond_q_prog['u_global_alpha'].value = float(alpha)
+            self.bond_q_prog['color'].value = BOND_COLOR
             # Aplicar grosor maestro desde configuración
-            self.ctx.line_width = cfg.sim_config.BOND_WIDTH
-            self.vao_bonds.render(moderngl.LINES, vertices=len(bond_data))
-            # Segunda pasada para brillo
-            self.bond_prog['color'].value = (0.6, 1.0, 0.6, 0.2)
-            self.vao_bonds.render(moderngl.LINES, vertices=len(bond_data))
+            self.set_line_width(cfg.sim_config.BOND_WIDTH)
+            self.vao_bonds.render(moderngl.LINES, vertices=n_bv, first=first_bv)
 
         # Renderizar debug (bordes de mundo y pantalla)
         if debug_data is not None:
-            self.vbo_debug.orphan()  # Avoid GPU sync stall
-            self.vbo_debug.write(debug_data.tobytes())
+            # Las cajas solo cambian con la cámara: 16 vértices se comparan
+            # más barato que orphan + write por frame
+            if not np.array_equal(debug_data, self._debug_uploaded):
+                self._debug_uploaded[:] = debug_data
+                self.vbo_debug.orphan()  # Avoid GPU sync stall
+                self.vbo_debug.write(self._debug_uploaded)
             self.bond_prog['color'].value = (0.8, 0.2, 0.2, 0.8)
             self.vao_debug.render(moderngl.LINES, vertices=8)
             self.bond_prog['color'].value = (0.4, 0.8, 1.0, 0.8)
@@ -170,25 +253,29 @@ class ParticleRenderer:
 
         # Renderizar partículas con efecto 2.5D
         if not bonds_only and pos_data is not None and len(pos_data) > 0:
-            # Orphan buffers to avoid GPU sync stalls
-            self.vbo_pos.orphan()
-            self.vbo_col.orphan()
-            self.vbo_pos.write(pos_data.tobytes())
-            self.vbo_col.write(col_data.tobytes())
+            n = min(len(pos_data), self.max_particles)
+            first = slot * self.max_particles
+            if not reuse_upload:
+                # Escritura directa desde el buffer host (buffer protocol):
+                # sin la copia intermedia de tobytes() cuando ya es f32 contiguo
+                self.vbo_pos.write(np.ascontiguousarray(pos_data[:n], dtype=np.float32), offset=first * 8)
+                self.vbo_col.write(np.ascontiguousarray(col_data[:n], dtype=np.float32), offset=first * 12)
+            
+                # 2.5D depth scale
+                if scale_data is not None and len(scale_data) > 0:
+                    self.vbo_scale.write(np.ascontiguousarray(scale_data[:n], dtype=np.float32), offset=first * 4)
+                else:
+                    # Default scale = 1.0 for all particles
+                    self.vbo_scale.write(self._default_scale[:n], offset=first * 4)
             
-            # 2.5D depth scale
-            if scale_data is not None and len(scale_data) > 0:
-                self.vbo_scale.orphan()  # Avoid GPU sync stall
-                self.vbo_scale.write(scale_data.astype('float32').tobytes())
-            else:
-                # Default scale = 1.0 for all particles
-                import numpy as np
-                default_scale = np.ones((len(pos_data), 1), dtype=np.float32)
-                self.vbo_scale.write(default_scale.tobytes())
+                if type_data is not None and len(type_data) > 0:
+                    self.vbo_type.write(np.ascontiguousarray(type_data[:n], dtype=np.float32), offset=first * 4)
+                else:
+                    self.vbo_type.write(self._default_type[:n], offset=first * 4)
             
             # Set base point size uniform
             self.prog['u_base_size'].value = cfg.sim_config.ATOM_SIZE_GL
-            self.vao.render(moderngl.POINTS, vertices=len(pos_data))
+            self.vao.render(moderngl.POINTS, vertices=n, first=first)
 
         # Renderizar selección (destacado)
         if highlight_data is not None and len(highlight_data) > 0:
@@ -200,41 +287,39 @@ class ParticleRenderer:
         # Esta función solo dibuja las líneas de enlace
         if len(highlight_data) < 4:
             return
-            
-        data_bytes = highlight_data.tobytes()
-        self.vbo_select.orphan()  # Avoid GPU sync stall
-        if len(data_bytes) <= self.vbo_select.size:
-            self.vbo_select.write(data_bytes)
-        else:
-            self.vbo_select.write(data_bytes[:self.vbo_select.size])
+        
+        # FrameLoop reutiliza el mismo array mientras la selección no cambia:
+        # en ese caso el VBO ya tiene los datos y se omite la subida
+        if highlight_data is not self._last_highlight:
+            self._last_highlight = highlight_data
+            max_floats = self.vbo_select.size // 4
+            self.vbo_select.orphan()  # Avoid GPU sync stall
+            self.vbo_select.write(np.ascontiguousarray(highlight_data[:max_floats], dtype=np.float32))
         
         # Renderizar todas las líneas como LINES (pares de vértices)
-        self.ctx.line_width = UIConfig.WIDTH_SECONDARY
+        self.set_line_width(UIConfig.WIDTH_SECONDARY)
         # Usar el color de highlight para enlaces
         highlight_color = getattr(UIConfig, 'COLOR_HIGHLIGHT_BOND', UIConfig.COLOR_CYAN_NEON)
         self.bond_prog['color'].value = highlight_color
-        num_vertices = len(highlight_data) // 2
+        num_vertices = min(len(highlight_data), self.vbo_select.size // 4) // 2
         self.vao_select.render(moderngl.LINES, vertices=num_vertices)
 
     def render_rings(self, centers_data, radius_world, color, camera_params, height, alpha=1.0):
         """Renderiza anillos usando SDF."""
         if len(centers_data) == 0:
             return
-            
-        cx, cy, vis_w_half, vis_h_half = camera_params
         
         # Ensure VBO capacity
         n = min(len(centers_data), 10000)
         
         # Actualizar VBO y Program
         self.vbo_rings.orphan()  # Avoid GPU sync stall
-        self.vbo_rings.write(centers_data[:n].tobytes())
+        self.vbo_rings.write(np.ascontiguousarray(centers_data[:n], dtype=np.float32))
         
-        scale_x = 1.0 / vis_w_half
-        scale_y = 1.0 / vis_h_half
+        scale, bias = view_transform(camera_params)
         
-        self.ring_prog['u_offset'].value = (cx, cy)
-        self.ring_prog['u_scale'].value = (scale_x, scale_y)
+        self.ring_prog['u_scale'].value = scale
+        self.ring_prog['u_bias'].value = bias
         self.ring_prog['u_radius_world'].value = radius_world
         self.ring_prog['u_px_scale_y'].value = height / 2.0
         self.ring_prog['color'].value = color
@@ -247,21 +332,19 @@ class ParticleRenderer:
         if len(centers_data) == 0:
             return
             
-        cx, cy, vis_w_half, vis_h_half = camera_params
         n = min(len(centers_data), 10000)
         
         # Actualizar VBOs
         self.vbo_rings_c_pos.orphan()  # Avoid GPU sync stall
         self.vbo_rings_c_col.orphan()
-        self.vbo_rings_c_pos.write(centers_data[:n].tobytes())
-        self.vbo_rings_c_col.write(colors_data[:n].tobytes())
+        self.vbo_rings_c_pos.write(np.ascontiguousarray(centers_data[:n], dtype=np.float32))
+        self.vbo_rings_c_col.write(np.ascontiguousarray(colors_data[:n], dtype=np.float32))
         
         # Configurar programa
-        scale_x = 1.0 / vis_w_half
-        scale_y = 1.0 / vis_h_half
+        scale, bias = view_transform(camera_params)
         
-        self.ring_prog_colored['u_offset'].value = (cx, cy)
-        self.ring_prog_colored['u_scale'].value = (scale_x, scale_y)
+        self.ring_prog_colored['u_scale'].value = scale
+        self.ring_prog_colored['u_bias'].value = bias
         self.ring_prog_colored['u_radius_world'].value = radius_world
         self.ring_prog_colored['u_px_scale_y'].value = height / 2.0
         self.ring_prog_colored['u_global_alpha'].value = float(alpha)
@@ -275,42 +358,38 @@ class ParticleRenderer:
         if not zones:
             return
             
-        cx, cy, vis_w_half, vis_h_half = camera_params
-        
-        # Preparar datos
-        centers = []
-        colors = []
-        radii = []
-        
-        for zone in zones:
-            centers.append(zone.pos)
-            radii.append(zone.radius)
-            if zone.type.value == "Clay":
-                colors.append([0.2, 0.8, 0.4, 0.25]) # Verde esmeralda para arcilla
-            else:
-                colors.append([1.0, 0.4, 0.1, 0.4]) # Naranja/Rojo vivo para ventilas
-        
-        centers = np.array(centers, dtype=np.float32)
-        colors = np.array(colors, dtype=np.float32)
-        radii = np.array(radii, dtype=np.float32)
-        
         n = len(zones)
-        self.vbo_bub_pos.orphan()  # Avoid GPU sync stall
-        self.vbo_bub_col.orphan()
-        self.vbo_bub_rad.orphan()
-        self.vbo_bub_pos.write(centers.tobytes())
-        self.vbo_bub_col.write(colors.tobytes())
-        self.vbo_bub_rad.write(radii.tobytes())
+        
+        # Las zonas son estáticas: solo se suben cuando cambia la lista
+        # (o render_bubbles reutilizó los mismos VBOs)
+        if self._zones_key != (id(zones), n):
+            self._zones_key = (id(zones), n)
+            centers = []
+            colors = []
+            radii = []
+            
+            for zone in zones:
+                centers.append(zone.pos)
+                radii.append(zone.radius)
+                if zone.type.value == "Clay":
+                    colors.append([0.2, 0.8, 0.4, 0.25]) # Verde esmeralda para arcilla
+                else:
+                    colors.append([1.0, 0.4, 0.1, 0.4]) # Naranja/Rojo vivo para ventilas
+            
+            self.vbo_bub_pos.orphan()  # Avoid GPU sync stall
+            self.vbo_bub_col.orphan()
+            self.vbo_bub_rad.orphan()
+            self.vbo_bub_pos.write(np.array(centers, dtype=np.float32))
+            self.vbo_bub_col.write(np.array(colors, dtype=np.float32))
+            self.vbo_bub_rad.write(np.array(radii, dtype=np.float32))
         
         # Estados GL
-        self.ctx.viewport = (0, 0, width, height)
-        self.ctx.enable(moderngl.PROGRAM_POINT_SIZE)
-        self.ctx.enable(moderngl.BLEND)
-        self.ctx.blend_func = moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA
+        self.set_viewport(width, height)
         
         # Configurar programa
-        self.bubble_prog['u_offset'].value = (cx, cy)
-        self.bubble_prog['u_scale'].value = (1.0 / vis_w_half, 1.0 / vis_h_half)
+        scale, bias = view_transform(camera_params)
+        self.bubble_prog['u_scale'].value = scale
+        self.bubble_prog['u_bias'].value = bias
         self.bubble_prog['u_px_scale_y'].value = height / 2.0
         self.bubble_prog['u_global_alpha'].value = float(alpha)
         
@@ -325,30 +404,23 @@ class ParticleRenderer:
         if len(centers) == 0:
             return
 
-        cx, cy, vis_w_half, vis_h_half = camera_params
         n = min(len(centers), 10000) # Buffer limit
         
         # Write to VBOs (orphan first to avoid GPU sync)
+        self._zones_key = None  # Las zonas deben volver a subirse
         self.vbo_bub_pos.orphan()
         self.vbo_bub_col.orphan()
         self.vbo_bub_rad.orphan()
-        self.vbo_bub_pos.write(centers[:n].tobytes())
-        self.vbo_bub_col.write(colors[:n].tobytes())
-        self.vbo_bub_rad.write(radii[:n].tobytes())
-        
-        # Configuración de Estados GL (Necesario si no se llamó a render normal)
-        self.ctx.viewport = (0, 0, width, height)
+        self.vbo_bub_pos.write(np.ascontiguousarray(centers[:n], dtype=np.float32))
+        self.vbo_bub_col.write(np.ascontiguousarray(colors[:n], dtype=np.float32))
+        self.vbo_bub_rad.write(np.ascontiguousarray(radii[:n], dtype=np.float32))
         
-        self.ctx.enable(moderngl.PROGRAM_POINT_SIZE)
-        self.ctx.enable(moderngl.BLEND)
-        self.ctx.blend_func = moderngl.SRC_ALPHA, moderngl.ONE_MINUS_SRC_ALPHA
+        self.set_viewport(width, height)
         
         # Shader Uniforms
-        scale_x = 1.0 / vis_w_half
-        scale_y = 1.0 / vis_h_half
-        
-        self.bubble_prog['u_offset'].value = (cx, cy)
-        self.bubble_prog['u_scale'].value = (scale_x, scale_y)
+        scale, bias = view_transform(camera_params)
+        self.bubble_prog['u_scale'].value = scale
+        self.bubble_prog['u_bias'].value = bias
         self.bubble_prog['u_px_scale_y'].value = height / 2.0
         self.bubble_prog['u_global_alpha'].value = float(alpha)
         
@@ -357,5 +429,5 @@ class ParticleRenderer:
     
     def clear_screen(self, width: int, height: int):
         """Limpia la pantalla cuando no hay partículas visibles."""
-        self.ctx.viewport = (0, 0, width, height)
+        self.set_viewport(width, height)
         self.ctx.clear(0.02, 0.02, 0.05, 1.0)
@@ -9,23 +9,30 @@ Permite editar shaders sin modificar lógica de rendering.
 # PARTÍCULAS - Shader con efecto 2.5D Depth + Desaturación
 # ===================================================================
 
+# Tamaño del array uniforme u_type_size (>= nº de elementos).
+# Debe coincidir con el #define de PARTICLE_VERTEX.
+MAX_ATOM_TYPES = 16
+
 PARTICLE_VERTEX = '''
 #version 330
+#define MAX_ATOM_TYPES 16
 in vec2 in_vert;
 in vec3 in_color;
 in float in_scale;  // 2.5D depth scale (0.4 to 1.6)
+in float in_type;   // Tipo de átomo (índice en u_type_size)
 out vec3 v_color;
 out float v_depth_factor;  // Para desaturación en fragment
-uniform vec2 u_offset;
-uniform vec2 u_scale;
+uniform vec2 u_scale;   // (1/vis_w_half, -1/vis_h_half): Y ya invertida
+uniform vec2 u_bias;    // -cam * u_scale
 uniform float u_base_size;
+uniform float u_type_size[MAX_ATOM_TYPES];  // Tamaño relativo por tipo (radio)
 
 void main() {
-    vec2 pos_ndc = (in_vert - u_offset) * u_scale;
-    gl_Position = vec4(pos_ndc.x, -pos_ndc.y, 0.0, 1.0);
+    gl_Position = vec4(in_vert * u_scale + u_bias, 0.0, 1.0);  // Un solo FMA
     
     // Tamaño con efecto de profundidad
-    gl_PointSize = u_base_size * in_scale;
+    int t = clamp(int(in_type), 0, MAX_ATOM_TYPES - 1);
+    gl_PointSize = u_base_size * in_scale * u_type_size[t];
     v_color = in_color;
     
     // Factor de profundidad: <1 = lejos (desaturar), >1 = cerca (saturar)
@@ -75,12 +82,11 @@ void main() {
 BOND_VERTEX = '''
 #version 330
 in vec2 in_vert;
-uniform vec2 u_offset;
-uniform vec2 u_scale;
+uniform vec2 u_scale;   // (1/vis_w_half, -1/vis_h_half): Y ya invertida
+uniform vec2 u_bias;    // -cam * u_scale
 
 void main() {
-    vec2 pos_ndc = (in_vert - u_offset) * u_scale;
-    gl_Position = vec4(pos_ndc.x, -pos_ndc.y, 0.0, 1.0);
+    gl_Position = vec4(in_vert * u_scale + u_bias, 0.0, 1.0);  // Un solo FMA
 }
 '''
 
@@ -94,6 +100,20 @@ void main() {
 }
 '''
 
+# Enlaces cuantizados: int16 relativo al centro de cámara (prepare_bond_lines_gl).
+# u_qscale = (bond_range / BOND_QUANT_MAX) / vis_half por eje. Usa BOND_FRAGMENT.
+BOND_QUANT_MAX = 32767
+
+BOND_Q_VERTEX = '''
+#version 330
+in ivec2 in_qvert;
+uniform vec2 u_qscale;
+
+void main() {
+    gl_Position = vec4(vec2(in_qvert) * u_qscale, 0.0, 1.0);
+}
+'''
+
 
 # ===================================================================
 # ANILLOS SDF - Shader con efecto de anillo
@@ -102,17 +122,16 @@ void main() {
 RING_VERTEX = '''
 #version 330
 in vec2 in_vert;
-uniform vec2 u_offset;
-uniform vec2 u_scale;
+uniform vec2 u_scale;   // (1/vis_w_half, -1/vis_h_half): Y ya invertida
+uniform vec2 u_bias;    // -cam * u_scale
 uniform float u_radius_world;
 uniform float u_px_scale_y; // height / 2.0
 
 void main() {
-    vec2 pos_ndc = (in_vert - u_offset) * u_scale;
-    gl_Position = vec4(pos_ndc.x, -pos_ndc.y, 0.0, 1.0);
+    gl_Position = vec4(in_vert * u_scale + u_bias, 0.0, 1.0);  // Un solo FMA
     
     // Calcular tamaño en pixeles para cubrir el radio del mundo
-    float diam_px = (u_radius_world * u_scale.y) * u_px_scale_y * 2.0;
+    float diam_px = (u_radius_world * abs(u_scale.y)) * u_px_scale_y * 2.0;
     gl_PointSize = diam_px + 4.0; // +4 padding para antialiasing
 }
 '''
@@ -146,16 +165,15 @@ in vec2 in_vert;
 in vec4 in_color; // RGBA per instance
 out vec4 v_color;
 
-uniform vec2 u_offset;
-uniform vec2 u_scale;
+uniform vec2 u_scale;   // (1/vis_w_half, -1/vis_h_half): Y ya invertida
+uniform vec2 u_bias;    // -cam * u_scale
 uniform float u_radius_world;
 uniform float u_px_scale_y; 
 
 void main() {
-    vec2 pos_ndc = (in_vert - u_offset) * u_scale;
-    gl_Position = vec4(pos_ndc.x, -pos_ndc.y, 0.0, 1.0);
+    gl_Position = vec4(in_vert * u_scale + u_bias, 0.0, 1.0);  // Un solo FMA
     
-    float diam_px = (u_radius_world * u_scale.y) * u_px_scale_y * 2.0;
+    float diam_px = (u_radius_world * abs(u_scale.y)) * u_px_scale_y * 2.0;
     gl_PointSize = diam_px + 4.0; 
     v_color = in_color;
 }
@@ -190,15 +208,14 @@ in vec4 in_color;
 in float in_radius;
 out vec4 v_color;
 
-uniform vec2 u_offset;
-uniform vec2 u_scale;
+uniform vec2 u_scale;   // (1/vis_w_half, -1/vis_h_half): Y ya invertida
+uniform vec2 u_bias;    // -cam * u_scale
 uniform float u_px_scale_y; 
 
 void main() {
-    vec2 pos_ndc = (in_vert - u_offset) * u_scale;
-    gl_Position = vec4(pos_ndc.x, -pos_ndc.y, 0.0, 1.0);
+    gl_Position = vec4(in_vert * u_scale + u_bias, 0.0, 1.0);  // Un solo FMA
     
-    float diam_px = (in_radius * u_scale.y) * u_px_scale_y * 2.0;
+    float diam_px = (in_radius * abs(u_scale.y)) * u_px_scale_y * 2.0;
     gl_PointSize = max(diam_px + 2.0, 4.0);
     v_color = in_color;
 }
@@ -0,0 +1,161 @@
+"""
+Async Analysis Worker - Análisis molecular en segundo plano
+============================================================
+Ejecuta MolecularAnalyzer.analyze_frame en un hilo separado, igual que
+AsyncChemistryWorker con la detección molecular.
+
+Arquitectura:
+- El loop principal entrega un snapshot (arrays propios) cada N frames
+- El worker analiza y publica el resumen de estadísticas
+- La UI solo lee el último resumen publicado (state.analysis_result)
+"""
+
+import threading
+import queue
+import time
+from typing import Optional, Dict, Any
+import numpy as np
+
+
+class AsyncAnalysisWorker:
+    """
+    Worker thread para el análisis molecular.
+
+    Uso:
+        worker = get_async_analysis_worker()
+        worker.start()
+
+        # Cada N frames (si no está ocupado):
+        worker.submit_snapshot(pos, pos_z, types, enlaces, num_enl, mol_id, active)
+
+        # Verificar resultados (non-blocking):
+        result = worker.get_result()
+        if result:
+            state.analysis_result = result['summary']
+    """
+
+    def __init__(self):
+        # Un solo snapshot en vuelo: si el worker sigue ocupado se salta el tick
+        self._input_queue = queue.Queue(maxsize=1)
+        self._output_queue = queue.Queue(maxsize=1)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._is_processing = False
+        self._lock = threading.Lock()
+
+        # Stats
+        self.jobs_processed = 0
+        self.last_process_time_ms = 0.0
+
+    def start(self):
+        """Inicia el worker thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self._thread.start()
+        print("[ASYNC ANALYSIS] Worker iniciado.")
+
+    def stop(self):
+        """Detiene el worker thread de forma segura."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        print("[ASYNC ANALYSIS] Worker detenido.")
+
+    def submit_snapshot(self, pos_np: np.ndarray, pos_z_np: np.ndarray,
+                        atom_types_np: np.ndarray, enlaces_idx_np: np.ndarray,
+                        num_enlaces_np: np.ndarray, molecule_id_np: np.ndarray,
+                        is_active_np: np.ndarray) -> bool:
+        """
+        Encola un snapshot para analizar.
+
+        Los arrays pasan a ser del worker: el llamador no debe modificarlos.
+
+        Returns:
+            True si se encoló, False si hay un análisis pendiente (skip)
+        """
+        job = (pos_np, pos_z_np, atom_types_np, enlaces_idx_np,
+               num_enlaces_np, molecule_id_np, is_active_np)
+        try:
+            self._input_queue.put_nowait(job)
+            return True
+        except queue.Full:
+            return False
+
+    def get_result(self) -> Optional[Dict[str, Any]]:
+        """Retorna el último resultado publicado (non-blocking) o None."""
+        try:
+            return self._output_queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def is_busy(self) -> bool:
+        """Retorna True si hay un snapshot pendiente o en proceso."""
+        with self._lock:
+            return self._is_processing or not self._input_queue.empty()
+
+    def _worker_loop(self):
+        """Loop principal del worker thread."""
+        from src.systems.molecular_analyzer import get_molecular_analyzer
+        analyzer = get_molecular_analyzer()
+
+        while not self._stop_event.is_set():
+            try:
+                job = self._input_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            with self._lock:
+                self._is_processing = True
+
+            try:
+                start_time = time.perf_counter()
+                frame = analyzer.analyze_frame(*job)
+                # El resumen se arma aquí: la UI nunca recorre el estado
+                # del analizador mientras este hilo lo modifica
+                result = {
+                    'frame': frame,
+                    'summary': analyzer.get_summary(),
+                }
+                self.last_process_time_ms = (time.perf_counter() - start_time) * 1000.0
+                self.jobs_processed += 1
+
+                # Cola de 1: se reemplaza el resultado que nadie recogió
+                try:
+                    self._output_queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._output_queue.put_nowait(result)
+            except Exception as e:
+                print(f"[ASYNC ANALYSIS] Error en worker: {e}")
+            finally:
+                with self._lock:
+                    self._is_processing = False
+
+
+# Singleton
+_async_worker: Optional[AsyncAnalysisWorker] = None
+
+
+def get_async_analysis_worker() -> AsyncAnalysisWorker:
+    """Obtiene la instancia singleton del worker."""
+    global _async_worker
+    if _async_worker is None:
+        _async_worker = AsyncAnalysisWorker()
+    return _async_worker
+
+
+def start_async_analysis():
+    """Inicia el worker (llamar al inicio del juego)."""
+    get_async_analysis_worker().start()
+
+
+def stop_async_analysis():
+    """Detiene el worker (llamar al cerrar el juego)."""
+    global _async_worker
+    if _async_worker is not None:
+        _async_worker.stop()
+        _async_worker = None
@@ -15,6 +15,10 @@ from src.systems.chemistry.bonding import (
     check_bonding_gpu,
     reset_molecule_ids,
     propagate_molecule_ids_step,
+    refresh_molecule_ids,
+    flood_molecule,
+    push_molecule,
+    update_partial_charge_i,
     update_partial_charges,
 )
 
@@ -48,6 +52,10 @@ __all__ = [
     'check_bonding_gpu',
     'reset_molecule_ids',
     'propagate_molecule_ids_step',
+    'refresh_molecule_ids',
+    'flood_molecule',
+    'push_molecule',
+    'update_partial_charge_i',
     'update_partial_charges',
     # Bond Forces
     'apply_bond_forces_i',
@@ -21,7 +21,7 @@ from src.systems.taichi_fields import (
     temperature,
     
     # Contadores
-    total_bonds_count, total_bonds_broken_dist,
+    total_bonds_count, total_bonds_broken_dist, bonds_dirty,
     
     # Jugador
     player_idx,
@@ -71,6 +71,7 @@ def apply_bond_forces_i(i: ti.i32):
                         
                         ti.atomic_add(manos_libres[i], 1.0)
                         ti.atomic_add(manos_libres[j], 1.0)
+                        bonds_dirty[None] = 1
                         if i < j:
                             ti.atomic_sub(total_bonds_count[None], 1)
                             ti.atomic_add(total_bonds_broken_dist[None], 1)
@@ -92,6 +93,7 @@ def apply_bond_forces_i(i: ti.i32):
                             ti.atomic_add(manos_libres[i], 1.0)
                             ti.atomic_add(manos_libres[j], 1.0)
                             ti.atomic_sub(total_bonds_count[None], 1)
+                            bonds_dirty[None] = 1
                         else:
                             # Fuerza de resorte 3D
                             f_spring_mag = (dist_3d - dist_equilibrio[None]) * spring_k[None]
@@ -11,7 +11,7 @@ from src.systems.taichi_fields import (
     MAX_VALENCE, GRID_CELL_SIZE, GRID_RES, MAX_PER_CELL,
     
     # Campos de partículas
-    pos, is_active, atom_types,
+    pos, vel, is_active, atom_types,
     pos_z,  # 2.5D
     
     # Campos de química
@@ -22,7 +22,7 @@ from src.systems.taichi_fields import (
     rango_enlace_max,
     
     # Contadores
-    total_bonds_count,
+    total_bonds_count, bonds_dirty,
     
     # DEBUG Counters
     debug_particles_checked, debug_neighbors_found, 
@@ -37,7 +37,7 @@ from src.systems.taichi_fields import (
     ELECTRONEG,
     
     # Molecule ID Propagation
-    molecule_id, needs_propagate,
+    molecule_id, needs_propagate, mol_mask,
     
     # Medio
     medium_polarity,
@@ -51,11 +51,17 @@ from src.systems.taichi_fields import (
 
 @ti.func
 def check_bonding_func_single(i: ti.i32):
-    """Formar enlaces para una partícula i - Lógica optimizada (Sin Culling)."""
+    """Formar enlaces para una partícula i - Lógica optimizada (Sin Culling).
+
+    Los contadores de debug se acumulan en locales y se publican con un
+    único atomic_add por partícula (no uno por vecino sobre el mismo escalar).
+    """
     if i < n_particles[None] and is_active[i]:
-        ti.atomic_add(debug_particles_checked[None], 1)
+        n_prob = 0
+        n_dist = 0
+        n_neigh = 0
         if manos_libres[i] > 0.5:
-            ti.atomic_add(debug_prob_passed[None], 1)
+            n_prob += 1
             
             gx = int(pos[i].x / GRID_CELL_SIZE)
             gy = int(pos[i].y / GRID_CELL_SIZE)
@@ -75,10 +81,10 @@ def check_bonding_func_single(i: ti.i32):
                         j = grid_pids[nx, ny, k]
                         
                         if i < j:
-                            ti.atomic_add(debug_distance_passed[None], 1)
+                            n_dist += 1
                         
                         if i < j and is_active[j] and manos_libres[j] > 0.5:
-                            ti.atomic_add(debug_neighbors_found[None], 1)
+                            n_neigh += 1
                             type_j = atom_types[j]
                             max_val_j = VALENCIAS_MAX[type_j]
                             
@@ -89,7 +95,7 @@ def check_bonding_func_single(i: ti.i32):
                                 dist_3d = ti.sqrt(diff_xy.x*diff_xy.x + diff_xy.y*diff_xy.y + diff_z*diff_z)
                                 
                                 if 1.0 < dist_3d < rango_enlace_max[None]:
-                                    ti.atomic_add(debug_distance_passed[None], 1)
+                                    n_dist += 1
                                     
                                     # Force bond if already same molecule ID
                                     force_bond = (molecule_id[i] == molecule_id[j] and molecule_id[i] != -1)
@@ -148,7 +154,7 @@ def check_bonding_func_single(i: ti.i32):
                                             
                                             if ti.random() < prob:
                                                 should_bond = True
-                                            ti.atomic_add(debug_prob_passed[None], 1)
+                                            n_prob += 1
 
                                     if should_bond:
                                         idx_i = ti.atomic_add(num_enlaces[i], 1)
@@ -160,6 +166,7 @@ def check_bonding_func_single(i: ti.i32):
                                             ti.atomic_sub(manos_libres[i], 1.0)
                                             ti.atomic_sub(manos_libres[j], 1.0)
                                             ti.atomic_add(total_bonds_count[None], 1)
+                                            bonds_dirty[None] = 1
                                             
                                             # Molecule ID merge
                                             if not force_bond:
@@ -176,6 +183,14 @@ def check_bonding_func_single(i: ti.i32):
                                             # Rollback
                                             ti.atomic_sub(num_enlaces[i], 1)
                                             ti.atomic_sub(num_enlaces[j], 1)
+        
+        ti.atomic_add(debug_particles_checked[None], 1)
+        if n_prob > 0:
+            ti.atomic_add(debug_prob_passed[None], n_prob)
+        if n_dist > 0:
+            ti.atomic_add(debug_distance_passed[None], n_dist)
+        if n_neigh > 0:
+            ti.atomic_add(debug_neighbors_found[None], n_neigh)
 
 
 @ti.kernel
@@ -188,8 +203,8 @@ def check_bonding_gpu():
 # PROPAGACIÓN DE IDS DE MOLÉCULA
 # ===================================================================
 
-@ti.kernel
-def reset_molecule_ids():
+@ti.func
+def reset_molecule_ids_func():
     """RESET (Paso 1): Cada partícula inicia con su propio ID."""
     for i in range(n_particles[None]):
         if is_active[i]:
@@ -201,7 +216,13 @@ def reset_molecule_ids():
 
 
 @ti.kernel
-def propagate_molecule_ids_step() -> ti.i32:
+def reset_molecule_ids():
+    """RESET (Paso 1) en un launch (reset_molecule_ids_func)."""
+    reset_molecule_ids_func()
+
+
+@ti.func
+def propagate_molecule_ids_func() -> ti.i32:
     """FLOOD FILL (Paso 2): Propaga el ID menor a través de la red."""
     changes = 0
     for i in range(n_particles[None]):
@@ -224,25 +245,103 @@ def propagate_molecule_ids_step() -> ti.i32:
     return changes
 
 
+@ti.kernel
+def propagate_molecule_ids_step() -> ti.i32:
+    """Un paso de FLOOD FILL; retorna cuántos IDs cambiaron."""
+    return propagate_molecule_ids_func()
+
+
+@ti.kernel
+def refresh_molecule_ids(n_iters: ti.template()):
+    """RESET + n_iters pasos de FLOOD FILL en un solo launch.
+
+    ti.static desenrolla los pasos en loops de nivel superior: cada uno
+    ve los IDs del anterior, igual que los launches sueltos.
+    """
+    reset_molecule_ids_func()
+    for _ in ti.static(range(n_iters)):
+        propagate_molecule_ids_func()
+
+
+# ===================================================================
+# BFS DE SELECCIÓN (Molécula de un átomo, en GPU)
+# ===================================================================
+
+@ti.func
+def flood_func(seed, dst: ti.template()) -> ti.i32:
+    """BFS con cola: dst hace de cola y de salida; retorna el total.
+
+    El recorrido es serial (O(tamaño de la molécula)), sin barrer las
+    n_particles por nivel ni sincronizar con el host entre niveles.
+    mol_mask marca los visitados y se limpia solo en esos índices.
+    """
+    dst[0] = seed
+    mol_mask[seed] = 1
+    head = 0
+    tail = 1
+    while head < tail:
+        i = dst[head]
+        head += 1
+        for b in range(num_enlaces[i]):
+            j = enlaces_idx[i, b]
+            if j >= 0 and tail < dst.shape[0]:
+                if mol_mask[j] == 0:
+                    mol_mask[j] = 1
+                    dst[tail] = j
+                    tail += 1
+    for k in range(tail):
+        mol_mask[dst[k]] = 0
+    return tail
+
+
+@ti.kernel
+def flood_molecule(seed: ti.i32, dst: ti.types.ndarray()) -> ti.i32:
+    """BFS en un solo kernel (flood_func); retorna el total de miembros en dst."""
+    return flood_func(seed, dst)
+
+
+@ti.kernel
+def push_molecule(seed: ti.i32, dvx: ti.f32, dvy: ti.f32, max_speed: ti.f32,
+                  queue: ti.types.ndarray()):
+    """Suma (dvx, dvy) a la velocidad de toda la molécula de seed, con tope.
+
+    Ni la molécula ni vel pasan por el host: sin lectura ni sync por frame.
+    """
+    n = flood_func(seed, queue)
+    for k in range(n):
+        i = queue[k]
+        v = vel[i] + ti.Vector([dvx, dvy])
+        speed = v.norm()
+        if speed > max_speed:
+            v *= max_speed / speed
+        vel[i] = v
+
+
 # ===================================================================
 # CARGAS PARCIALES
 # ===================================================================
 
+@ti.func
+def update_partial_charge_i(i: ti.i32):
+    """Carga parcial dinámica de una partícula (diferencia de electronegatividad)."""
+    if is_active[i]:
+        type_i = atom_types[i]
+        en_i = ELECTRONEG[type_i]
+        
+        q_accum = 0.0
+        
+        for k in range(num_enlaces[i]):
+            j = enlaces_idx[i, k]
+            if j >= 0:
+                type_j = atom_types[j]
+                en_j = ELECTRONEG[type_j]
+                q_accum += (en_j - en_i) * 0.1
+        
+        partial_charge[i] = q_accum
+
+
 @ti.kernel
 def update_partial_charges():
     """Calcula la carga parcial dinámica de cada átomo."""
     for i in range(MAX_PARTICLES):
-        if is_active[i]:
-            type_i = atom_types[i]
-            en_i = ELECTRONEG[type_i]
-            
-            q_accum = 0.0
-            
-            for k in range(num_enlaces[i]):
-                j = enlaces_idx[i, k]
-                if j >= 0:
-                    type_j = atom_types[j]
-                    en_j = ELECTRONEG[type_j]
-                    q_accum += (en_j - en_i) * 0.1
-            
-            partial_charge[i] = q_accum
+        update_partial_charge_i(i)
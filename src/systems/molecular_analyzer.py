@@ -9,7 +9,13 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
 import time
-import math
+import threading
+
+
+# Marcas de visitado para get_molecule_indices (uint8 por átomo, reutilizado):
+# un buffer por hilo (el detector corre en AsyncChemistryWorker y la
+# progresión en el hilo principal); se limpian solo los índices visitados.
+_visit_local = threading.local()
 
 
 @dataclass
@@ -69,17 +75,26 @@ class MolecularAnalyzer:
     @staticmethod
     def get_molecule_indices(start_idx, enlaces_idx, num_enlaces):
         """Standard graph traversal to find all atoms in a connected molecule."""
-        molecule = {start_idx}
-        queue = [start_idx]
-        while queue:
-            curr = queue.pop(0)
-            n_bonds = num_enlaces[curr]
-            for k in range(n_bonds):
-                neighbor = enlaces_idx[curr, k]
-                if neighbor >= 0 and neighbor not in molecule:
-                    molecule.add(neighbor)
-                    queue.append(neighbor)
-        return list(molecule)
+        flags = getattr(_visit_local, 'flags', None)
+        if flags is None or len(flags) < len(num_enlaces):
+            flags = _visit_local.flags = np.zeros(len(num_enlaces), dtype=np.uint8)
+        
+        # BFS por niveles: la lista hace de cola y de resultado
+        molecule = [int(start_idx)]
+        flags[start_idx] = 1
+        try:
+            head = 0
+            while head < len(molecule):
+                curr = molecule[head]
+                head += 1
+                for neighbor in enlaces_idx[curr, :num_enlaces[curr]].tolist():
+                    if neighbor >= 0 and not flags[neighbor]:
+                        flags[neighbor] = 1
+                        molecule.append(neighbor)
+        finally:
+            # También si el recorrido falla: la próxima llamada parte limpia
+            flags[molecule] = 0
+        return molecule
 
     @staticmethod
     def get_formula(indices, atom_types):
@@ -235,36 +250,34 @@ class MolecularAnalyzer:
         
     def _measure_bond_angles(self, indices: List[int], pos_np: np.ndarray, pos_z_np: np.ndarray,
                              enlaces_idx_np: np.ndarray, num_enlaces_np: np.ndarray) -> List[float]:
-        """Mide ángulos de enlace reales en 3D (Sistema 2.5D)."""
-        angles = []
-        
-        for i in indices:
-            n_bonds = num_enlaces_np[i]
-            if n_bonds >= 2:
-                p_center = np.array([pos_np[i][0], pos_np[i][1], pos_z_np[i]])
-                neighbors = []
-                
-                for b in range(n_bonds):
-                    j = enlaces_idx_np[i, b]
-                    if j >= 0:
-                        neighbors.append(j)
-                
-                # Calcular ángulos entre pares de vecinos en 3D
-                for a in range(len(neighbors)):
-                    for b in range(a + 1, len(neighbors)):
-                        j1, j2 = neighbors[a], neighbors[b]
-                        v1 = np.array([pos_np[j1][0], pos_np[j1][1], pos_z_np[j1]]) - p_center
-                        v2 = np.array([pos_np[j2][0], pos_np[j2][1], pos_z_np[j2]]) - p_center
-                        
-                        len1 = np.linalg.norm(v1)
-                        len2 = np.linalg.norm(v2)
-                        
-                        if len1 > 0.001 and len2 > 0.001:
-                            cos_angle = np.clip(np.dot(v1, v2) / (len1 * len2), -1.0, 1.0)
-                            angle_deg = math.degrees(math.acos(cos_angle))
-                            angles.append(angle_deg)
-                            
-        return angles
+        """Mide ángulos de enlace reales en 3D (Sistema 2.5D).
+
+        Vectorizado: bloque (k, MAX_VALENCE) de vecinos y los pares (a < b)
+        de columnas; mismo orden de salida que recorrer átomo por átomo.
+        """
+        idx = np.asarray(indices, dtype=np.int64)
+        if idx.size == 0:
+            return []
+        
+        # Vecinos válidos de cada átomo (enlaces compactos al inicio de la fila)
+        nb = enlaces_idx_np[idx]
+        valid = (np.arange(nb.shape[1]) < num_enlaces_np[idx, None]) & (nb >= 0)
+        nb = np.where(valid, nb, 0)
+        
+        # Vectores centro -> vecino en 3D (x, y de pos; z de pos_z)
+        v = np.empty(nb.shape + (3,), dtype=np.float64)
+        v[..., 0:2] = pos_np[nb] - pos_np[idx, None]
+        v[..., 2] = pos_z_np[nb] - pos_z_np[idx, None]
+        lens = np.sqrt(np.einsum('kvc,kvc->kv', v, v))
+        
+        # Pares de vecinos (a, b) con a < b, en orden lexicográfico
+        ia, ib = np.triu_indices(nb.shape[1], 1)
+        ok = valid[:, ia] & valid[:, ib] & (lens[:, ia] > 0.001) & (lens[:, ib] > 0.001)
+        if not ok.any():
+            return []
+        dots = np.einsum('kpc,kpc->kp', v[:, ia], v[:, ib])[ok]
+        cos_angle = np.clip(dots / (lens[:, ia][ok] * lens[:, ib][ok]), -1.0, 1.0)
+        return np.degrees(np.arccos(cos_angle)).tolist()
         
     def _detect_changes(self, current: Dict[int, MoleculeSnapshot]) -> Tuple[List[str], List[str]]:
         """Detecta moléculas formadas y destruidas."""
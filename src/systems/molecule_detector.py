@@ -45,25 +45,26 @@ class MoleculeDetector:
         El GPU ya ejecutó reset_molecule_ids() + propagate_molecule_ids_step().
         Solo necesitamos agrupar por ID y calcular fórmulas.
         """
-        from collections import defaultdict
-        
-        # 1. Agrupar partículas por molecule_id (O(N) lineal)
-        molecules = defaultdict(list)
-        for i in range(n_particles):
-            if num_enlaces_np[i] > 0:  # Solo partículas con enlaces
-                mid = molecule_id_np[i]
-                if mid >= 0:  # Include ID=0 (player often has index 0)
-                    molecules[mid].append(i)
+        # 1. Agrupar partículas por molecule_id con NumPy (sin bucle por átomo)
+        # Solo partículas con enlaces; incluye ID=0 (el jugador suele ser el índice 0)
+        mol_ids = molecule_id_np[:n_particles]
+        bonded = np.flatnonzero((num_enlaces_np[:n_particles] > 0) & (mol_ids >= 0))
+        # Orden estable: dentro de cada grupo los índices quedan ascendentes
+        members = bonded[np.argsort(mol_ids[bonded], kind='stable')]
+        sorted_ids = mol_ids[members]
+        starts = np.flatnonzero(np.diff(sorted_ids, prepend=sorted_ids[:1] - 1))
+        ends = np.append(starts[1:], len(members))
+        # Solo moléculas de 2+ átomos, en orden de primera aparición (como antes)
+        keep = np.flatnonzero(ends - starts >= 2)
+        keep = keep[np.argsort(members[starts[keep]])]
+        members = members.tolist()
         
         # 2. Procesar cada molécula
         current_scan_formulas = {}
         
-        for mid, indices in molecules.items():
-            if len(indices) < 2:
-                continue
-            
+        for start, end in zip(starts[keep].tolist(), ends[keep].tolist()):
             # 2.1 Caching Check: Hashing composition
-            indices.sort()
+            indices = members[start:end]
             comp_key = tuple(indices)
             
             formula = ""
@@ -97,9 +97,8 @@ class ProgressionManager:
         analyzer = get_molecular_analyzer()
         
         try:
-            enl_np = sim['enlaces_idx'].to_numpy()
-            num_np = sim['num_enlaces'].to_numpy()
-            types_np = sim['atom_types'].to_numpy()
+            enl_np, num_np = self.ctx.get_bonds_host()
+            types_np = self.ctx.get_atom_types_host()
         except:
             return
 
@@ -32,10 +32,8 @@ from src.systems.chemistry_kernels import (
     apply_vsepr_geometry_i,
     check_bonding_func_single,
     compute_depth_z_i,
-    update_partial_charges,
-    reset_molecule_ids, propagate_molecule_ids_step,
-    apply_dihedral_forces_gpu
 )
+from src.systems.chemistry import apply_dihedral_forces_i, update_partial_charge_i, refresh_molecule_ids
 
 # Campos Taichi
 from src.systems.taichi_fields import (
@@ -55,6 +53,8 @@ from src.systems.taichi_fields import (
     # Grid espacial
     grid_count, grid_pids, sim_bounds,
     visible_indices, n_visible,
+    SFC_BITS, SFC_SIDE, SFC_CELLS, SFC_BLOCK,
+    sfc_cell_count, sfc_block_sum, sfc_cell, sfc_rank, visible_sorted,
     
     # Contadores
     active_particles_count, total_bonds_count,
@@ -65,7 +65,7 @@ from src.systems.taichi_fields import (
     world_width, world_height,
     dist_equilibrio, spring_k, damping,
     rango_enlace_min, rango_enlace_max, dist_rotura, max_fuerza,
-    prob_enlace_base, click_force, click_radius,
+    prob_enlace_base, click_force, click_radius, pick_dist_sq, pick_idx,
     charge_factor,
     medium_type, medium_viscosity, medium_polarity
 )
@@ -80,8 +80,6 @@ from src.renderer.opengl_kernels import (
     prepare_highlights,
     highlight_pos,
     highlight_col,
-    border_vertices,
-    screen_box_vertices,
     bond_vertices,
     update_borders_gl
 )
@@ -106,10 +104,15 @@ def update_grid_i(i: ti.i32):
                 grid_pids[gx, gy, idx] = i
         
         # 2. CULLING: Para render
-        if (sim_bounds[0] < p.x < sim_bounds[2] and sim_bounds[1] < p.y < sim_bounds[3]):
-            vis_idx = ti.atomic_add(n_visible[None], 1)
-            if vis_idx < MAX_PARTICLES:
-                visible_indices[vis_idx] = i
+        cull_visible_i(i, p)
+
+@ti.func
+def cull_visible_i(i: ti.i32, p):
+    """Agrega i a visible_indices si p cae dentro de sim_bounds."""
+    if (sim_bounds[0] < p.x < sim_bounds[2] and sim_bounds[1] < p.y < sim_bounds[3]):
+        vis_idx = ti.atomic_add(n_visible[None], 1)
+        if vis_idx < MAX_PARTICLES:
+            visible_indices[vis_idx] = i
 
 @ti.kernel
 def update_grid():
@@ -118,6 +121,74 @@ def update_grid():
     for i in range(n_particles[None]):
         update_grid_i(i)
 
+@ti.kernel
+def update_visible():
+    """Solo culling: con las posiciones congeladas el grid no cambia."""
+    n_visible[None] = 0
+    for i in range(n_particles[None]):
+        if is_active[i]:
+            cull_visible_i(i, pos[i])
+
+
+@ti.func
+def morton_2d(x: ti.i32, y: ti.i32) -> ti.i32:
+    """Entrelaza los bits de (x, y) en un código Morton (Z-order)."""
+    code = 0
+    for b in ti.static(range(SFC_BITS)):
+        code |= ((x >> b) & 1) << (2 * b)
+        code |= ((y >> b) & 1) << (2 * b + 1)
+    return code
+
+@ti.kernel
+def sort_visible_by_cell():
+    """Reordena visible_indices por celda Morton (counting sort por celda).
+
+    Así átomos vecinos en pantalla quedan contiguos en la lista visible y los
+    kernels de render (enlaces, compactado) leen pos/enlaces_idx con localidad.
+    """
+    n_vis = ti.min(n_visible[None], MAX_PARTICLES)
+    min_x, min_y = sim_bounds[0], sim_bounds[1]
+    inv_w = SFC_SIDE / ti.max(sim_bounds[2] - min_x, 1e-3)
+    inv_h = SFC_SIDE / ti.max(sim_bounds[3] - min_y, 1e-3)
+    
+    for c in range(SFC_CELLS):
+        sfc_cell_count[c] = 0
+    
+    # Pasada 1: celda Morton de cada visible + rango dentro de su celda
+    for vi in range(n_vis):
+        p = pos[visible_indices[vi]]
+        cx = ti.min(ti.max(int((p.x - min_x) * inv_w), 0), SFC_SIDE - 1)
+        cy = ti.min(ti.max(int((p.y - min_y) * inv_h), 0), SFC_SIDE - 1)
+        c = morton_2d(cx, cy)
+        sfc_cell[vi] = c
+        sfc_rank[vi] = ti.atomic_add(sfc_cell_count[c], 1)
+    
+    # Scan exclusivo por bloque de celdas (paralelo entre bloques)
+    for blk in range(SFC_CELLS // SFC_BLOCK):
+        acc = 0
+        for c in range(blk * SFC_BLOCK, (blk + 1) * SFC_BLOCK):
+            cnt = sfc_cell_count[c]
+            sfc_cell_count[c] = acc
+            acc += cnt
+        sfc_block_sum[blk] = acc
+    
+    # Scan inclusivo de los totales por bloque (pocos elementos, serial)
+    ti.loop_config(serialize=True)
+    for blk in range(1, SFC_CELLS // SFC_BLOCK):
+        sfc_block_sum[blk] += sfc_block_sum[blk - 1]
+    
+    # Pasada 2: scatter a la posición ordenada y copia de vuelta
+    for vi in range(n_vis):
+        c = sfc_cell[vi]
+        blk = c // SFC_BLOCK
+        base = 0
+        if blk > 0:
+            base = sfc_block_sum[blk - 1]
+        dst = base + sfc_cell_count[c] + sfc_rank[vi]
+        visible_sorted[dst] = visible_indices[vi]
+    for vi in range(n_vis):
+        visible_indices[vi] = visible_sorted[vi]
+
 
 @ti.kernel
 def count_active_particles_gpu():
@@ -138,9 +209,48 @@ def update_grid_orchestrator():
     update_grid()
 
 
+def refresh_visible():
+    """Lista visible sin simular (pausa + cámara movida): culling y orden Morton."""
+    update_visible()
+    sort_visible_by_cell()
+
+
 # Global Frame Counter for Interleaving
 sim_frame_counter = 0
 
+# Host-shadow de escalares leídos por frame: [n_particles, temperature]
+# Un solo kernel + una copia en lugar de una lectura [None] (sync) por escalar
+_host_scalars = np.empty(2, dtype=np.float32)
+
+# Parámetros escalares de simulación subidos en bloque desde el host.
+# El orden de SIM_PARAM_NAMES define el índice en el array empaquetado.
+SIM_PARAM_NAMES = (
+    'gravity', 'friction', 'temperature', 'max_speed',
+    'world_width', 'world_height',
+    'dist_equilibrio', 'spring_k', 'damping',
+    'rango_enlace_min', 'rango_enlace_max', 'dist_rotura', 'max_fuerza',
+    'prob_enlace_base', 'click_force', 'click_radius',
+)
+_SIM_PARAM_FIELDS = (
+    gravity, friction, temperature, max_speed,
+    world_width, world_height,
+    dist_equilibrio, spring_k, damping,
+    rango_enlace_min, rango_enlace_max, dist_rotura, max_fuerza,
+    prob_enlace_base, click_force, click_radius,
+)
+
+@ti.kernel
+def upload_sim_params(src: ti.types.ndarray()):
+    """Escribe todos los parámetros escalares en 1 launch (vs 1 escritura [None] por campo)."""
+    for k in ti.static(range(len(_SIM_PARAM_FIELDS))):
+        _SIM_PARAM_FIELDS[k][None] = src[k]
+
+@ti.kernel
+def snapshot_sim_scalars(dst: ti.types.ndarray()):
+    """Copia los escalares de control del orquestador al buffer host."""
+    dst[0] = ti.cast(n_particles[None], ti.f32)
+    dst[1] = temperature[None]
+
 @ti.kernel
 def kernel_pre_step_fused():
     """Fusión O(N): Pre-paso + Actualización de Grid."""
@@ -151,20 +261,72 @@ def kernel_pre_step_fused():
         physics_pre_step_i(i)
         update_grid_i(i)
 
-@ti.kernel
-def kernel_resolve_constraints():
-    """Fusión O(N): Colisiones + Fuerzas de Enlace + Geometría VSEPR + Profundidad 2.5D."""
+@ti.func
+def pre_step_chem_func():
+    """Pre-paso + Grid, Torsiones y Cargas UFF (loops de nivel superior).
+
+    Los loops de nivel superior de un kernel se ejecutan en orden, así que
+    torsiones/cargas siguen viendo las posiciones ya integradas del pre-paso.
+    """
+    grid_count.fill(0)
+    n_visible[None] = 0
+    n_simulated_physics[None] = 0
+    for i in range(n_particles[None]):
+        physics_pre_step_i(i)
+        update_grid_i(i)
+    for i in range(n_particles[None]):
+        if is_active[i]:
+            apply_dihedral_forces_i(i)
+    for i in range(MAX_PARTICLES):
+        update_partial_charge_i(i)
+
+@ti.func
+def resolve_constraints_func():
+    """Colisiones + Fuerzas de Enlace + Geometría VSEPR + Profundidad 2.5D."""
     for i in range(n_particles[None]):
         resolve_constraints_grid_i(i)
         apply_bond_forces_i(i)
         apply_vsepr_geometry_i(i)  # VSEPR: Mantener ángulos de enlace
         compute_depth_z_i(i)       # 2.5D: Calcular profundidad visual
 
+@ti.func
+def post_step_func(t_total: ti.f32, run_advanced: ti.i32):
+    """Post-paso (velocidad) + Efectos Especiales."""
+    for i in range(n_particles[None]):
+        physics_post_step_i(i, t_total, run_advanced)
+
+@ti.kernel
+def kernel_pre_step_chem_fused():
+    """Pre-paso + Grid, Torsiones y Cargas UFF en un solo launch."""
+    pre_step_chem_func()
+
+@ti.kernel
+def kernel_resolve_constraints():
+    """Fusión O(N): Colisiones + Fuerzas de Enlace + Geometría VSEPR + Profundidad 2.5D."""
+    resolve_constraints_func()
+
+@ti.kernel
+def kernel_resolve_constraints_n(n_iters: ti.template()):
+    """n_iters iteraciones del solver en 1 launch (desenrolladas con ti.static)."""
+    for _ in ti.static(range(n_iters)):
+        resolve_constraints_func()
+
 @ti.kernel
 def kernel_post_step_fused(t_total: ti.f32, run_advanced: ti.i32):
     """Fusión O(N): Post-paso (velocidad) + Efectos Especiales."""
-    for i in range(n_particles[None]):
-        physics_post_step_i(i, t_total, run_advanced)
+    post_step_func(t_total, run_advanced)
+
+@ti.kernel
+def kernel_substep_fused(t_total: ti.f32, run_advanced: ti.i32):
+    """Sub-paso completo en 1 launch: Pre + Solver (M iteraciones) + Post.
+
+    ti.static desenrolla las M iteraciones del solver en loops de nivel
+    superior: cada una sigue viendo las posiciones de la anterior.
+    """
+    pre_step_chem_func()
+    for _ in ti.static(range(SOLVER_ITERATIONS)):
+        resolve_constraints_func()
+    post_step_func(t_total, run_advanced)
 
 @ti.kernel
 def kernel_bonding():
@@ -188,6 +350,37 @@ def init_molecule_ids():
             needs_propagate[i] = 0
 
 
+# Pasos de flood fill por refresco de IDs de molécula
+MOLECULE_ID_ITERATIONS = 8
+
+
+def _first_substep_debug(t_total: float, run_advanced: bool):
+    """Sub-paso del primer frame en etapas separadas, con prints de bonding."""
+    # 1. Pre + Grid + Torsiones (Diedros) + Cargas Dinámicas (UFF) (1 Dispatch)
+    # Torsiones antes del solver para que afecten velocidades;
+    # cargas para electrostática y Puentes de Hidrógeno
+    kernel_pre_step_chem_fused()
+    
+    # DEBUG: Test bonding immediately after grid population
+    print(f"[DEBUG] Testing bonding IMMEDIATELY after grid pop...")
+    from src.systems.taichi_fields import debug_particles_checked, debug_neighbors_found, debug_distance_passed, debug_prob_passed
+    debug_particles_checked[None] = 0
+    debug_neighbors_found[None] = 0
+    debug_distance_passed[None] = 0
+    debug_prob_passed[None] = 0
+    kernel_bonding()
+    ti.sync()
+    print(f"[EARLY BONDING] particles_checked={debug_particles_checked[None]}, prob_passed={debug_prob_passed[None]}")
+    print(f"[EARLY BONDING] neighbors_found={debug_neighbors_found[None]}, distance_passed={debug_distance_passed[None]}")
+    print(f"[EARLY BONDING] total_bonds={total_bonds_count[None]}")
+    
+    # 2. Solver (M iteraciones en 1 Dispatch)
+    kernel_resolve_constraints_n(SOLVER_ITERATIONS)
+        
+    # 3. Post (1 Dispatch - Fusión Total: Física + Reglas Avanzadas)
+    kernel_post_step_fused(t_total, 1 if run_advanced else 0)
+
+
 def simulation_step_gpu(steps: int = 1):
     """
     Orquestador estable y optimizado.
@@ -197,7 +390,10 @@ def simulation_step_gpu(steps: int = 1):
     
     perf = get_perf_logger()
     
-    if n_particles[None] == 0:
+    snapshot_sim_scalars(_host_scalars)
+    n_part = int(_host_scalars[0])
+    
+    if n_part == 0:
         # Nuclear fallback for stress test sterility
         n_particles[None] = 5000 
         for i in range(5000): is_active[i] = 1
@@ -205,7 +401,7 @@ def simulation_step_gpu(steps: int = 1):
 
     # DEBUG: Print every 1000 frames (reduced from 100)
     if sim_frame_counter % 1000 == 0:
-        print(f"[SIM DEBUG] Frame {sim_frame_counter} | n_particles={n_particles[None]} | steps={steps}")
+        print(f"[SIM DEBUG] Frame {sim_frame_counter} | n_particles={n_part} | steps={steps}")
         print(f"[SIM DEBUG] sim_bounds={sim_bounds[0]}, {sim_bounds[1]}, {sim_bounds[2]}, {sim_bounds[3]}")
         print(f"[SIM DEBUG] grid_count sum={grid_count.to_numpy().sum()} | n_simulated={n_simulated_physics[None]}")
 
@@ -224,39 +420,17 @@ def simulation_step_gpu(steps: int = 1):
         medium_polarity[None] = MEDIUM_POLARITY_DEFAULT
         print(f"[INIT] Medium set to WATER (V={medium_viscosity[None]}, P={medium_polarity[None]})")
 
+    # Temperatura leída una vez por frame (host-shadow), no en cada paso
+    from src.systems.physics_constants import BROWNIAN_BASE_TEMP
+    t_total = BROWNIAN_BASE_TEMP + float(_host_scalars[1])
+    
     for _ in range(steps):
-        # 1. Pre + Grid (1 Dispatch)
-        kernel_pre_step_fused()
-        
-        # 1b. Torsiones (Diedros) - Antes del solver para que afecten velocidades
-        apply_dihedral_forces_gpu()
-        
-        # 1c. Cargas Dinámicas (UFF) - Para electrostática y Puentes de Hidrógeno
-        update_partial_charges()
-        
-        # DEBUG: Test bonding immediately after grid population
-        if sim_frame_counter == 1:
-            print(f"[DEBUG] Testing bonding IMMEDIATELY after grid pop...")
-            from src.systems.taichi_fields import debug_particles_checked, debug_neighbors_found, debug_distance_passed, debug_prob_passed
-            debug_particles_checked[None] = 0
-            debug_neighbors_found[None] = 0
-            debug_distance_passed[None] = 0
-            debug_prob_passed[None] = 0
-            kernel_bonding()
-            ti.sync()
-            print(f"[EARLY BONDING] particles_checked={debug_particles_checked[None]}, prob_passed={debug_prob_passed[None]}")
-            print(f"[EARLY BONDING] neighbors_found={debug_neighbors_found[None]}, distance_passed={debug_distance_passed[None]}")
-            print(f"[EARLY BONDING] total_bonds={total_bonds_count[None]}")
-        
-        # 2. Solver (M Dispatches - Necesarios para sincronización global)
-        # Nota: Aquí sí lanzamos M veces para que los partículas vean posiciones actualizadas
-        for _ in range(SOLVER_ITERATIONS):
-            kernel_resolve_constraints()
-            
-        # 3. Post (1 Dispatch - Fusión Total: Física + Reglas Avanzadas)
-        from src.systems.physics_constants import BROWNIAN_BASE_TEMP
-        t_total = BROWNIAN_BASE_TEMP + temperature[None]
-        kernel_post_step_fused(t_total, 1 if run_advanced else 0)
+        if sim_frame_counter != 1:
+            # 1-3. Pre + Torsiones + Cargas, Solver y Post (1 Dispatch por sub-paso)
+            kernel_substep_fused(t_total, 1 if run_advanced else 0)
+        else:
+            # Primer frame: etapas separadas para el diagnóstico de bonding
+            _first_substep_debug(t_total, run_advanced)
         
         # 4. Química (1 Dispatch ocasional)
         
@@ -286,11 +460,8 @@ def simulation_step_gpu(steps: int = 1):
         # OPTIMIZATION: Temporal Interleaving (Run every 4 frames)
         # OPTIMIZATION v2: Reduced from 16 to 8 iterations (~50% faster)
         if sim_frame_counter % 4 == 0:
-            reset_molecule_ids()
-            
-            # 8 iterations is enough for most molecule sizes
-            for _ in range(8):
-                 propagate_molecule_ids_step()
+            # Reset + 8 iteraciones (suficiente para la mayoría) en 1 Dispatch
+            refresh_molecule_ids(MOLECULE_ID_ITERATIONS)
         
         # DEBUG: Print bonding parameters on first step
         if sim_frame_counter == 1:
@@ -307,6 +478,9 @@ def simulation_step_gpu(steps: int = 1):
             print(f"[BONDING DEBUG] neighbors_found={debug_neighbors_found[None]}")
             print(f"[BONDING DEBUG] distance_passed={debug_distance_passed[None]}")
             print(f"[BONDING DEBUG] prob_passed={debug_prob_passed[None]}")
+    
+    # 6. Lista visible en orden espacial (Morton) para los kernels de render
+    sort_visible_by_cell()
     perf.stop("physics")
 
 
@@ -324,6 +498,34 @@ def apply_force_pulse(center_x: ti.f32, center_y: ti.f32, power_mult: ti.f32):
                 vel[i] += diff.normalized() * strength
 
 
+@ti.kernel
+def pick_nearest_atom(wx: ti.f32, wy: ti.f32, exclude_idx: ti.i32, max_dist_sq: ti.f32) -> ti.i32:
+    """Picking en GPU: átomo activo más cercano a (wx, wy) dentro del radio (-1 si no hay)."""
+    target = ti.Vector([wx, wy])
+    pick_dist_sq[None] = max_dist_sq
+    pick_idx[None] = MAX_PARTICLES
+    
+    # Pasada 1: distancia² mínima (reducción atómica)
+    for i in range(n_particles[None]):
+        if is_active[i] and i != exclude_idx:
+            d = pos[i] - target
+            ti.atomic_min(pick_dist_sq[None], d.dot(d))
+    
+    # Pasada 2: menor índice que alcanza ese mínimo (desempate determinista)
+    best = pick_dist_sq[None]
+    for i in range(n_particles[None]):
+        if is_active[i] and i != exclude_idx:
+            d = pos[i] - target
+            dd = d.dot(d)
+            if dd == best and dd < max_dist_sq:
+                ti.atomic_min(pick_idx[None], i)
+    
+    result = pick_idx[None]
+    if result == MAX_PARTICLES:
+        result = -1
+    return result
+
+
 def run_simulation_fast(n_steps: int):
     """
     Ejecuta la simulación optimizada (El kernel ya maneja los pasos).
@@ -121,6 +121,8 @@ molecule_id = ti.field(dtype=ti.i32, shape=MAX_PARTICLES)
 next_molecule_id = ti.field(dtype=ti.i32, shape=())
 # Flag para indicar qué partículas necesitan propagar su ID
 needs_propagate = ti.field(dtype=ti.i32, shape=MAX_PARTICLES)
+# Máscara de pertenencia para la BFS de selección (1 = en la molécula)
+mol_mask = ti.field(dtype=ti.i32, shape=MAX_PARTICLES)
 
 # ===================================================================
 # CAMPOS TAICHI - GRID ESPACIAL
@@ -133,6 +135,18 @@ sim_bounds = ti.field(dtype=ti.f32, shape=4)  # [min_x, min_y, max_x, max_y]
 visible_indices = ti.field(dtype=ti.i32, shape=MAX_PARTICLES)
 n_visible = ti.field(dtype=ti.i32, shape=())
 
+# Orden espacial (Morton / Z-order) de la lista visible: SFC_SIDE x SFC_SIDE
+# celdas sobre sim_bounds, ordenadas por conteo en bloques de SFC_BLOCK celdas
+SFC_BITS = 6
+SFC_SIDE = 1 << SFC_BITS
+SFC_CELLS = SFC_SIDE * SFC_SIDE
+SFC_BLOCK = 64
+sfc_cell_count = ti.field(dtype=ti.i32, shape=SFC_CELLS)
+sfc_block_sum = ti.field(dtype=ti.i32, shape=SFC_CELLS // SFC_BLOCK)
+sfc_cell = ti.field(dtype=ti.i32, shape=MAX_PARTICLES)
+sfc_rank = ti.field(dtype=ti.i32, shape=MAX_PARTICLES)
+visible_sorted = ti.field(dtype=ti.i32, shape=MAX_PARTICLES)
+
 # ===================================================================
 # CAMPOS TAICHI - CONTADORES
 # ===================================================================
@@ -143,6 +157,10 @@ total_mutations = ti.field(dtype=ti.i32, shape=())
 total_tunnels = ti.field(dtype=ti.i32, shape=())
 n_simulated_physics = ti.field(dtype=ti.i32, shape=()) # Counter for actual physics computations
 total_bonds_broken_dist = ti.field(dtype=ti.i32, shape=()) # Counter: Breakage by distance
+# Topología de enlaces: los kernels marcan bonds_dirty al crear/romper un enlace;
+# compact_render_data lo pliega en bonds_epoch (exportado en stats[10])
+bonds_dirty = ti.field(dtype=ti.i32, shape=())
+bonds_epoch = ti.field(dtype=ti.i32, shape=())
 
 # ===================================================================
 # CAMPOS TAICHI - JUGADOR
@@ -178,6 +196,9 @@ medium_polarity = ti.field(dtype=ti.f32, shape=())
 # Interacción (click/poderes)
 click_force = ti.field(dtype=ti.f32, shape=())
 click_radius = ti.field(dtype=ti.f32, shape=())
+# Picking en GPU: distancia² mínima e índice ganador del último click
+pick_dist_sq = ti.field(dtype=ti.f32, shape=())
+pick_idx = ti.field(dtype=ti.i32, shape=())
 
 # DEBUG: Bond formation counters
 debug_particles_checked = ti.field(dtype=ti.i32, shape=())
@@ -49,6 +49,16 @@ class ZoneManager:
                 return zone
         return None
 
+    def get_zone_indices(self, positions: np.ndarray) -> np.ndarray:
+        """Versión vectorizada de get_zone_at: índice en self.zones por posición (-1 = ninguna)."""
+        idx = np.full(len(positions), -1, dtype=np.int32)
+        # Orden inverso: la primera zona que contiene la posición prevalece
+        for z in range(len(self.zones) - 1, -1, -1):
+            zone = self.zones[z]
+            dist_sq = np.sum((positions - zone.pos)**2, axis=1)
+            idx[dist_sq < zone.radius**2] = z
+        return idx
+
     def is_in_clay(self, particle_pos: np.ndarray) -> bool:
         zone = self.get_zone_at(particle_pos)
         return zone is not None and zone.type == ZoneType.CLAY
@@ -40,67 +40,56 @@ def draw_atom_labels(pos_data, type_data, visible_indices_field,
     pos_subset = pos_data[start_idx:]
     type_subset = type_data[start_idx:].flatten()
     
-    # World -> NDC
-    # ndc_x = (wx - cx) / vis_w_half
-    # ndc_y = (wy - cy) / vis_h_half
-    ndc_x = (pos_subset[:, 0] - cx) / vis_w_half
-    ndc_y = (pos_subset[:, 1] - cy) / vis_h_half
+    # World -> Screen en una sola pasada (n, 2) sobre un buffer persistente:
+    # screen = pos * k + b, con k = 0.5 * win / vis_half y b = 0.5 * win - c * k
+    # (Y sin invertir: el shader ya invierte Y)
+    global _screen_buf
+    if len(_screen_buf) < n_limit:
+        _screen_buf = np.empty((max(n_limit, 2 * len(_screen_buf)), 2), dtype=np.float32)
+    screen = _screen_buf[:n_limit]
+    kx = 0.5 * win_w / vis_w_half
+    ky = 0.5 * win_h / vis_h_half
+    np.multiply(pos_subset, (kx, ky), out=screen)
+    np.add(screen, (0.5 * win_w - cx * kx, 0.5 * win_h - cy * ky), out=screen)
     
-    # NDC -> Screen
-    # screen_x = (ndc_x * 0.5 + 0.5) * win_w
-    # screen_y = (ndc_y * 0.5 + 0.5) * win_h  <-- Fixed Y direction (Shader flips Y)
-    screen_x = (ndc_x * 0.5 + 0.5) * win_w
-    screen_y = (ndc_y * 0.5 + 0.5) * win_h
+    # Culling de pantalla estricto (no dibujar si está fuera de UI), vectorizado
+    on_screen = np.flatnonzero((screen[:, 0] >= 0) & (screen[:, 0] <= win_w) &
+                               (screen[:, 1] >= 0) & (screen[:, 1] <= win_h))
+    if len(on_screen) == 0:
+        return
     
     draw_list = imgui.get_background_draw_list()
     alpha_int = int(alpha * 255)
+    styles = _label_styles(alpha_int)
+    shadow_col = imgui.IM_COL32(0, 0, 0, int(alpha_int * 0.8))
     
-    # Pre-fetch colors and symbols to avoid dict lookup in loop inside ImGui calls
-    # optimization: cache dictionary lookups
-    # (Optional constraint: If ImGui calls are slow, consider batching text? No easy way in immediate mode)
-
-    padding = 2.0
-    half_pad = padding * 0.5
-    bg_col = imgui.IM_COL32(0, 0, 0, 180)
-    
-    for i in range(n_limit):
-        sx, sy = screen_x[i], screen_y[i]
-        
-        # Culling de pantalla estricto (no dibujar si está fuera de UI)
-        if sx < 0 or sx > win_w or sy < 0 or sy > win_h:
-            continue
-            
-        # Get atom type from synced array (fixes Z-sort mismatch)
-        atom_idx = int(type_subset[i])
-        symbol = cfg.TIPOS_NOMBRES[atom_idx]
-        
-        # Color del elemento
-        info = cfg.ATOMS[symbol]
-        lc = info.get('label_color', [255, 255, 255])
-        text_col = imgui.IM_COL32(int(lc[0]), int(lc[1]), int(lc[2]), alpha_int)
-        shadow_col = imgui.IM_COL32(0, 0, 0, int(alpha_int * 0.8))
-        
-        # Center Text
-        # Approximation: Font height is roughly 13px. Width varies.
-        # ImGui calc_text_size is expensive in loop? 
-        # For single char symbols (H, C, N, O), width is mostly constant.
-        # Let's assume w=8, h=13 for perf? Or call calc_text_size.
-        # Let's call calc_text_size for correctness but be aware.
-        # Optimization: cache size per symbol?
-        
-        txt_w = 12.0 if len(symbol) > 1 else 8.0 # Heurisitc for labels
-        txt_h = 14.0
-        
+    # Centro del texto: fuente ~14px de alto, ancho fijo por símbolo
+    # (8px una letra, 12px dos) en vez de calc_text_size por etiqueta
+    txt_h = 14.0
+    for (sx, sy), atom_idx in zip(screen[on_screen].tolist(),
+                                  type_subset[on_screen].astype(np.int64).tolist()):
+        symbol, text_col, txt_w = styles[atom_idx]
         tx = sx - txt_w * 0.5
         ty = sy - txt_h * 0.5
-        
-        # Draw Background - REMOVED for transparency as requested
-        # draw_list.add_rect_filled(
-        #     (tx - padding, ty - padding),
-        #     (tx + txt_w + padding, ty + txt_h + padding),
-        #     bg_col, 3.0
-        # )
-        
-        # Draw Text
         draw_list.add_text((tx + 1, ty + 1), shadow_col, symbol)
         draw_list.add_text((tx, ty), text_col, symbol)
+
+
+# Buffer reutilizado para las coordenadas de pantalla (crece si hace falta)
+_screen_buf = np.empty((0, 2), dtype=np.float32)
+
+# (símbolo, color, ancho) por tipo de átomo, por valor de alpha
+_style_cache = {}
+
+
+def _label_styles(alpha_int: int) -> list:
+    """Símbolo, color de texto y ancho estimado por tipo (cacheado por alpha)."""
+    styles = _style_cache.get(alpha_int)
+    if styles is None:
+        styles = []
+        for symbol in cfg.TIPOS_NOMBRES:
+            lc = cfg.ATOMS[symbol].get('label_color', [255, 255, 255])
+            text_col = imgui.IM_COL32(int(lc[0]), int(lc[1]), int(lc[2]), alpha_int)
+            styles.append((symbol, text_col, 12.0 if len(symbol) > 1 else 8.0))
+        _style_cache[alpha_int] = styles
+    return styles
@@ -62,21 +62,20 @@ def _draw_physics_section(physics_controls: dict, panel_w: float):
     if imgui.collapsing_header("PROPIEDADES FÍSICAS", imgui.TreeNodeFlags_.default_open):
         imgui.push_item_width(panel_w * 0.6)
         
-        gravity = physics_controls['gravity']
-        friction = physics_controls['friction']
-        temperature = physics_controls['temperature']
-        
-        changed_g, new_g = imgui.slider_float("Gravedad", gravity[None], -10.0, 10.0, "%.3f")
+        # Los sliders editan la config; AppContext.sync_to_gpu sube los cambios
+        # en bloque (sin leer ni escribir campos GPU escalar a escalar)
+        sc = cfg.sim_config
+        changed_g, new_g = imgui.slider_float("Gravedad", sc.GRAVITY, -10.0, 10.0, "%.3f")
         if changed_g: 
-            gravity[None] = new_g
+            sc.GRAVITY = new_g
         
-        changed_f, new_f = imgui.slider_float("Fricción", friction[None], 0.8, 1.0, "%.3f")
+        changed_f, new_f = imgui.slider_float("Fricción", sc.FRICTION, 0.8, 1.0, "%.3f")
         if changed_f: 
-            friction[None] = new_f
+            sc.FRICTION = new_f
         
-        changed_t, new_t = imgui.slider_float("Agitación", temperature[None], 0.0, 1.0, "%.3f")
+        changed_t, new_t = imgui.slider_float("Agitación", sc.TEMPERATURE, 0.0, 1.0, "%.3f")
         if changed_t: 
-            temperature[None] = new_t
+            sc.TEMPERATURE = new_t
         
         imgui.pop_item_width()
 
@@ -88,9 +87,6 @@ def _draw_world_section(state, physics_controls: dict, panel_w: float):
     changed_real, val_real = imgui.checkbox("Modo Realismo (Científico)", cfg.sim_config.REALISM_MODE)
     if changed_real:
         cfg.sim_config.toggle_realism()
-        # Sincronizar cambios inmediatos a la GPU
-        physics_controls['prob_enlace_base'][None] = cfg.sim_config.PROB_ENLACE_BASE
-        physics_controls['rango_enlace_max'][None] = cfg.sim_config.RANGO_ENLACE_MAX
-        physics_controls['dist_rotura'][None] = cfg.sim_config.DIST_ROTURA
+        # Los nuevos valores llegan a la GPU en el próximo sync_to_gpu
         print(f"[UI] Modo Realismo: {'ON' if cfg.sim_config.REALISM_MODE else 'OFF'}")
 
@@ -4,6 +4,7 @@ Molecular Analysis Panel - Panel de UI para estadísticas moleculares
 Muestra estadísticas en tiempo real de formación, estabilidad y ángulos.
 """
 
+import numpy as np
 from imgui_bundle import imgui
 from src.systems.molecular_analyzer import get_molecular_analyzer
 from src.config.molecules import get_molecule_name
@@ -22,8 +23,10 @@ def draw_molecular_analysis_panel(state, visible: bool = True):
     if not visible:
         return
         
-    analyzer = get_molecular_analyzer()
-    summary = analyzer.get_summary()
+    # Resumen publicado por AsyncAnalysisWorker (None antes del primer tick)
+    summary = state.analysis_result
+    if summary is None:
+        summary = get_molecular_analyzer().get_summary()
     
     # Posicionar en la esquina izquierda, debajo del panel de control
     panel_w = 280
@@ -122,7 +125,20 @@ def run_molecular_analysis_tick(state):
     """
     Ejecuta el análisis molecular cada N frames.
     Debe llamarse desde el loop principal.
+
+    El análisis corre en AsyncAnalysisWorker: aquí solo se toma el snapshot
+    y se recoge el último resumen, que queda en state.analysis_result.
     """
+    from src.systems.async_analysis import get_async_analysis_worker
+    worker = get_async_analysis_worker()
+    
+    # Recoger resultado del worker (non-blocking)
+    result = worker.get_result()
+    if result is not None:
+        state.analysis_result = result['summary']
+        # Después del análisis, verificar misiones del jugador (Evento)
+        state.progression.check_mission()
+    
     # Solo analizar cada 30 frames para no impactar performance
     if not hasattr(state, '_mol_analysis_counter'):
         state._mol_analysis_counter = 0
@@ -132,24 +148,29 @@ def run_molecular_analysis_tick(state):
     if state._mol_analysis_counter >= 30:
         state._mol_analysis_counter = 0
         
-        # Obtener datos necesarios de la simulación
-        if hasattr(state, 'sim') and state.sim:
-            try:
-                pos_np = state.gpu['pos'].to_numpy()
-                pos_z_np = state.sim['pos_z'].to_numpy()
-                atom_types_np = state.sim['atom_types'].to_numpy()
-                enlaces_idx_np = state.sim['enlaces_idx'].to_numpy()
-                num_enlaces_np = state.sim['num_enlaces'].to_numpy()
-                molecule_id_np = state.sim['molecule_id'].to_numpy()
-                is_active_np = state.sim['is_active'].to_numpy()
-                
-                analyzer = get_molecular_analyzer()
-                analyzer.analyze_frame(
-                    pos_np, pos_z_np, atom_types_np, enlaces_idx_np,
-                    num_enlaces_np, molecule_id_np, is_active_np
-                )
-                
-                # Después del análisis, verificar misiones del jugador (Evento)
-                state.progression.check_mission()
-            except Exception as e:
-                pass  # Silenciar errores durante inicialización
+        # Worker ocupado: se salta el tick sin leer la GPU
+        if not state.sim or worker.is_busy():
+            return
+        try:
+            from src.renderer.opengl_kernels import read_analysis_prefix
+            # Con el worker libre, el resumen inicial se arma sin carreras
+            if state.analysis_result is None:
+                state.analysis_result = get_molecular_analyzer().get_summary()
+            
+            n = state.n_particles_val
+            pos_np = np.empty((n, 2), dtype=np.float32)
+            pos_z_np = np.empty(n, dtype=np.float32)
+            molecule_id_np = np.empty(n, dtype=np.int32)
+            is_active_np = np.empty(n, dtype=np.int32)
+            read_analysis_prefix(pos_np, pos_z_np, molecule_id_np, is_active_np)
+            
+            # Las copias host se comparten con el hilo principal: el worker recibe las suyas
+            enlaces_idx_np, num_enlaces_np = state.get_bonds_host()
+            atom_types_np = state.get_atom_types_host()
+            
+            worker.submit_snapshot(
+                pos_np, pos_z_np, atom_types_np[:n].copy(), enlaces_idx_np[:n].copy(),
+                num_enlaces_np[:n].copy(), molecule_id_np, is_active_np
+            )
+        except Exception as e:
+            pass  # Silenciar errores durante inicialización
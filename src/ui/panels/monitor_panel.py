@@ -5,7 +5,7 @@ Monitor Panel - Panel de monitoreo de actividad molecular.
 from imgui_bundle import imgui
 from imgui_bundle import imgui
 from src.config import UIConfig, UIWidgets
-from src.systems.taichi_fields import total_bonds_broken_dist
+from src.core.context import STAT_BONDS, STAT_BROKEN, STAT_TUN, STAT_BROKEN_DIST
 
 
 def draw_monitor_panel(state, show_debug: bool, win_w: float):
@@ -35,10 +35,10 @@ def draw_monitor_panel(state, show_debug: bool, win_w: float):
         UIWidgets.section_header("MÉTRICAS DE EVOLUCIÓN", "📊")
         
         imgui.begin_table("StatsInfo", 2)
-        UIWidgets.metric_row("Enlaces Formados:", state.stats['bonds_formed'], UIConfig.COLOR_BOND_FORMED)
-        UIWidgets.metric_row("Enlaces Rotos:", state.stats['bonds_broken'], UIConfig.COLOR_BOND_BROKEN)
-        UIWidgets.metric_row("Rotos por Dist.:", total_bonds_broken_dist[None], (1.0, 0.4, 0.4, 1.0))
-        UIWidgets.metric_row("Transiciones Energ.:", state.stats['tunnels'], (0.8, 0.6, 1.0, 1.0))
+        UIWidgets.metric_row("Enlaces Formados:", int(state.stats[STAT_BONDS]), UIConfig.COLOR_BOND_FORMED)
+        UIWidgets.metric_row("Enlaces Rotos:", int(state.stats[STAT_BROKEN]), UIConfig.COLOR_BOND_BROKEN)
+        UIWidgets.metric_row("Rotos por Dist.:", int(state.stats[STAT_BROKEN_DIST]), (1.0, 0.4, 0.4, 1.0))
+        UIWidgets.metric_row("Transiciones Energ.:", int(state.stats[STAT_TUN]), (0.8, 0.6, 1.0, 1.0))
         imgui.end_table()
         
         # Bitácora de Eventos
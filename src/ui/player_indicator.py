@@ -8,22 +8,27 @@ import math
 from imgui_bundle import imgui
 import src.config as cfg
 
-def draw_player_indicator(player_idx, pos_gpu, camera_params, win_w: int, win_h: int, frame_idx: int = 0, total_frames: int = 1):
+# Halo rings: (base radius, sin(i), cos(i), color) precomputed once.
+# Per frame only sin/cos(4t) are evaluated; sin(4t + i) comes from the
+# angle-sum identity instead of one trig call per ring.
+_HALO_INNER_RADIUS = 15.0
+_HALO_RINGS = [
+    (_HALO_INNER_RADIUS + i * 5.0, math.sin(i), math.cos(i),
+     imgui.IM_COL32(100, 200, 255, int(200 / (i + 1))))
+    for i in range(3)
+]
+
+def draw_player_indicator(player_idx, player_pos, camera_params, win_w: int, win_h: int, frame_idx: int = 0, total_frames: int = 1):
     """
     Draws a visual indicator (Atomic Farmer) above the player's atom.
     Supports sprite sheets via frame_idx and total_frames.
     """
-    if player_idx < 0 or pos_gpu is None:
-        return
-        
-    # 1. Get player position from GPU
-    # Optimization: Only get the player's position, not the whole array
-    # However, since we already have the array in render_data['pos'], we use that
-    pos_all = pos_gpu.to_numpy()
-    if player_idx >= len(pos_all):
+    if player_idx < 0 or player_pos is None:
         return
         
-    px, py = pos_all[player_idx]
+    # 1. Player position: compact_render_data writes it into the frame stats
+    # (no full pos.to_numpy() per frame)
+    px, py = player_pos
     
     # 2. Project World -> Screen
     cx, cy, vis_w_half, vis_h_half = camera_params
@@ -42,20 +47,12 @@ def draw_player_indicator(player_idx, pos_gpu, camera_params, win_w: int, win_h:
     t = time.time()
     
     # 3. Draw Animated Halo (Glowing Ring)
-    inner_radius = 15.0
-    outer_radius = 20.0 + math.sin(t * 5.0) * 5.0
-    
-    # Pulsing color (Golden/Cyan)
-    pulse = (math.sin(t * 3.0) + 1.0) * 0.5
-    color_inner = imgui.IM_COL32(255, 215, 0, 180) # Gold
-    color_outer = imgui.IM_COL32(0, 255, 255, int(pulse * 100)) # Cyan glow
-    
-    # draw_list.add_circle((sx, sy), inner_radius, color_inner, num_segments=32, thickness=2.0)
-    for i in range(3):
-        r = inner_radius + i * 5.0 + math.sin(t * 4.0 + i) * 2.0
-        alpha = int(200 / (i + 1))
-        col = imgui.IM_COL32(100, 200, 255, alpha)
-        draw_list.add_circle((sx, sy), r, col, num_segments=32, thickness=1.5)
+    s4, c4 = math.sin(t * 4.0), math.cos(t * 4.0)
+    for base_r, sin_i, cos_i, col in _HALO_RINGS:
+        r = base_r + (s4 * cos_i + c4 * sin_i) * 2.0
+        # num_segments=0: ImGui usa su tabla precalculada de vértices de arco
+        # (círculo unitario escalado) en vez de evaluar cos/sin por segmento
+        draw_list.add_circle((sx, sy), r, col, num_segments=0, thickness=1.5)
 
     # 4. Draw "Atomic Farmer" Sprite
     tex_data = get_player_texture_data()